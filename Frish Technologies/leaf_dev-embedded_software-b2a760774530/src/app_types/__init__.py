@@ -11,9 +11,40 @@ def to_dict(d: dict):
     return _d
 
 
+_slot_fields = dict()  # class -> slot names of the class and its bases
+
+
+def slot_fields(cls) -> tuple:
+    """ Slot names of a class and its bases, base classes first, computed once per class """
+    fields = _slot_fields.get(cls)
+    if fields is None:
+        names = []
+        for klass in reversed(cls.__mro__):
+            slots = klass.__dict__.get('__slots__', ())
+            for name in (slots,) if isinstance(slots, str) else slots:
+                if name not in ('__dict__', '__weakref__') and name not in names:
+                    names.append(name)
+        fields = _slot_fields[cls] = tuple(names)
+    return fields
+
+
 class BaseType(object):
+    __slots__ = ()  # subclasses without __slots__ keep their __dict__
+
     def to_dict(self):
-        return to_dict(self.__dict__)
+        fields = slot_fields(type(self))
+        if not fields:
+            return to_dict(self.__dict__)
+        # slotted: one dict, nested values converted in place
+        d = {name: getattr(self, name) for name in fields if hasattr(self, name)}
+        if hasattr(self, '__dict__'):
+            d.update(self.__dict__)
+        for key, val in d.items():
+            if hasattr(val, 'to_dict'):
+                d[key] = val.to_dict()
+            elif isinstance(val, dict):
+                d[key] = to_dict(val)
+        return d
 
     @classmethod
     def from_dict(cls, dikt):
@@ -21,8 +52,14 @@ class BaseType(object):
 
     def __eq__(self, other):
         """Returns true if both objects are equal"""
+        if self is other:
+            return True
         if not isinstance(other, type(self)):
             return False
+        fields = slot_fields(type(self))
+        if fields and not hasattr(self, '__dict__') and type(other) is type(self):
+            # slotted: compare the values without building dicts
+            return all(getattr(self, name, None) == getattr(other, name, None) for name in fields)
         return self.to_dict() == other.to_dict()
 
     def __ne__(self, other):
@@ -0,0 +1,201 @@
+"""
+Asyncio Leaf API client
+-------------------------
+
+The serial port file descriptor is read by the event loop (`loop.add_reader`),
+no receive thread is used. POSIX only.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+
+import serial
+
+from leafapi.client import default_acquire_timeout, default_res_rx_timeout
+from leafapi.exceptions import LeafTimeoutException, InvalidMessageReceivedException, LeafIOException
+from leafapi.frame import packet_header, FRAME_MAX_SIZE
+from leafapi.frame_parser import FrameParser
+from leafapi.interfaces import ILeafApiClient
+from leafapi.pipeline import PendingRequest
+from leafapi.request_message import ReadRegistersRequest, ReadRegistersResponse, WriteRegistersResponse, \
+    WriteRegistersRequest
+from leafapi.serial_protocol import COM_PORT_NAME
+
+
+class AsyncSerialTransport(object):
+    """
+    Non-blocking serial port driven by the event loop.
+    Must be created inside the running loop.
+    """
+
+    def __init__(self, serial_port=COM_PORT_NAME, baudrate=115200):
+        self.log = logging.getLogger('ASP')
+
+        self.serial = serial.Serial()
+        self.serial.port = serial_port
+        self.serial.baudrate = baudrate
+        self.serial.timeout = 0  # non-blocking reads
+        self.serial.parity = serial.PARITY_NONE
+        self.serial.stopbits = serial.STOPBITS_ONE
+        self.serial.bytesize = serial.EIGHTBITS
+
+        self.serial.open()
+        self.serial.reset_input_buffer()
+        self.serial.reset_output_buffer()
+
+        self.parser = FrameParser()
+        self._frames = deque()
+        self._waiter = None
+        self.rx_error = None
+
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(self.serial.fileno(), self._on_readable)
+
+    def close(self):
+        if self.serial.is_open:
+            self._loop.remove_reader(self.serial.fileno())
+            self.serial.close()
+
+    def _on_readable(self):
+        try:
+            data = self.serial.read(self.serial.in_waiting or 1)
+        except OSError as ex:  # SerialException or the OSError of in_waiting
+            # the port is gone, stop reading it and fail the waiting reader
+            self.log.error("rx: {}".format(ex))
+            self.rx_error = ex
+            self.close()
+            if self._waiter is not None and not self._waiter.done():
+                self._waiter.set_exception(LeafIOException("Receive stopped: {}".format(ex)))
+            return
+        if not data:
+            return
+
+        self._frames.extend(self.parser.feed(data))
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    def discard_frames(self):
+        """ Drop received frames nobody waited for """
+        self._frames.clear()
+
+    def write(self, data: (bytearray, bytes, memoryview)):
+        if self.log.isEnabledFor(logging.DEBUG):
+            self.log.debug("{}".format(bytes(data)))
+        try:
+            self.serial.write(data)
+        except serial.SerialException as _ex:
+            raise LeafIOException(str(_ex))
+
+    async def read_frame(self, timeout=-1) -> bytes:
+        """ Wait for the next valid frame
+
+        :param timeout: Seconds to wait, negative value - wait forever
+        :returns: Packet payload of the received frame
+        """
+        deadline = time.monotonic() + timeout if timeout >= 0 else None
+
+        while not self._frames:
+            if self.rx_error is not None:
+                raise LeafIOException("Receive stopped: {}".format(self.rx_error))
+            remaining = None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise LeafTimeoutException("Waiting for frame timeout!")
+
+            errors = self.parser.errors
+            self._waiter = self._loop.create_future()
+            try:
+                await asyncio.wait_for(self._waiter, remaining)
+            except asyncio.TimeoutError:
+                raise LeafTimeoutException("Waiting for frame timeout!")
+            finally:
+                self._waiter = None
+
+            if not self._frames and errors != self.parser.errors:
+                raise InvalidMessageReceivedException("Frame error, errors: {}".format(self.parser.errors))
+
+        return self._frames.popleft()
+
+
+class AsyncApiClient(ILeafApiClient):
+    """
+    Leaf API client for asyncio applications, must be created inside the running loop.
+
+    A cancelled or timed out request leaves nothing behind: its late response is
+    recognised by the header check of the next request and dropped.
+    """
+
+    def __init__(self, serial_port=COM_PORT_NAME, baudrate=115200):
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        self._transport = AsyncSerialTransport(serial_port, baudrate)
+        self._lock = asyncio.Lock()
+        self._tx_buffer = bytearray(FRAME_MAX_SIZE)
+
+        self.stale_frames = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self._transport.close()
+
+    async def _execute(self, req, res, timeout):
+        try:
+            await asyncio.wait_for(self._lock.acquire(), timeout[0] if timeout[0] >= 0 else None)
+        except asyncio.TimeoutError:
+            raise LeafTimeoutException("Port acquire")
+        try:
+            size = req.encode_into(self._tx_buffer)
+            self._transport.discard_frames()
+            with memoryview(self._tx_buffer) as frame:
+                self._transport.write(frame[:size])
+
+            pending = PendingRequest(req)
+            start_time = time.monotonic()
+            deadline = start_time + timeout[1] if timeout[1] >= 0 else None
+            try:
+                while True:
+                    frame = await self._transport.read_frame(
+                        max(0.0, deadline - time.monotonic()) if deadline is not None else -1)
+                    r_type, mpu_addr, register_addr, data_len = packet_header.unpack_from(frame)
+                    if mpu_addr == req.mpu_addr and pending.match(r_type, register_addr, data_len):
+                        break
+                    # response of an earlier timed out or cancelled request
+                    self.stale_frames += 1
+                    self.log.warning("stale frame, mpu_addr: {}, register_addr: {}".format(mpu_addr, register_addr))
+            finally:
+                res.rx_wait_time = time.monotonic() - start_time
+
+            res.decode(frame)
+        finally:
+            self._lock.release()
+
+    async def read_registers(self, unit: int, address: int, count: int, **kwargs) -> ReadRegistersResponse:
+        timeout = kwargs.get('timeout', (default_acquire_timeout, default_res_rx_timeout))
+        if self.log.isEnabledFor(logging.DEBUG):
+            self.log.debug("unit: {}, address: {}, count: {}, timeout: {}".format(unit, address, count, timeout))
+
+        req = ReadRegistersRequest(mpu_addr=unit, register_addr=address, data_len=count)
+        res = ReadRegistersResponse(mpu_addr=unit, register_addr=address, data_len=count)
+
+        await self._execute(req, res, timeout)
+        return res
+
+    async def write_registers(self, unit: int, address: int, count: int, data: bytes,
+                              **kwargs) -> WriteRegistersResponse:
+        timeout = kwargs.get('timeout', (default_acquire_timeout, default_res_rx_timeout))
+        if self.log.isEnabledFor(logging.DEBUG):
+            self.log.debug("unit: {}, address: {}, count: {}, data: {}, timeout: {}".format(
+                unit, address, count, data, timeout))
+
+        req = WriteRegistersRequest(mpu_addr=unit, register_addr=address, data_len=count, data=data)
+        res = WriteRegistersResponse(mpu_addr=unit, register_addr=address, data_len=count)
+
+        await self._execute(req, res, timeout)
+        return res
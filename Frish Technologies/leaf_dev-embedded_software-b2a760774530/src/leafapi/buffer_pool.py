@@ -0,0 +1,42 @@
+"""
+Pool of reusable byte buffers
+"""
+from collections import deque
+from contextlib import contextmanager
+
+
+class BufferPool(object):
+    """
+    Preallocated bytearray buffers of the same size.
+
+    Buffers are handed out and returned instead of being allocated per request,
+    the pool grows when more buffers are in use at once than were preallocated.
+    """
+
+    def __init__(self, buffer_size: int, count=2):
+        """
+        :param buffer_size: Size of every buffer in bytes
+        :param count: Number of preallocated buffers
+        """
+        self.buffer_size = buffer_size
+        self._free = deque(bytearray(buffer_size) for _ in range(count))
+        self.allocated = count
+
+    def acquire(self) -> bytearray:
+        try:
+            return self._free.pop()
+        except IndexError:
+            self.allocated += 1
+            return bytearray(self.buffer_size)
+
+    def release(self, buffer: bytearray):
+        self._free.append(buffer)
+
+    @contextmanager
+    def buffer(self):
+        """ Borrow a buffer for the duration of the `with` block """
+        buffer = self.acquire()
+        try:
+            yield buffer
+        finally:
+            self.release(buffer)
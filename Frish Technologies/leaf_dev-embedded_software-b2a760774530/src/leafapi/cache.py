@@ -0,0 +1,152 @@
+"""
+Leaf API register cache
+-------------------------
+
+Read responses are kept for a time to live, reads of slow changing registers
+(firmware version, configuration) are served without a bus round trip.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from leafapi.interfaces import ILeafApiClient
+from leafapi.request_message import ReadRegistersResponse, WriteRegistersResponse
+
+DEFAULT_TTL = 0.0  # seconds, not cached
+DEFAULT_MAX_ENTRIES = 256
+REGISTER_SIZE = 2  # bytes per register address
+
+
+def _address_range(key) -> range:
+    """ Register addresses of a ttl rule key: a `range`, a (first, last) tuple (inclusive),
+    a single address or a register descriptor (`address` and `size` in bytes)
+    """
+    if isinstance(key, range):
+        return key
+    if isinstance(key, tuple):
+        return range(key[0], key[1] + 1)
+    if isinstance(key, int):
+        return range(key, key + 1)
+    return range(key.address, key.address + max(1, (key.size + REGISTER_SIZE - 1) // REGISTER_SIZE))
+
+
+class CachingApiClient(ILeafApiClient):
+    """
+    Caching proxy of an ILeafApiClient.
+
+    Entries are keyed by (unit, address, count), a read inside a cached larger block
+    is served from the block. Any write invalidates the cached blocks it overlaps,
+    the least recently used entry is evicted when `max_entries` is reached.
+    """
+
+    def __init__(self, client, default_ttl=DEFAULT_TTL, ttl=None, max_entries=DEFAULT_MAX_ENTRIES):
+        """
+        :param client: The ILeafApiClient to cache
+        :param default_ttl: Time to live (seconds) of addresses not matched by `ttl`, 0 - not cached
+        :param ttl: Time to live per address range, {range / (first, last) / address / Register: seconds},
+            a read spanning several rules gets the shortest time to live
+        :param max_entries: Maximal number of cached blocks
+        """
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        self.client = client
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self._ttl = [(_address_range(key), seconds) for key, seconds in (ttl or {}).items()]
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (unit, address, count) -> (expires, data)
+        self._generation = 0  # invalidation count, a read racing a write is not stored
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def close(self):
+        self.client.close()
+
+    def ttl_of(self, address: int, count: int) -> float:
+        """ Time to live of a read of `count` bytes at `address` """
+        end = address + max(1, (count + REGISTER_SIZE - 1) // REGISTER_SIZE)
+        ttl = None
+        for addresses, seconds in self._ttl:
+            if addresses.start < end and address < addresses.stop:
+                ttl = seconds if ttl is None else min(ttl, seconds)
+        return self.default_ttl if ttl is None else ttl
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'entries': len(self._entries)}
+
+    def _lookup(self, unit, address, count):
+        """ Cached data of the range or None, must be called with the lock held """
+        now = time.monotonic()
+        key = (unit, address, count)
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                self._entries.move_to_end(key)
+                return entry[1]
+            del self._entries[key]
+
+        for key, (expires, data) in self._entries.items():
+            e_unit, e_address, e_count = key
+            offset = (address - e_address) * REGISTER_SIZE
+            if e_unit == unit and e_address <= address and offset + count <= e_count and expires > now:
+                self._entries.move_to_end(key)
+                return data[offset:offset + count]
+        return None
+
+    def _store(self, unit, address, count, ttl, data, generation):
+        with self._lock:
+            if generation != self._generation:
+                return
+            key = (unit, address, count)
+            self._entries[key] = (time.monotonic() + ttl, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, unit=None, address=0, count=None):
+        """ Drop the cached blocks overlapping the range, everything of the unit if `count` is None,
+        everything if `unit` is None too
+        """
+        with self._lock:
+            self._generation += 1
+            if unit is None:
+                self._entries.clear()
+                return
+            end = address + max(1, (count + REGISTER_SIZE - 1) // REGISTER_SIZE) if count is not None else None
+            for key in list(self._entries):
+                e_unit, e_address, e_count = key
+                e_end = e_address + max(1, (e_count + REGISTER_SIZE - 1) // REGISTER_SIZE)
+                if e_unit == unit and (end is None or (e_address < end and address < e_end)):
+                    del self._entries[key]
+
+    def read_registers(self, unit: int, address: int, count: int, **kwargs) -> ReadRegistersResponse:
+        ttl = self.ttl_of(address, count)
+        if ttl > 0:
+            with self._lock:
+                generation = self._generation
+                data = self._lookup(unit, address, count)
+                if data is not None:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+            if data is not None:
+                return ReadRegistersResponse(mpu_addr=unit, register_addr=address, data_len=count, data=data)
+
+        res = self.client.read_registers(unit, address, count, **kwargs)
+        if ttl > 0 and not res.is_error():
+            self._store(unit, address, count, ttl, bytes(res.data), generation)
+        return res
+
+    def write_registers(self, unit: int, address: int, count: int, data: bytes, **kwargs) -> WriteRegistersResponse:
+        try:
+            return self.client.write_registers(unit, address, count, data=data, **kwargs)
+        finally:
+            # a failed or timed out write may have been applied as well
+            self.invalidate(unit, address, count)
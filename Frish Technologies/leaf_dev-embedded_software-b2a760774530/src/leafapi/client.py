@@ -2,62 +2,267 @@ import logging
 import threading
 import time
 
+from leafapi.buffer_pool import BufferPool
 from leafapi.exceptions import LeafTimeoutException, InvalidMessageReceivedException, LeafException
+from leafapi.frame import FRAME_MAX_SIZE, SP_PKG_TYPE_REQW, packet_header
 from leafapi.interfaces import ILeafApiClient
+from leafapi.pipeline import Pipeline, PendingRequest
+from leafapi.priority_lock import PriorityLock, PRIORITY_NORMAL
 from leafapi.request_message import ReadRegistersRequest, ReadRegistersResponse, WriteRegistersResponse, \
     WriteRegistersRequest
-from leafapi.serial_protocol import SerialProtocolInterface
+from leafapi.retry import RetryPolicy
+from leafapi.serial_protocol import SerialProtocolInterface, COM_PORT_NAME
+from leafapi.single_flight import SingleFlight
+from leafapi.unit_health import UnitHealthMonitor
 
 default_res_rx_timeout = 5
 default_acquire_timeout = -1  # -1 mean forever
 
 
 class ApiClient(ILeafApiClient):
-    def __init__(self):
+    def __init__(self, serial_port=COM_PORT_NAME, baudrate=115200, pipeline_window=1, single_flight=False,
+                 unit_health=False, retry: RetryPolicy = None):
+        """
+        :param serial_port: Serial port of the bus
+        :param baudrate: Baudrate of the serial port
+        :param pipeline_window: Number of requests to different units kept in flight at once,
+            1 - one transaction on the bus at a time
+        :param single_flight: Join concurrent identical reads into one bus transaction,
+            the joined callers share one response object and must not modify it, off by default
+        :param unit_health: Derive the response timeout of a unit from its measured round trip times
+            and fail requests to a unit fast after repeated timeouts (circuit breaker), off by default.
+            The derived timeout stays within 0.05 - 5 s, an explicit `timeout` argument is used as is,
+            requests to an unavailable unit raise UnitUnavailableException
+        :param retry: RetryPolicy of reads, failed reads are not repeated if not given
+
+        Requests take a `priority` argument (leafapi.priority_lock PRIORITY_CONTROL, PRIORITY_NORMAL,
+        PRIORITY_BACKGROUND), requests waiting for the port are executed highest priority first,
+        in the pipelined mode they take the free pipeline slots highest priority first.
+        """
         self.log = logging.getLogger(self.__class__.__name__)
 
-        self._sp = SerialProtocolInterface()
-        self._lock = threading.Lock()
+        self.serial_port = serial_port
+        self._sp = SerialProtocolInterface(serial_port, baudrate)
+        self._lock = PriorityLock()
+        self._tx_pool = BufferPool(FRAME_MAX_SIZE)
+        self._pipeline = Pipeline(self._sp, pipeline_window) if pipeline_window > 1 else None
+        self._single_flight = SingleFlight() if single_flight else None
+        self._health = UnitHealthMonitor(max_timeout=default_res_rx_timeout) if unit_health else None
+
+        self.retry = retry
+        self.stale_frames = 0  # late responses of timed out requests, dropped
+
+    @property
+    def pipeline(self):
+        """ Pipeline of the pipelined mode, None when requests are executed one by one """
+        return self._pipeline
+
+    @property
+    def saved_transactions(self) -> int:
+        """ Number of reads served by joining an identical read in progress """
+        return self._single_flight.saved if self._single_flight is not None else 0
+
+    def get_unit_state(self, unit: int) -> dict:
+        """ Health of the unit: state (closed, open, half-open), timeout, srtt, rttvar, failures, open_until """
+        if self._health is None:
+            return {'state': 'closed', 'timeout': default_res_rx_timeout}
+        return self._health.state_of(unit)
+
+    def wait_stats(self) -> dict:
+        """ Port wait times per priority class: count, total, max and mean (seconds) """
+        return self._lock.wait_stats()
 
     def close(self):
+        if self._pipeline is not None:
+            self._pipeline.close()
         self._sp.close()
 
-    def _execute(self, req, res, timeout):
-        if not self._lock.acquire(timeout=timeout[0]):
-            raise LeafTimeoutException("Port acquire")
+    def _timeout_of(self, unit, timeout):
+        """ The explicit timeout or the default one with the response timeout of the unit """
+        if timeout is not None:
+            return timeout
+        if self._health is not None:
+            return default_acquire_timeout, self._health.timeout_of(unit)
+        return default_acquire_timeout, default_res_rx_timeout
+
+    def _checked(self, req, res, fn, *args):
+        """ Run a transaction through the circuit breaker of the unit """
+        if self._health is None:
+            return fn(*args)
+        self._health.check(req.mpu_addr)
+        try:
+            fn(*args)
+        except LeafTimeoutException:
+            # rx_wait_time is only set once the request was sent
+            if res.rx_wait_time is not None:
+                self._health.failure(req.mpu_addr)
+            else:
+                self._health.cancel(req.mpu_addr)
+            raise
+        except BaseException:
+            self._health.cancel(req.mpu_addr)
+            raise
+        self._health.success(req.mpu_addr, res.rx_wait_time)
+
+    def _execute(self, req, res, timeout, priority=PRIORITY_NORMAL):
+        self._checked(req, res, self._transact, req, res, timeout, priority)
+
+    def _transact(self, req, res, timeout, priority):
+        with self._tx_pool.buffer() as buffer:
+            # encode into a pooled buffer before taking the port
+            size = req.encode_into(buffer)
+
+            deadline = time.monotonic() + timeout[0] if timeout[0] >= 0 else None
+            if not self._lock.acquire(priority, timeout=timeout[0]):
+                raise LeafTimeoutException("Port acquire")
+            try:
+                with memoryview(buffer) as frame:
+                    if self._pipeline is None:
+                        self._send(req, frame[:size], res, timeout)
+                        return
+                    # pipelined: the priority lock orders the requests taking a slot, it is
+                    # released once the frame is sent and the response is awaited without it
+                    pending = self._pipeline.submit(req, frame[:size], max(0.0, deadline - time.monotonic())
+                                                    if deadline is not None else -1)
+            finally:
+                self._lock.release()
+        self._pipeline.wait(pending, res, timeout[1])
+
+    def _send(self, req, frame, res, timeout):
+        """ Send an encoded request and wait for its response, the port must be taken """
+        if self._pipeline is not None:
+            self._pipeline.execute(req, frame, res, timeout)
+            return
+
+        self._sp.write(frame)
+        pending = PendingRequest(req)
+        start_time = time.monotonic()
+        deadline = start_time + timeout[1] if timeout[1] >= 0 else None
         try:
-            self._sp.write_req(req)
-            res.decode(self._sp.read_res(timeout=timeout[1]))
+            while True:
+                rx_frame = self._sp.read_res(timeout=max(0.0, deadline - time.monotonic())
+                                             if deadline is not None else -1)
+                r_type, mpu_addr, register_addr, data_len = packet_header.unpack_from(rx_frame)
+                if mpu_addr == req.mpu_addr and pending.match(r_type, register_addr, data_len):
+                    break
+                self.stale_frames += 1
+                self.log.warning("stale frame, mpu_addr: {}, register_addr: {}".format(mpu_addr, register_addr))
         finally:
-            self._lock.release()
+            res.rx_wait_time = time.monotonic() - start_time
+        res.decode(rx_frame)
 
     def read_registers(self, unit: int, address: int, count: int, **kwargs) -> ReadRegistersResponse:
-        timeout = kwargs.get('timeout', (default_acquire_timeout, default_res_rx_timeout))
-        self.log.debug("unit: {}, address: {}, count: {}, timeout: {}".format(unit, address, count, timeout))
-
-        req = ReadRegistersRequest(mpu_addr=unit, register_addr=address, data_len=count)
-        self.log.debug("{}".format(req))
-        res = ReadRegistersResponse(mpu_addr=unit, register_addr=address, data_len=count)
-
-        self._execute(req, res, timeout)
-
-        self.log.debug("{}".format(res))
+        timeout = self._timeout_of(unit, kwargs.get('timeout'))
+        priority = kwargs.get('priority', PRIORITY_NORMAL)
+        debug = self.log.isEnabledFor(logging.DEBUG)
+        if debug:
+            self.log.debug("unit: {}, address: {}, count: {}, timeout: {}".format(unit, address, count, timeout))
+
+        def read():
+            req = ReadRegistersRequest(mpu_addr=unit, register_addr=address, data_len=count)
+            if debug:
+                self.log.debug("{}".format(req))
+            attempt = 0
+            while True:
+                _res = ReadRegistersResponse(mpu_addr=unit, register_addr=address, data_len=count)
+                try:
+                    self._execute(req, _res, timeout, priority)
+                    return _res
+                except LeafException as ex:
+                    if self.retry is None or not self.retry.should_retry(ex, _res, attempt):
+                        raise
+                    self.log.warning("unit: {}, address: {}, retry {}: {}".format(unit, address, attempt + 1, ex))
+                attempt += 1
+                if self.retry.delay > 0:
+                    time.sleep(self.retry.delay)
+
+        if self._single_flight is not None:
+            # a joined caller waits no longer than its own request could take
+            wait = timeout[0] + timeout[1] if timeout[0] >= 0 and timeout[1] >= 0 else None
+            res = self._single_flight.do((unit, address, count), read, wait)
+        else:
+            res = read()
+
+        if debug:
+            self.log.debug("{}".format(res))
         return res
 
     def write_registers(self, unit: int, address: int, count: int, data: bytes, **kwargs) -> WriteRegistersResponse:
-        timeout = kwargs.get('timeout', (default_acquire_timeout, default_res_rx_timeout))
-        self.log.debug("unit: {}, address: {}, count: {}, data: {}, timeout: {}".format(
-            unit, address, count, data, timeout))
+        timeout = self._timeout_of(unit, kwargs.get('timeout'))
+        priority = kwargs.get('priority', PRIORITY_NORMAL)
+        debug = self.log.isEnabledFor(logging.DEBUG)
+        if debug:
+            self.log.debug("unit: {}, address: {}, count: {}, data: {}, timeout: {}".format(
+                unit, address, count, data, timeout))
 
         req = WriteRegistersRequest(mpu_addr=unit, register_addr=address, data_len=count, data=data)
-        self.log.debug("{}".format(req))
+        if debug:
+            self.log.debug("{}".format(req))
         res = WriteRegistersResponse(mpu_addr=unit, register_addr=address, data_len=count)
 
-        self._execute(req, res, timeout)
+        self._execute(req, res, timeout, priority)
 
-        self.log.debug("{}".format(res))
+        if debug:
+            self.log.debug("{}".format(res))
         return res
 
+    def execute_many(self, requests: list, **kwargs) -> list:
+        """ Execute a list of requests taking the port once
+
+        All frames are encoded into one buffer before the port is taken, the requests are
+        sent one by one in order and no other request gets in between.
+        In the pipelined mode the requests go through the pipeline one after another, requests
+        of other callers already in flight complete but no new one is sent until the batch is done.
+
+        :param requests: ReadRegistersRequest / WriteRegistersRequest list
+        :param kwargs: timeout - (acquire, rx) where rx is the budget of the whole batch, priority
+            (with unit_health a request waits no longer than the response timeout of its unit)
+        :returns: ReadRegistersResponse / WriteRegistersResponse or the LeafException of every request,
+            in request order, the requests left when the budget runs out get LeafTimeoutException
+        """
+        timeout = kwargs.get('timeout', (default_acquire_timeout, default_res_rx_timeout))
+        priority = kwargs.get('priority', PRIORITY_NORMAL)
+        if self.log.isEnabledFor(logging.DEBUG):
+            self.log.debug("requests: {}, timeout: {}".format(len(requests), timeout))
+
+        results = []
+        for req in requests:
+            res_cls = WriteRegistersResponse if req.r_type == SP_PKG_TYPE_REQW else ReadRegistersResponse
+            results.append(res_cls(mpu_addr=req.mpu_addr, register_addr=req.register_addr, data_len=req.data_len))
+
+        buffer = bytearray(sum(req.frame_size() for req in requests))
+        frames = []
+        offset = 0
+        for req in requests:
+            size = req.encode_into(buffer, offset)
+            frames.append((offset, offset + size))
+            offset += size
+
+        if not self._lock.acquire(priority, timeout=timeout[0]):
+            raise LeafTimeoutException("Port acquire")
+        try:
+            deadline = time.monotonic() + timeout[1] if timeout[1] >= 0 else None
+            with memoryview(buffer) as view:
+                for i, (req, (start, end)) in enumerate(zip(requests, frames)):
+                    remaining = -1
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            results[i] = LeafTimeoutException("Batch budget, request {}".format(i))
+                            continue
+                    rx_timeout = remaining
+                    if self._health is not None:
+                        unit_timeout = self._health.timeout_of(req.mpu_addr)
+                        rx_timeout = min(remaining, unit_timeout) if remaining >= 0 else unit_timeout
+                    try:
+                        self._checked(req, results[i], self._send, req, view[start:end], results[i],
+                                      (timeout[0], rx_timeout))
+                    except LeafException as ex:
+                        results[i] = ex
+        finally:
+            self._lock.release()
+        return results
+
 
 def test(client, stop_e, d):
     mpu_addr = 0
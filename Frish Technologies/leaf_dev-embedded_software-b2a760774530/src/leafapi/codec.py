@@ -0,0 +1,149 @@
+"""
+Serial protocol codec backends
+--------------------------------
+
+`StructCodec` encodes and decodes frames with precompiled `struct` layouts and
+the stdlib CRC16 (table driven, see `leafapi.frame`), it needs no compiled modules.
+`SwigCodec` goes through the SWIG `serial_protocol` extension built from the
+firmware sources and is only available when the extension is built.
+
+`ApiRequest.encode`, `ApiRequest.encode_into` (the client transmit path) and
+`ApiResponse.decode` use the codec of the PDU, which is the default codec unless
+one is passed with the `codec` keyword. Both codecs encode into a buffer from the
+cached frame template of the request (`leafapi.pdu.FrameTemplate`), the frames are
+byte identical to the ones of the SWIG module and no frame is allocated per request.
+"""
+import logging
+
+from leafapi.exceptions import InvalidMessageCreationException, NotImplementedException, ParameterException
+from leafapi.frame import sp, packet_header, PACKET_HEADER_SIZE, SP_PKG_TYPE_ERROR_FLAG
+
+_logger = logging.getLogger(__name__)
+
+
+class StructCodec(object):
+    """ Pure python codec """
+    name = 'struct'
+
+    def encode(self, req, tr_frame=None) -> bytes:
+        """ Encode the request frame
+
+        :param req: The request to encode
+        :param tr_frame: Not used
+        :returns: Frame bytes
+        """
+        buffer = bytearray(req.frame_size())
+        self.encode_into(req, buffer)
+        return bytes(buffer)
+
+    def encode_into(self, req, buffer, offset=0) -> int:
+        """ Encode the request frame into the buffer from the cached frame template of the request
+
+        :param req: The request to encode
+        :param buffer: Writable buffer
+        :param offset: Position of the frame in the buffer
+        :returns: Size of the encoded frame
+        """
+        return req.frame_template().encode_into(buffer, offset, req.data)
+
+    def decode(self, res, data):
+        """ Decode packet payload bytes into the response
+
+        :param res: The response to fill
+        :param data: Packet payload as returned by `FrameParser`
+        """
+        if not isinstance(data, (bytes, bytearray, memoryview)):
+            raise NotImplementedException("decode from {} is not implemented".format(type(data)))
+
+        res.r_type, res.mpu_addr, res.register_addr, res.data_len = packet_header.unpack_from(data)
+        res.data = bytes(data[PACKET_HEADER_SIZE:PACKET_HEADER_SIZE + res.data_len])
+
+        if res.r_type & SP_PKG_TYPE_ERROR_FLAG and res.data:
+            res.error_code = res.data[0]
+
+
+class SwigCodec(StructCodec):
+    """ Codec of the firmware serial protocol implementation (SWIG module) """
+    name = 'swig'
+
+    def encode(self, req, tr_frame=None) -> bytes:
+        """ Encode the request frame
+
+        :param req: The request to encode
+        :param tr_frame: Frame buffer to use, by default the request's own buffer
+        :returns: Frame bytes
+        """
+        if tr_frame is None:
+            if req._tr_frame is None:
+                req._tr_frame = sp.sp_tr_frame()
+            tr_frame = req._tr_frame
+        if req._packet is None:
+            req._packet = sp.sp_packet_format()
+
+        packet = req._packet
+        packet.type = req.r_type
+        packet.mpu_addr = req.mpu_addr
+        packet.register_addr = req.register_addr
+        packet.data_len = req.data_len
+
+        sp.packet_to_frame(req.data, packet, tr_frame)
+
+        ret = sp.sp_create_frame(tr_frame, sp.get_req_size(packet))
+        if ret != sp.SP_ERROR_OK:
+            raise InvalidMessageCreationException("sp_create_frame ret {}".format(ret))
+
+        buffer = bytes(sp.get_tx_size(tr_frame))
+        ret = sp.frame_to_bytes(buffer, tr_frame)
+        if ret <= 0:
+            raise InvalidMessageCreationException("frame_to_bytes ret {}".format(ret))
+
+        return buffer
+
+    def decode(self, res, data):
+        """ Decode a SWIG frame/packet, payload bytes are decoded by `StructCodec`
+
+        :param res: The response to fill
+        :param data: sp_tr_frame, sp_packet_format or packet payload bytes
+        """
+        if not isinstance(data, (sp.sp_tr_frame, sp.sp_packet_format)):
+            return super().decode(res, data)
+
+        if isinstance(data, sp.sp_tr_frame):
+            _packet = sp.sp_get_package_buf(data)
+        else:
+            _packet = data
+        res.r_type = _packet.type
+        res.mpu_addr = _packet.mpu_addr
+        res.register_addr = _packet.register_addr
+        res.data_len = _packet.data_len
+
+        if res.is_error():
+            res.error_code = sp.get_data_prom_packet(_packet)
+
+        res.data = bytes(_packet.data_len)
+        ret = sp.packet_data_to_bytes(res.data, _packet)
+        if ret < 0:
+            _logger.error("packet_data_to_bytes ret {}".format(ret))
+
+
+codecs = {StructCodec.name: StructCodec()}
+if sp is not None:
+    codecs[SwigCodec.name] = SwigCodec()
+
+_default_codec = codecs.get(SwigCodec.name, codecs[StructCodec.name])
+
+
+def get_codec(name=None):
+    """ Get codec by name, the default codec when name is None """
+    if name is None:
+        return _default_codec
+    try:
+        return codecs[name]
+    except KeyError:
+        raise ParameterException("codec {} is not available, available: {}".format(name, list(codecs)))
+
+
+def set_codec(name):
+    """ Select the default codec ('struct' or 'swig') """
+    global _default_codec
+    _default_codec = get_codec(name)
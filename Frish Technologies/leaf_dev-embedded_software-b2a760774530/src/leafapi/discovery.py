@@ -0,0 +1,200 @@
+"""
+Leaf API unit discovery
+-------------------------
+
+Finds the units answering on the buses by reading their firmware version.
+Absent units cost the probe timeout only, it starts short and follows the
+round trip times of the units found. Ports are scanned in parallel.
+
+The result can be cached in a JSON file, later runs verify the known units only.
+
+    python -m leafapi.discovery /dev/ttyUSB0 /dev/ttyUSB1 --cache units.json
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+
+from leafapi.client import ApiClient
+from leafapi.exceptions import LeafTimeoutException, LeafException
+from leafapi.pdu import DEFAULT_REGISTER_ADDR
+from leafapi.pool import MPU_ADDR_COUNT
+
+try:
+    import leafapi.leaf_sys.mb_data as mb_data
+    FW_VERSION_SIZE = mb_data.MB_IR_FW_VERSION_SIZE * 2
+except ImportError:
+    FW_VERSION_SIZE = 2
+
+FW_VERSION_ADDR = DEFAULT_REGISTER_ADDR  # MB_IR_FW_VERSION
+
+DEFAULT_PROBE_TIMEOUT = 0.1  # seconds, until the first unit answers
+MIN_PROBE_TIMEOUT = 0.01  # seconds
+PROBE_RTT_FACTOR = 3  # probe timeout = factor * slowest round trip seen
+VERIFY_TIMEOUT = 1.0  # seconds, known units are expected to answer
+
+_logger = logging.getLogger(__name__)
+
+
+class ProbeTimeout(object):
+    """ Probe timeout following the slowest round trip time seen on the bus """
+
+    def __init__(self, initial=DEFAULT_PROBE_TIMEOUT, minimum=MIN_PROBE_TIMEOUT, factor=PROBE_RTT_FACTOR):
+        self.initial = initial
+        self.minimum = minimum
+        self.factor = factor
+        self.max_rtt = None
+
+    @property
+    def value(self) -> float:
+        if self.max_rtt is None:
+            return self.initial
+        return min(self.initial, max(self.minimum, self.factor * self.max_rtt))
+
+    def add(self, rtt: float):
+        self.max_rtt = rtt if self.max_rtt is None else max(self.max_rtt, rtt)
+
+
+def probe(client, unit: int, timeout: float):
+    """ Read the firmware version of the unit
+
+    :returns: (answered, firmware version), the version is None for an error response
+    """
+    try:
+        res = client.read_registers(unit, FW_VERSION_ADDR, FW_VERSION_SIZE, timeout=(-1, timeout))
+    except LeafTimeoutException:
+        return False, None
+    if res.is_error() or len(res.data) < FW_VERSION_SIZE:
+        return True, None
+    return True, int.from_bytes(res.data[:FW_VERSION_SIZE], 'little')
+
+
+def scan(client, units=range(MPU_ADDR_COUNT), probe_timeout=None) -> dict:
+    """ Probe the units one by one
+
+    :param client: ApiClient of the bus
+    :param units: Unit addresses to probe
+    :param probe_timeout: ProbeTimeout, a new one if not given
+    :returns: {unit: firmware version}
+    """
+    probe_timeout = probe_timeout or ProbeTimeout()
+    found = dict()
+    for unit in units:
+        start_time = time.monotonic()
+        try:
+            answered, fw_version = probe(client, unit, probe_timeout.value)
+        except LeafException as ex:
+            # something answered, garbled
+            _logger.warning("unit {}: {}".format(unit, ex))
+            continue
+        if answered:
+            probe_timeout.add(time.monotonic() - start_time)
+            found[unit] = fw_version
+    return found
+
+
+def verify(client, known: dict, timeout=VERIFY_TIMEOUT) -> dict:
+    """ Probe the known units
+
+    :param known: {unit: firmware version} of an earlier scan
+    :returns: {unit: firmware version} of the units still answering
+    """
+    found = dict()
+    for unit in known:
+        try:
+            answered, fw_version = probe(client, unit, timeout)
+        except LeafException as ex:
+            _logger.warning("unit {}: {}".format(unit, ex))
+            continue
+        if answered:
+            found[unit] = fw_version
+        else:
+            _logger.warning("unit {} (fw {}) does not answer".format(unit, known[unit]))
+    return found
+
+
+def load_cache(path: str) -> dict:
+    """ {port: {unit: firmware version}} of the cache file, empty if there is none """
+    if not path or not os.path.exists(path):
+        return dict()
+    try:
+        with open(path) as f:
+            ports = json.load(f)['ports']
+        return {port: {int(unit): fw for unit, fw in units.items()} for port, units in ports.items()}
+    except (OSError, ValueError, KeyError, AttributeError) as ex:
+        _logger.warning("cache {}: {}".format(path, ex))
+        return dict()
+
+
+def save_cache(path: str, found: dict):
+    with open(path, 'w') as f:
+        json.dump({'time': time.time(), 'ports': found}, f, indent=2, sort_keys=True)
+
+
+def discover(ports, units=range(MPU_ADDR_COUNT), cache_file=None, rescan=False, baudrate=115200,
+             probe_timeout=DEFAULT_PROBE_TIMEOUT) -> dict:
+    """ Find the units of the ports, one thread per port
+
+    The interfaces are opened for the scan and closed afterwards,
+    use `scan` / `verify` with the application clients while they are open.
+
+    :param ports: Serial ports
+    :param units: Unit addresses to probe
+    :param cache_file: JSON file of an earlier discovery, the known units of a cached port are only verified
+    :param rescan: Ignore the cache content
+    :param baudrate: Baudrate of the ports
+    :param probe_timeout: Initial probe timeout (seconds)
+    :returns: {port: {unit: firmware version}}
+    """
+    cached = dict() if rescan else load_cache(cache_file)
+    found = dict()
+
+    def run(port):
+        client = ApiClient(serial_port=port, baudrate=baudrate, single_flight=False, unit_health=False)
+        try:
+            if port in cached:
+                found[port] = verify(client, cached[port])
+            else:
+                found[port] = scan(client, units, ProbeTimeout(initial=probe_timeout))
+        except LeafException as ex:
+            _logger.error("{}: {}".format(port, ex))
+            found[port] = dict()
+        finally:
+            client.close()
+
+    threads = [threading.Thread(target=run, args=(port,), name="discovery {}".format(port)) for port in ports]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    if cache_file:
+        save_cache(cache_file, found)
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the units answering on the serial ports")
+    parser.add_argument('ports', nargs='+', help="serial ports")
+    parser.add_argument('--cache', help="JSON cache file, known units are only verified")
+    parser.add_argument('--rescan', action='store_true', help="scan all units even if cached")
+    parser.add_argument('--first', type=int, default=0, help="first unit address")
+    parser.add_argument('--last', type=int, default=MPU_ADDR_COUNT - 1, help="last unit address")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_PROBE_TIMEOUT, help="initial probe timeout, s")
+    parser.add_argument('--baudrate', type=int, default=115200)
+    args = parser.parse_args()
+
+    start_time = time.monotonic()
+    found = discover(args.ports, range(args.first, args.last + 1), args.cache, args.rescan, args.baudrate,
+                     args.timeout)
+    for port, units in found.items():
+        print("{}: {} unit(s)".format(port, len(units)))
+        for unit, fw_version in sorted(units.items()):
+            print("  {:3d}: fw {}".format(unit, fw_version if fw_version is None else hex(fw_version)))
+    print("{:.2f} s".format(time.monotonic() - start_time))
+
+
+if __name__ == '__main__':
+    main()
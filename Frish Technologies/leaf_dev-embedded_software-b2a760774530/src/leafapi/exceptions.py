@@ -108,3 +108,18 @@ class InvalidMessageCreationException(LeafException):
         """
         message = "[Invalid Message] %s" % string
         LeafException.__init__(self, message)
+
+
+class UnitUnavailableException(LeafException):
+    """
+    Error resulting from a request to a unit whose circuit is open
+    after repeated timeouts, the request is not sent
+    """
+
+    def __init__(self, string=""):
+        """ Initialize the exception
+
+        :param string: The message to append to the error
+        """
+        message = "[Unit Unavailable] %s" % string
+        LeafException.__init__(self, message)
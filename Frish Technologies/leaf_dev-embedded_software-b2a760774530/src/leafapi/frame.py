@@ -0,0 +1,43 @@
+"""
+Serial protocol wire layout
+
+    | SOF (0xAA 0x55) | length (u16) | payload (length bytes) | CRC16 (u16) |
+
+payload is a packet: | type (u8) | mpu_addr (u8) | register_addr (u16) | data_len (u16) | data |
+All multi byte fields are little endian, CRC covers the length field and the payload.
+"""
+import binascii
+import struct
+
+try:
+    import leafapi.leaf_sys.serial_protocol as sp
+except ImportError:
+    sp = None  # SWIG module is not built, use the literals below
+
+# Protocol constants of common/serial_protocol/serial_protocol.h (leaf_firmware)
+SP_PKG_TYPE_REQR = getattr(sp, 'SP_PKG_TYPE_REQR', 0x01)
+SP_PKG_TYPE_REQW = getattr(sp, 'SP_PKG_TYPE_REQW', 0x02)
+SP_PKG_TYPE_ERROR_FLAG = getattr(sp, 'SP_PKG_TYPE_ERROR_FLAG', 0x80)
+SP_ERROR_OK = getattr(sp, 'SP_ERROR_OK', 0)
+FRAME_PAYLOAD_SIZE = getattr(sp, 'FRAME_PAYLOAD_SIZE', 128)
+
+SOF = b'\xaa\x55'
+CRC16_INIT = 0xFFFF
+
+frame_header = struct.Struct('<2sH')  # SOF, payload length
+packet_header = struct.Struct('<BBHH')  # type, mpu_addr, register_addr, data_len
+frame_crc = struct.Struct('<H')
+
+FRAME_HEADER_SIZE = frame_header.size
+PACKET_HEADER_SIZE = packet_header.size
+FRAME_CRC_SIZE = frame_crc.size
+FRAME_MAX_SIZE = FRAME_HEADER_SIZE + FRAME_PAYLOAD_SIZE + FRAME_CRC_SIZE
+
+
+def crc16(data, crc=CRC16_INIT) -> int:
+    """ CRC16/CCITT (poly 0x1021) as calculated by the firmware serial protocol
+
+    :param data: bytes-like object, the length field followed by the payload
+    :param crc: Initial value, pass a previous result to continue the calculation
+    """
+    return binascii.crc_hqx(data, crc)
@@ -0,0 +1,116 @@
+"""
+Incremental serial protocol frame parser
+"""
+import logging
+
+from leafapi.frame import SOF, frame_header, frame_crc, crc16, FRAME_HEADER_SIZE, PACKET_HEADER_SIZE, \
+    FRAME_CRC_SIZE, FRAME_PAYLOAD_SIZE
+
+_logger = logging.getLogger(__name__)
+
+
+class FrameParser(object):
+    """
+    Streaming frame parser.
+
+    Received data is fed in chunks of any size, complete frames are returned as
+    packet payloads (type, mpu_addr, register_addr, data_len, data) which can be
+    decoded by `ApiResponse.decode`. Incomplete frames are kept for the next call.
+
+    A frame with a bad length or CRC is not dropped as a whole, the parser skips its
+    SOF only and resyncs on the next SOF of the data it has, so a frame following a
+    corrupt one (or hidden in its claimed length) is not lost. An incomplete frame is
+    dropped as soon as a complete valid frame follows its SOF, a corrupt length field
+    does not hold back the frames after it until the claimed length is received.
+    """
+
+    def __init__(self, max_payload=FRAME_PAYLOAD_SIZE):
+        """
+        :param max_payload: Maximal accepted payload length
+        """
+        self.max_payload = max_payload
+        self._buf = bytearray()
+
+        self.frames = 0
+        self.crc_errors = 0
+        self.length_errors = 0
+        self.framing_errors = 0  # data skipped while looking for a SOF
+
+    @property
+    def errors(self) -> int:
+        """ Number of rejected frames """
+        return self.crc_errors + self.length_errors
+
+    def __len__(self):
+        return len(self._buf)
+
+    def reset(self):
+        """ Drop all buffered data """
+        del self._buf[:]
+
+    def feed(self, data: (bytes, bytearray, memoryview)) -> list:
+        """ Add received data and extract complete frames
+
+        :param data: Received data
+        :returns: List of valid packet payloads (bytes), may be empty
+        """
+        buf = self._buf
+        buf += data
+        end = len(buf)
+        frames = []
+        pos = 0
+
+        with memoryview(buf) as view:
+            while True:
+                sof = buf.find(SOF, pos)
+                if sof < 0:
+                    # keep a possible first SOF byte at the end
+                    sof = end - 1 if buf[-1:] == SOF[:1] else end
+                if sof > pos:
+                    self.framing_errors += 1
+                    pos = sof
+
+                if end - pos < FRAME_HEADER_SIZE:
+                    break
+                _, length = frame_header.unpack_from(buf, pos)
+                if not PACKET_HEADER_SIZE <= length <= self.max_payload:
+                    _logger.debug("not valid length: {}".format(length))
+                    self.length_errors += 1
+                    pos += len(SOF)
+                    continue
+
+                payload_end = pos + FRAME_HEADER_SIZE + length
+                frame_end = payload_end + FRAME_CRC_SIZE
+                if end < frame_end:
+                    if not self._valid_frame_after(buf, view, pos + len(SOF), end):
+                        break
+                    # the claimed length hides a complete frame, do not wait for the bogus length
+                    _logger.debug("not valid length: {}, frame follows".format(length))
+                    self.length_errors += 1
+                    pos += len(SOF)
+                    continue
+
+                crc = crc16(view[pos + len(SOF):payload_end])
+                if crc == frame_crc.unpack_from(buf, payload_end)[0]:
+                    frames.append(bytes(view[pos + FRAME_HEADER_SIZE:payload_end]))
+                    self.frames += 1
+                    pos = frame_end
+                else:
+                    _logger.debug("not valid crc: {}".format(hex(crc)))
+                    self.crc_errors += 1
+                    pos += len(SOF)
+
+        del buf[:pos]
+        return frames
+
+    def _valid_frame_after(self, buf, view, start: int, end: int) -> bool:
+        """ Whether a complete frame with a valid CRC starts at a SOF in buf[start:end] """
+        sof = buf.find(SOF, start)
+        while 0 <= sof and sof + FRAME_HEADER_SIZE <= end:
+            _, length = frame_header.unpack_from(buf, sof)
+            payload_end = sof + FRAME_HEADER_SIZE + length
+            if PACKET_HEADER_SIZE <= length <= self.max_payload and payload_end + FRAME_CRC_SIZE <= end and \
+                    crc16(view[sof + len(SOF):payload_end]) == frame_crc.unpack_from(buf, payload_end)[0]:
+                return True
+            sof = buf.find(SOF, sof + len(SOF))
+        return False
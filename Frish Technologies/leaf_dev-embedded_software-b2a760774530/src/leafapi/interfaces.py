@@ -5,6 +5,7 @@ Leaf API  Interfaces
 A collection of base classes that are used throughout
 the leafapi library.
 """
+import inspect
 from multiprocessing import Lock
 
 from leafapi.exceptions import NotImplementedException
@@ -39,6 +40,34 @@ class SingletonThreadSafe(type):
                 return cls.__shared_instance__
 
 
+class MultitonThreadSafe(type):
+    """
+    One shared instance per value of the constructor argument named in `__instance_key__`
+    """
+    def __new__(mcs, name, bases, attrs):
+        cls = super(MultitonThreadSafe, mcs).__new__(mcs, name, bases, attrs)
+        cls.__shared_instance_lock__ = Lock()
+        cls.__shared_instances__ = dict()
+        return cls
+
+    def __call__(cls, *args, **kwargs):
+        arguments = inspect.signature(cls.__init__).bind(None, *args, **kwargs)
+        arguments.apply_defaults()
+        key = arguments.arguments[cls.__instance_key__]
+        with cls.__shared_instance_lock__:
+            try:
+                return cls.__shared_instances__[key]
+            except KeyError:
+                instance = super(MultitonThreadSafe, cls).__call__(*args, **kwargs)
+                cls.__shared_instances__[key] = instance
+                return instance
+
+    def drop_instance(cls, key):
+        """ Forget the shared instance, the next call creates a new one """
+        with cls.__shared_instance_lock__:
+            cls.__shared_instances__.pop(key, None)
+
+
 class ILeafApiClient(object):
 
     def read_registers(self, unit, address, count, **kwargs):
@@ -1,25 +1,107 @@
 """
 Contains base classes for Leaf API request/response/error packets
 """
+import functools
 import logging
 
-import leafapi.leaf_sys.serial_protocol as sp
-import leafapi.leaf_sys.mb_data as mb_data
+from leafapi.codec import get_codec
 from leafapi.exceptions import NotImplementedException, InvalidMessageCreationException
+from leafapi.frame import SOF, frame_header, packet_header, frame_crc, crc16, FRAME_HEADER_SIZE, \
+    PACKET_HEADER_SIZE, FRAME_CRC_SIZE, FRAME_PAYLOAD_SIZE, FRAME_MAX_SIZE, SP_PKG_TYPE_REQR, SP_PKG_TYPE_REQW, \
+    SP_PKG_TYPE_ERROR_FLAG, SP_ERROR_OK
+
+try:
+    import leafapi.leaf_sys.mb_data as mb_data
+    DEFAULT_MPU_ADDR = mb_data.MAIN_BOARD_ADDR
+    DEFAULT_REGISTER_ADDR = mb_data.MB_IR_FW_VERSION
+except ImportError:
+    DEFAULT_MPU_ADDR = 0
+    DEFAULT_REGISTER_ADDR = 1000
 
 _logger = logging.getLogger(__name__)
 
+FRAME_CACHE_SIZE = 256
+
+
+class FrameTemplate(object):
+    """
+    Precompiled request frame.
+
+    Frame header, packet header and the CRC over them are calculated once, encoding
+    a request only patches the data bytes and finishes the CRC. Requests without
+    data (read requests) are kept as finished wire bytes.
+    """
+
+    def __init__(self, r_type, mpu_addr, register_addr, data_len):
+        data_size = data_len if r_type == SP_PKG_TYPE_REQW else 0
+        size = PACKET_HEADER_SIZE + data_size
+        if size > FRAME_PAYLOAD_SIZE:
+            raise InvalidMessageCreationException("packet size {} > {}".format(size, FRAME_PAYLOAD_SIZE))
+
+        self.header = frame_header.pack(SOF, size) + packet_header.pack(r_type, mpu_addr, register_addr, data_len)
+        self.crc = crc16(self.header[len(SOF):])
+        self.data_size = data_size
+        self.is_write = r_type == SP_PKG_TYPE_REQW
+        self.frame_size = len(self.header) + data_size + FRAME_CRC_SIZE
+        self.frame = self.header + frame_crc.pack(self.crc) if not data_size else None
+
+    def encode_into(self, buffer: (bytearray, memoryview), offset: int, data: bytes) -> int:
+        """ Write the frame with `data` into the buffer
+
+        :return: Size of the encoded frame
+        :raises InvalidMessageCreationException: The buffer is too small or the write data size is not data_len
+        """
+        end = offset + self.frame_size
+        if len(buffer) < end:
+            raise InvalidMessageCreationException("buffer size {} < {}".format(len(buffer), end))
+
+        if self.is_write and len(data) != self.data_size:
+            raise InvalidMessageCreationException("data size {} != data_len {}".format(len(data), self.data_size))
+
+        if self.frame is not None:
+            buffer[offset:end] = self.frame
+            return self.frame_size
+
+        data_start = offset + len(self.header)
+        data_end = data_start + self.data_size
+        buffer[offset:data_start] = self.header
+        buffer[data_start:data_end] = data
+
+        with memoryview(buffer) as view:
+            frame_crc.pack_into(buffer, data_end, crc16(view[data_start:data_end], self.crc))
+        return self.frame_size
+
+
+@functools.lru_cache(maxsize=FRAME_CACHE_SIZE)
+def get_frame_template(r_type, mpu_addr, register_addr, data_len) -> FrameTemplate:
+    """ Cached (LRU) frame template of a request """
+    return FrameTemplate(r_type, mpu_addr, register_addr, data_len)
+
+
+def frame_cache_info() -> dict:
+    """ Frame template cache statistics """
+    info = get_frame_template.cache_info()
+    return {'hits': info.hits, 'misses': info.misses, 'size': info.currsize, 'max_size': info.maxsize}
+
+
+def frame_cache_clear():
+    get_frame_template.cache_clear()
+
 
 class ApiPDU(object):
     def __init__(self, **kwargs):
-        """ Initializes the base data for a API request """
-        self.r_type = kwargs.get('r_type', sp.SP_PKG_TYPE_REQR)
-        self.mpu_addr = kwargs.get('mpu_addr', mb_data.MAIN_BOARD_ADDR)
-        self.register_addr = kwargs.get('register_addr', mb_data.MB_IR_FW_VERSION)
+        """ Initializes the base data for a API request
+
+        :param codec: Name of the codec backend ('struct' or 'swig'), the default codec if not given
+        """
+        self.r_type = kwargs.get('r_type', SP_PKG_TYPE_REQR)
+        self.mpu_addr = kwargs.get('mpu_addr', DEFAULT_MPU_ADDR)
+        self.register_addr = kwargs.get('register_addr', DEFAULT_REGISTER_ADDR)
         self.data_len = kwargs.get('data_len', 0)
         self.data = kwargs.get('data', bytes())
+        self.codec = get_codec(kwargs.get('codec'))
 
-    def encode(self, tr_frame):
+    def encode(self, tr_frame=None):
         """ Encodes the message
 
         :raises: A not implemented exception
@@ -49,37 +131,46 @@ class ApiRequest(ApiPDU):
         self.register_addr = register_addr
         self.data_len = data_len
 
-        # self._tr_frame = sp.cvar.tr_frame
-        self._packet = sp.sp_packet_format()
+        self._tr_frame = None
+        self._packet = None
 
     def __str__(self):
         _s = super().__str__()
         return "REQ: {}, data: {}".format(_s, self.data)
 
-    def encode(self, tr_frame) -> bytes:
+    def encode(self, tr_frame=None) -> bytes:
         """ Encodes the request packet
         Note: data should be already encoded
+        :param tr_frame: Frame buffer to use by the 'swig' codec, by default the request's own buffer
         :return: The encoded packet
         """
-        _logger.debug("encode: tr_frame: {}".format(id(tr_frame), tr_frame))
-
-        self._packet.type = self.r_type
-        self._packet.mpu_addr = self.mpu_addr
-        self._packet.register_addr = self.register_addr
-        self._packet.data_len = self.data_len
-
-        sp.packet_to_frame(self.data, self._packet, tr_frame)
-
-        ret = sp.sp_create_frame(tr_frame, sp.get_req_size(self._packet))
-        if ret != sp.SP_ERROR_OK:
-            raise InvalidMessageCreationException("sp_create_frame ret {}".format(ret))
-
-        buffer = bytes(sp.get_tx_size(tr_frame))
-        ret = sp.frame_to_bytes(buffer, tr_frame)
-        if ret <= 0:
-            raise InvalidMessageCreationException("frame_to_bytes ret {}".format(ret))
-
-        return buffer
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug("encode: codec: {}, tr_frame: {}".format(self.codec.name, id(tr_frame)))
+        return self.codec.encode(self, tr_frame)
+
+    def packet_size(self) -> int:
+        """ Size of the packet (frame payload), only write requests carry data """
+        if self.r_type == SP_PKG_TYPE_REQW:
+            return PACKET_HEADER_SIZE + self.data_len
+        return PACKET_HEADER_SIZE
+
+    def frame_size(self) -> int:
+        """ Size of the encoded frame """
+        return FRAME_HEADER_SIZE + self.packet_size() + FRAME_CRC_SIZE
+
+    def frame_template(self) -> FrameTemplate:
+        """ Cached frame template of the request """
+        return get_frame_template(self.r_type, self.mpu_addr, self.register_addr, self.data_len)
+
+    def encode_into(self, buffer: (bytearray, memoryview), offset=0) -> int:
+        """ Encodes the request frame straight into the caller's buffer
+        The 'struct' codec writes the frame from the cached frame template of the request.
+        Note: data should be already encoded, write data must be exactly `data_len` bytes
+        :param buffer: Writable buffer
+        :param offset: Position of the frame in the buffer
+        :return: Size of the encoded frame
+        """
+        return self.codec.encode_into(self, buffer, offset)
 
 
 class ApiResponse(ApiPDU):
@@ -87,38 +178,23 @@ class ApiResponse(ApiPDU):
     def __init__(self, **kwargs):
         """ Proxy to the lower level initializer """
         ApiPDU.__init__(self, **kwargs)
-        self.error_code = sp.SP_ERROR_OK
+        self.error_code = SP_ERROR_OK
+        self.rx_wait_time = None  # seconds spent waiting for the response
 
     def is_error(self):
         """Checks if the error is a success or failure"""
-        return self.r_type & sp.SP_PKG_TYPE_ERROR_FLAG == sp.SP_PKG_TYPE_ERROR_FLAG
+        return self.r_type & SP_PKG_TYPE_ERROR_FLAG == SP_PKG_TYPE_ERROR_FLAG
 
     def __str__(self):
         _s = super().__str__()
         return "RES: {}, error_code: {}, data: {}".format(_s, self.error_code, self.data)
 
-    def decode(self, data: (bytes, sp.sp_tr_frame, sp.sp_packet_format)):
+    def decode(self, data):
         """ Decode a register response packet header
 
-        :param data: The response to decode
+        :param data: The response to decode, packet payload bytes as returned by `FrameParser`
+            or sp_tr_frame/sp_packet_format with the 'swig' codec
         """
-        _logger.debug("data: {}, {}".format(id(data), data))
-        if isinstance(data, (sp.sp_tr_frame, sp.sp_packet_format)):
-            if isinstance(data, sp.sp_tr_frame):
-                _packet = sp.sp_get_package_buf(data)
-            else:
-                _packet = data
-            self.r_type = _packet.type
-            self.mpu_addr = _packet.mpu_addr
-            self.register_addr = _packet.register_addr
-            self.data_len = _packet.data_len
-
-            if self.is_error():
-                self.error_code = sp.get_data_prom_packet(_packet)
-
-            self.data = bytes(_packet.data_len)
-            ret = sp.packet_data_to_bytes(self.data, _packet)
-            if ret < 0:
-                _logger.error("packet_data_to_bytes ret {}".format(ret))
-        else:
-            raise NotImplementedException("decode from bytes is not implemented")
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug("data: {}, {}".format(id(data), data))
+        self.codec.decode(self, data)
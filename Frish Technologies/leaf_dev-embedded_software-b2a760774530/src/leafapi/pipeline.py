@@ -0,0 +1,167 @@
+"""
+Pipelined request execution
+-----------------------------
+
+Several requests to different units are kept in flight on one bus, responses are
+matched to the waiting requests by (type, mpu_addr, register_addr, data_len).
+"""
+import logging
+import threading
+import time
+
+from leafapi.exceptions import LeafTimeoutException, LeafException
+from leafapi.frame import packet_header, SP_PKG_TYPE_REQR, SP_PKG_TYPE_ERROR_FLAG
+
+_logger = logging.getLogger(__name__)
+
+
+class PendingRequest(object):
+    """ Request waiting for its response """
+
+    def __init__(self, req):
+        self.r_type = req.r_type
+        self.mpu_addr = req.mpu_addr
+        self.register_addr = req.register_addr
+        self.data_len = req.data_len
+        self.frame = None
+        self.event = threading.Event()
+        self.start_time = None
+
+    def match(self, r_type, register_addr, data_len) -> bool:
+        """ Check the response header, error responses and write responses carry their own data_len """
+        if r_type & ~SP_PKG_TYPE_ERROR_FLAG != self.r_type or register_addr != self.register_addr:
+            return False
+        if r_type == SP_PKG_TYPE_REQR:
+            return data_len == self.data_len
+        return True
+
+
+class Pipeline(object):
+    """
+    Keeps up to `window` requests in flight, at most one per unit.
+
+    A dispatcher thread reads frames from the interface and hands them to the
+    matching pending request. Frames of units without a pending request (late
+    responses of timed out requests) and frames which do not match the pending
+    request are dropped and counted in `late_frames` / `unmatched_frames`.
+    """
+
+    def __init__(self, sp, window: int):
+        """
+        :param sp: SerialProtocolInterface of the bus
+        :param window: Maximal number of outstanding requests
+        """
+        self._sp = sp
+        self.window = window
+        self._slots = threading.BoundedSemaphore(window)
+        self._cond = threading.Condition()
+        self._pending = dict()  # mpu_addr -> PendingRequest
+        self._tx_lock = threading.Lock()
+
+        self.late_frames = 0
+        self.unmatched_frames = 0
+
+        self._closed = threading.Event()
+        self._rx_thread = threading.Thread(target=self._dispatch, daemon=True)
+        self._rx_thread.start()
+
+    def close(self):
+        self._closed.set()
+        self._rx_thread.join()
+
+    @property
+    def in_flight(self):
+        return len(self._pending)
+
+    def execute(self, req, frame, res, timeout):
+        """ Send the request frame and wait for the matching response
+
+        :param req: The request
+        :param frame: Encoded request frame
+        :param res: The response to decode into
+        :param timeout: (acquire timeout, response timeout), negative - wait forever
+        """
+        self.wait(self.submit(req, frame, timeout[0]), res, timeout[1])
+
+    def submit(self, req, frame, timeout) -> PendingRequest:
+        """ Take a slot and the unit and send the request frame, `wait` must follow
+
+        :param req: The request
+        :param frame: Encoded request frame, sent before returning
+        :param timeout: Slot and unit acquire timeout, negative - wait forever
+        :returns: The pending request
+        """
+        acquire_timeout = timeout if timeout >= 0 else None
+        deadline = time.monotonic() + acquire_timeout if acquire_timeout is not None else None
+        if not self._slots.acquire(timeout=acquire_timeout):
+            raise LeafTimeoutException("Pipeline slot acquire")
+        try:
+            pending = PendingRequest(req)
+            with self._cond:
+                # one outstanding request per unit, the unit answers in order
+                if not self._cond.wait_for(lambda: req.mpu_addr not in self._pending,
+                                           deadline - time.monotonic() if deadline is not None else None):
+                    raise LeafTimeoutException("Unit {} acquire".format(req.mpu_addr))
+                self._pending[req.mpu_addr] = pending
+        except BaseException:
+            self._slots.release()
+            raise
+
+        try:
+            with self._tx_lock:
+                self._sp.write(frame)
+        except BaseException:
+            self._done(pending)
+            raise
+        pending.start_time = time.monotonic()
+        return pending
+
+    def wait(self, pending, res, timeout):
+        """ Wait for the response of a submitted request and free its slot
+
+        :param pending: Pending request returned by `submit`
+        :param res: The response to decode into
+        :param timeout: Response timeout, negative - wait forever
+        """
+        try:
+            received = pending.event.wait(timeout if timeout >= 0 else None)
+            res.rx_wait_time = time.monotonic() - pending.start_time
+        finally:
+            self._done(pending)
+        if not received:
+            raise LeafTimeoutException("Waiting for frame timeout!")
+        res.decode(pending.frame)
+
+    def _done(self, pending):
+        with self._cond:
+            del self._pending[pending.mpu_addr]
+            self._cond.notify_all()
+        self._slots.release()
+
+    def _dispatch(self):
+        while not self._closed.is_set():
+            try:
+                frame = self._sp.read_frame(timeout=0.1)
+            except LeafTimeoutException:
+                continue
+            except LeafException as ex:
+                _logger.warning("rx: {}".format(ex))
+                continue
+
+            self._match(frame)
+
+    def _match(self, frame):
+        r_type, mpu_addr, register_addr, data_len = packet_header.unpack_from(frame)
+        with self._cond:
+            pending = self._pending.get(mpu_addr)
+            if pending is None or pending.frame is not None:
+                self.late_frames += 1
+                _logger.warning("late frame, mpu_addr: {}, register_addr: {}".format(mpu_addr, register_addr))
+                return
+            if not pending.match(r_type, register_addr, data_len):
+                self.unmatched_frames += 1
+                _logger.warning("unmatched frame, type: {}, mpu_addr: {}, register_addr: {}, data_len: {}".format(
+                    hex(r_type), mpu_addr, register_addr, data_len))
+                return
+            pending.frame = frame
+            pending.event.set()
@@ -0,0 +1,189 @@
+"""
+Leaf API poller
+-----------------
+
+Periodic reads of register groups. One thread executes the due groups
+earliest deadline first, so every group shares the bus according to its rate.
+Results go to the group callback or to the poller queue.
+"""
+import heapq
+import itertools
+import logging
+import queue
+import threading
+import time
+
+from leafapi.exceptions import LeafException, ParameterException
+
+
+class PollGroup(object):
+    """ A periodic read and its statistics """
+
+    def __init__(self, name, unit, period, read, callback=None):
+        """
+        :param name: Group name
+        :param unit: Unit of the group
+        :param period: Seconds between two polls
+        :param read: Callable doing the read, read(client, unit, **kwargs)
+        :param callback: callback(group, result), the poller queue gets (group, result) if not given
+        """
+        self.name = name
+        self.unit = unit
+        self.period = period
+        self.read = read
+        self.callback = callback
+
+        self.polls = 0
+        self.errors = 0
+        self.missed = 0  # periods the group was not polled in
+        self.max_lateness = 0.0  # seconds
+        self.started = None
+
+    def achieved_rate(self, now=None) -> float:
+        """ Polls per second since the first poll """
+        if self.started is None:
+            return 0.0
+        elapsed = (now if now is not None else time.monotonic()) - self.started
+        return self.polls / elapsed if elapsed > 0 else 0.0
+
+    def to_dict(self, now=None) -> dict:
+        return {'unit': self.unit, 'rate': 1.0 / self.period, 'achieved_rate': self.achieved_rate(now),
+                'polls': self.polls, 'errors': self.errors, 'missed': self.missed,
+                'max_lateness': self.max_lateness}
+
+
+class Poller(object):
+    """
+    Earliest deadline first polling scheduler.
+
+    A group is due every `period` seconds. A group finishing after its next release
+    counts the skipped periods as missed and is rescheduled from now on, it does not
+    try to catch up.
+    """
+
+    def __init__(self, client, results=None, **kwargs):
+        """
+        :param client: ILeafApiClient to poll with
+        :param results: Queue for the results of groups without a callback, a new queue if not given
+        :param kwargs: Read arguments (timeout)
+        """
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        self.client = client
+        self.results = results if results is not None else queue.Queue()
+        self.read_kwargs = kwargs
+
+        self.groups = dict()
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._stop = False
+        self._thread = None
+
+    def add_range(self, unit: int, address: int, count: int, period: float, callback=None, name=None) -> PollGroup:
+        """ Poll `count` bytes at `address`, the result is the ReadRegistersResponse """
+        def read(client, _unit, **kwargs):
+            return client.read_registers(_unit, address, count, **kwargs)
+
+        return self.add(PollGroup(name or "{}:{}:{}".format(unit, address, count), unit, period, read, callback))
+
+    def add_plan(self, unit: int, plan, period: float, callback=None, name=None) -> PollGroup:
+        """ Poll a register read plan (`registers.read_plan.ReadPlan`), the result is {name: value} """
+        return self.add(PollGroup(name or "{}:plan:{}".format(unit, id(plan)), unit, period, plan.execute, callback))
+
+    def add(self, group: PollGroup) -> PollGroup:
+        if group.period <= 0:
+            raise ParameterException("period of {} must be positive".format(group.name))
+        with self._cond:
+            if group.name in self.groups:
+                raise ParameterException("group {} already exists".format(group.name))
+            self.groups[group.name] = group
+            heapq.heappush(self._heap, (time.monotonic(), next(self._seq), group))
+            self._cond.notify()
+        return group
+
+    def remove(self, name: str):
+        with self._cond:
+            group = self.groups.pop(name)
+            self._heap = [item for item in self._heap if item[2] is not group]
+            heapq.heapify(self._heap)
+
+    def stats(self) -> dict:
+        """ Statistics per group: rate, achieved_rate, polls, errors, missed and max_lateness """
+        now = time.monotonic()
+        with self._cond:
+            return {name: group.to_dict(now) for name, group in self.groups.items()}
+
+    def start(self):
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, name="Poller", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def _next(self):
+        """ Wait for the earliest due group, None when stopped """
+        with self._cond:
+            while not self._stop:
+                if self._heap:
+                    delay = self._heap[0][0] - time.monotonic()
+                    if delay <= 0:
+                        deadline, _, group = heapq.heappop(self._heap)
+                        return deadline, group
+                    self._cond.wait(delay)
+                else:
+                    self._cond.wait()
+            return None
+
+    def _run(self):
+        while True:
+            item = self._next()
+            if item is None:
+                return
+            deadline, group = item
+
+            start_time = time.monotonic()
+            if group.started is None:
+                group.started = start_time
+            group.max_lateness = max(group.max_lateness, start_time - deadline)
+
+            try:
+                result = group.read(self.client, group.unit, **self.read_kwargs)
+            except LeafException as ex:
+                result = ex
+                group.errors += 1
+            group.polls += 1
+
+            try:
+                if group.callback is not None:
+                    group.callback(group, result)
+                else:
+                    self.results.put((group, result))
+            except Exception as ex:
+                self.log.error("{}: callback: {}".format(group.name, ex))
+
+            now = time.monotonic()
+            release = deadline + group.period
+            if now > release:
+                missed = int((now - release) // group.period) + 1
+                group.missed += missed
+                if self.log.isEnabledFor(logging.DEBUG):
+                    self.log.debug("{}: {} deadline(s) missed".format(group.name, missed))
+                release = now
+
+            with self._cond:
+                if self.groups.get(group.name) is group:
+                    heapq.heappush(self._heap, (release, next(self._seq), group))
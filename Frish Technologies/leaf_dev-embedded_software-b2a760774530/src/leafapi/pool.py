@@ -0,0 +1,133 @@
+"""
+Leaf API client pool
+----------------------
+
+Units are sharded across several serial buses, every bus has its own
+interface and lock so requests to different buses run in parallel.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from leafapi.client import ApiClient
+from leafapi.exceptions import NoSuchSlaveException, LeafTimeoutException, LeafException, ParameterException
+from leafapi.interfaces import ILeafApiClient
+from leafapi.request_message import ReadRegistersResponse, WriteRegistersResponse
+
+MPU_ADDR_COUNT = 256
+
+
+class PortStats(object):
+    """ Request statistics of one port """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.busy_time = 0.0
+
+    def add(self, duration, error=None):
+        with self._lock:
+            self.requests += 1
+            self.busy_time += duration
+            if error is not None:
+                self.errors += 1
+                if isinstance(error, LeafTimeoutException):
+                    self.timeouts += 1
+
+    def to_dict(self):
+        with self._lock:
+            return {'requests': self.requests, 'errors': self.errors, 'timeouts': self.timeouts,
+                    'busy_time': self.busy_time}
+
+
+class ApiClientPool(ILeafApiClient):
+    def __init__(self, routes: dict, **kwargs):
+        """
+        :param routes: Unit addresses to serial port map, the key is a `range`, a (first, last) tuple
+            (inclusive) or a single unit, e.g. {range(0, 32): '/dev/ttyUSB0', range(32, 64): '/dev/ttyUSB1'}
+        :raises ParameterException: A routed unit is not a valid unit address (0..255)
+        :param kwargs: ApiClient arguments (baudrate, pipeline_window)
+        """
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        self._route = [None] * MPU_ADDR_COUNT
+        for units, port in routes.items():
+            if isinstance(units, int):
+                units = (units,)
+            elif isinstance(units, tuple):
+                units = range(units[0], units[1] + 1)
+            for unit in units:
+                if not 0 <= unit < MPU_ADDR_COUNT:
+                    raise ParameterException("unit {} of port {} is not in 0..{}".format(
+                        unit, port, MPU_ADDR_COUNT - 1))
+                self._route[unit] = port
+
+        self.clients = dict()
+        self.stats = dict()
+        for port in routes.values():
+            if port not in self.clients:
+                self.clients[port] = ApiClient(serial_port=port, **kwargs)
+                self.stats[port] = PortStats()
+
+        self._executor = ThreadPoolExecutor(max_workers=len(self.clients))
+
+    def close(self):
+        self._executor.shutdown()
+        for client in self.clients.values():
+            client.close()
+
+    def port_of(self, unit: int) -> str:
+        port = self._route[unit] if 0 <= unit < MPU_ADDR_COUNT else None
+        if port is None:
+            raise NoSuchSlaveException("unit {} is not routed to any port".format(unit))
+        return port
+
+    def port_stats(self) -> dict:
+        """ Statistics per port: requests, errors, timeouts and busy_time (seconds) """
+        return {port: stats.to_dict() for port, stats in self.stats.items()}
+
+    def _call(self, method: str, unit: int, *args, **kwargs):
+        port = self.port_of(unit)
+        start_time = time.monotonic()
+        try:
+            res = getattr(self.clients[port], method)(unit, *args, **kwargs)
+        except LeafException as ex:
+            self.stats[port].add(time.monotonic() - start_time, ex)
+            raise
+        self.stats[port].add(time.monotonic() - start_time)
+        return res
+
+    def read_registers(self, unit: int, address: int, count: int, **kwargs) -> ReadRegistersResponse:
+        return self._call('read_registers', unit, address, count, **kwargs)
+
+    def write_registers(self, unit: int, address: int, count: int, data: bytes, **kwargs) -> WriteRegistersResponse:
+        return self._call('write_registers', unit, address, count, data=data, **kwargs)
+
+    def read_many(self, requests: list, **kwargs) -> list:
+        """ Read several register ranges, ranges on different ports are read in parallel
+
+        :param requests: List of (unit, address, count)
+        :param kwargs: read_registers arguments
+        :returns: ReadRegistersResponse or the LeafException of every request, in request order
+        """
+        by_port = dict()
+        results = [None] * len(requests)
+        for i, (unit, address, count) in enumerate(requests):
+            try:
+                by_port.setdefault(self.port_of(unit), []).append(i)
+            except NoSuchSlaveException as ex:
+                results[i] = ex
+
+        def read_port(indexes):
+            for i in indexes:
+                try:
+                    results[i] = self.read_registers(*requests[i], **kwargs)
+                except LeafException as ex:
+                    results[i] = ex
+
+        for future in [self._executor.submit(read_port, indexes) for indexes in by_port.values()]:
+            future.result()
+        return results
@@ -0,0 +1,126 @@
+"""
+Priority lock: waiting threads get the lock highest priority first
+"""
+import threading
+import time
+
+PRIORITY_CONTROL = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BACKGROUND = 2
+PRIORITY_NAMES = {PRIORITY_CONTROL: 'control', PRIORITY_NORMAL: 'normal', PRIORITY_BACKGROUND: 'background'}
+
+DEFAULT_AGING = 1.0  # seconds of waiting that raise a waiter by one priority class
+
+
+class _Waiter(object):
+    __slots__ = ('priority', 'since', 'seq', 'granted')
+
+    def __init__(self, priority, since, seq):
+        self.priority = priority
+        self.since = since
+        self.seq = seq
+        self.granted = False
+
+
+class WaitStats(object):
+    """ Lock wait times of one priority class """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, wait):
+        self.count += 1
+        self.total += wait
+        self.max = max(self.max, wait)
+
+    def to_dict(self):
+        return {'count': self.count, 'total': self.total, 'max': self.max,
+                'mean': self.total / self.count if self.count else 0.0}
+
+
+class PriorityLock(object):
+    """
+    Lock handed over on release to the waiter of the highest priority (lowest number),
+    waiters of the same priority in arrival order.
+
+    A waiter gains one priority class per `aging` seconds of waiting,
+    so background requests are not starved by a steady stream of control requests.
+    """
+
+    def __init__(self, aging=DEFAULT_AGING):
+        """
+        :param aging: Seconds of waiting that raise a waiter by one priority class, 0 - no aging
+        """
+        self.aging = aging
+        self._cond = threading.Condition(threading.Lock())
+        self._locked = False
+        self._waiters = []
+        self._seq = 0
+        self._stats = {priority: WaitStats() for priority in PRIORITY_NAMES}
+
+    def locked(self) -> bool:
+        return self._locked
+
+    def _effective(self, waiter, now):
+        if self.aging > 0:
+            return waiter.priority - (now - waiter.since) / self.aging, waiter.seq
+        return waiter.priority, waiter.seq
+
+    def acquire(self, priority=PRIORITY_NORMAL, timeout=-1) -> bool:
+        """ Take the lock
+
+        :param priority: PRIORITY_CONTROL, PRIORITY_NORMAL or PRIORITY_BACKGROUND
+        :param timeout: Seconds to wait, negative value - wait forever
+        :returns: True if the lock was taken
+        """
+        with self._cond:
+            now = time.monotonic()
+            if not self._locked and not self._waiters:
+                self._locked = True
+                self._stats.setdefault(priority, WaitStats()).add(0.0)
+                return True
+
+            self._seq += 1
+            waiter = _Waiter(priority, now, self._seq)
+            self._waiters.append(waiter)
+            deadline = now + timeout if timeout >= 0 else None
+            while not waiter.granted:
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._waiters.remove(waiter)
+                        return False
+                self._cond.wait(remaining)
+
+            self._stats.setdefault(priority, WaitStats()).add(time.monotonic() - now)
+            return True
+
+    def release(self):
+        with self._cond:
+            if not self._locked:
+                raise RuntimeError("release unlocked lock")
+            if not self._waiters:
+                self._locked = False
+                return
+
+            # hand over, the lock stays locked
+            now = time.monotonic()
+            waiter = min(self._waiters, key=lambda w: self._effective(w, now))
+            self._waiters.remove(waiter)
+            waiter.granted = True
+            self._cond.notify_all()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+    def wait_stats(self) -> dict:
+        """ Wait times per priority class: count, total, max and mean (seconds) """
+        with self._cond:
+            return {PRIORITY_NAMES.get(priority, priority): stats.to_dict() for priority, stats in self._stats.items()}
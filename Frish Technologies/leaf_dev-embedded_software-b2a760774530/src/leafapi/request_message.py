@@ -2,8 +2,8 @@
 Register Reading and Writing Request/Response
 """
 import logging
-import leafapi.leaf_sys.serial_protocol as sp
 
+from leafapi.frame import SP_PKG_TYPE_REQW
 from leafapi.pdu import ApiRequest, ApiResponse
 
 _logger = logging.getLogger(__name__)
@@ -49,7 +49,7 @@ class WriteRegistersRequest(ApiRequest):
         """
         ApiRequest.__init__(self, **kwargs)
 
-        self.r_type = sp.SP_PKG_TYPE_REQW
+        self.r_type = SP_PKG_TYPE_REQW
 
 
 class WriteRegistersResponse(ApiResponse):
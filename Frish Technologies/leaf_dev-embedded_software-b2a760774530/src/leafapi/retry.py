@@ -0,0 +1,43 @@
+"""
+Retry policy of idempotent requests
+"""
+from leafapi.exceptions import InvalidMessageReceivedException, LeafTimeoutException
+
+DEFAULT_RETRIES = 2
+DEFAULT_RETRY_ON = (InvalidMessageReceivedException, LeafTimeoutException)
+
+
+class RetryPolicy(object):
+    """
+    Decides if a failed request is sent again. Used for reads only, a write may have
+    been applied even though its response was lost.
+
+    Every attempt gets the full request timeout. A timeout waiting for the port is not
+    retried, the request was not sent.
+    """
+
+    def __init__(self, retries=DEFAULT_RETRIES, delay=0.0, retry_on=DEFAULT_RETRY_ON):
+        """
+        :param retries: Number of attempts after the first one
+        :param delay: Seconds to wait before an attempt
+        :param retry_on: Exception types retried
+        """
+        self.retries = retries
+        self.delay = delay
+        self.retry_on = retry_on
+
+        self.retried = 0  # attempts made after a failure
+
+    def should_retry(self, ex, res, attempt: int) -> bool:
+        """ Check a failed attempt
+
+        :param ex: The exception of the attempt
+        :param res: The response of the attempt, its `rx_wait_time` is None if the request was not sent
+        :param attempt: Number of the failed attempt, 0 - the first one
+        """
+        if attempt >= self.retries or not isinstance(ex, self.retry_on):
+            return False
+        if isinstance(ex, LeafTimeoutException) and res.rx_wait_time is None:
+            return False
+        self.retried += 1
+        return True
@@ -0,0 +1,94 @@
+"""
+Byte ring buffer used between the serial receive thread and the frame reader
+"""
+import threading
+
+RX_BUFFER_SIZE = 4096
+
+
+class RingBuffer(object):
+    """
+    Preallocated byte ring buffer.
+
+    The writer (receive thread) stores whole chunks, the reader drains
+    everything available in one call. Data which does not fit is dropped
+    and accounted in `overflows` / `dropped` so backpressure is visible.
+    """
+
+    def __init__(self, size=RX_BUFFER_SIZE):
+        """
+        :param size: Capacity of the buffer in bytes
+        """
+        self._buf = bytearray(size)
+        self._size = size
+        self._head = 0  # next write position
+        self._count = 0
+        self._cond = threading.Condition(threading.Lock())
+
+        self.overflows = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def size(self):
+        return self._size
+
+    def write(self, data: (bytes, bytearray, memoryview)) -> int:
+        """ Store a chunk of received data and wake up the reader
+
+        :param data: Received data
+        :returns: Number of bytes stored
+        """
+        with self._cond:
+            n = len(data)
+            free = self._size - self._count
+            if n > free:
+                self.overflows += 1
+                self.dropped += n - free
+                n = free
+
+            if n:
+                first = min(n, self._size - self._head)
+                self._buf[self._head:self._head + first] = data[:first]
+                if n > first:
+                    self._buf[:n - first] = data[first:n]
+                self._head = (self._head + n) % self._size
+                self._count += n
+
+            self._cond.notify_all()
+        return n
+
+    def read(self, timeout=None) -> bytes:
+        """ Drain all available data
+
+        :param timeout: Seconds to wait for data when the buffer is empty, None - wait forever
+        :returns: Available data, empty bytes on timeout
+        """
+        with self._cond:
+            if not self._count:
+                self._cond.wait(timeout)
+
+            n = self._count
+            if not n:
+                return bytes()
+
+            tail = (self._head - n) % self._size
+            first = min(n, self._size - tail)
+            if n > first:
+                data = bytes(self._buf[tail:]) + bytes(self._buf[:n - first])
+            else:
+                data = bytes(self._buf[tail:tail + n])
+            self._count = 0
+            return data
+
+    def wake(self):
+        """ Wake up a waiting reader without data, e.g. when the writer stopped """
+        with self._cond:
+            self._cond.notify_all()
+
+    def clear(self):
+        """ Drop all buffered data """
+        with self._cond:
+            self._count = 0
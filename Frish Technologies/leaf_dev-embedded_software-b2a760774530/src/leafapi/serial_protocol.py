@@ -3,21 +3,25 @@ import struct
 import time
 import threading
 import serial
-from queue import Queue, Empty
 from builtins import bytearray
+from collections import deque
 
-import leafapi.leaf_sys.serial_protocol as sp
 from leafapi.exceptions import InvalidMessageReceivedException, LeafTimeoutException, LeafIOException
-from leafapi.interfaces import Singleton, SingletonThreadSafe
-from leafapi.pdu import ApiRequest
+from leafapi.interfaces import Singleton, MultitonThreadSafe
+from leafapi.frame import sp, SP_PKG_TYPE_ERROR_FLAG
+from leafapi.frame_parser import FrameParser
+from leafapi.pdu import ApiRequest, ApiResponse
+from leafapi.ring_buffer import RingBuffer, RX_BUFFER_SIZE
 
 COM_PORT_NAME = '/dev/ttyACM0'
 RX_RESPONSE_TIMEOUT = 5
 
 
-class SerialProtocolInterface(metaclass=SingletonThreadSafe):
+class SerialProtocolInterface(metaclass=MultitonThreadSafe):
+    """ Serial protocol over one serial port, one shared instance per port """
+    __instance_key__ = 'serial_port'
 
-    def __init__(self, serial_port=COM_PORT_NAME, baudrate=115200):
+    def __init__(self, serial_port=COM_PORT_NAME, baudrate=115200, rx_buffer_size=RX_BUFFER_SIZE):
         self.log = logging.getLogger('SP')
 
         # configuration UART port
@@ -33,90 +37,124 @@ class SerialProtocolInterface(metaclass=SingletonThreadSafe):
         self.serial.flushInput()
         self.serial.flushOutput()
 
-        self.tx_frame = sp.cvar.tr_frame
-        self.rx_frame = sp.cvar.tr_frame
-        self.rx_ctrl = sp.cvar.rx_ctrl
-
-        self.log.debug("tx_frame: {}, rx_frame: {}".format(id(self.tx_frame), id(self.rx_frame)))
-
-        self.log.debug("P: {}, P: {}".format(id(sp.sp_get_package_buf(self.rx_frame)), id(sp.sp_get_package_buf(self.rx_frame))))
-
-        self.rx_q = Queue()
-        self.rx_thread = threading.Thread(target=self._rx, args=(self.rx_q,))
+        self.parser = FrameParser()
+        self._rx_frames = deque()
+        self.rx_buf = RingBuffer(rx_buffer_size)
+        self.rx_wait_time = 0.0
+        self.rx_error = None  # error which stopped the receive thread
+        self.rx_thread = threading.Thread(target=self._rx, args=(self.rx_buf,))
         self.rx_thread.start()
 
     def close(self):
         self.serial.close()
         self.rx_thread.join()
+        SerialProtocolInterface.drop_instance(self.serial.port)
+
+    @property
+    def rx_overflows(self):
+        """ Number of received chunks which did not fit into the rx ring buffer """
+        return self.rx_buf.overflows
 
-    def _rx(self, rx_q: Queue):
+    def rx_stats(self) -> dict:
+        """ Receive statistics: frames, crc_errors, length_errors, framing_errors and overflows """
+        return {'frames': self.parser.frames, 'crc_errors': self.parser.crc_errors,
+                'length_errors': self.parser.length_errors, 'framing_errors': self.parser.framing_errors,
+                'overflows': self.rx_buf.overflows}
+
+    def _rx(self, rx_buf: RingBuffer):
         while self.serial.is_open:
             try:
-                data = self.serial.read(1)
+                # block for the first byte (up to serial timeout), then take everything pending at once
+                data = self.serial.read(self.serial.in_waiting or 1)
                 if data != b'':
-                    rx_q.put(data)
+                    if rx_buf.write(data) != len(data):
+                        self.log.warning("rx buffer overflow, dropped: {}".format(rx_buf.dropped))
             except TypeError:
                 pass
-
-    def write(self, data: (bytearray, bytes)):
-        self.log.debug("{}".format(data))
+            except OSError as ex:
+                # SerialException is an OSError, in_waiting raises a plain OSError when the port is being closed
+                if not self.serial.is_open:
+                    break
+                # e.g. the USB adapter is unplugged: stop instead of spinning, readers get the error
+                self.log.error("rx stopped: {}".format(ex))
+                self.rx_error = ex
+                rx_buf.wake()
+                break
+
+    def write(self, data: (bytearray, bytes, memoryview)):
+        if self.log.isEnabledFor(logging.DEBUG):
+            self.log.debug("{}".format(bytes(data)))
         try:
             self.serial.write(data)
         except serial.SerialException as _ex:
             raise LeafIOException(str(_ex))
 
     def write_req(self, req: ApiRequest):
-        self.write(req.encode(self.tx_frame))
+        self.write(req.encode())
+
+    def read_frame(self, timeout=-1) -> bytes:
+        """ Wait for the next valid frame
 
-    def read_frame(self, timeout=-1) -> (sp.sp_tr_frame, sp.sp_packet_format):
+        The receive thread signals every stored chunk, the wait is limited by the exact
+        remaining time. Time spent waiting is kept in `rx_wait_time`.
+
+        :param timeout: Seconds to wait, negative value - wait forever
+        :returns: Packet payload of the received frame
+        :raises LeafIOException: The receive thread stopped on a serial port error
+        """
         self.log.debug("timeout: {}".format(timeout))
-        sp.sp_init_rx_ctrl(self.rx_ctrl, self.rx_frame)
 
         start_time = time.monotonic()
+        deadline = start_time + timeout if timeout >= 0 else None
 
-        state = sp.SP_RX_STATE_SOF_LSB
-        while state != sp.SP_RX_STATE_DONE:
-            try:
-                data = self.rx_q.get(timeout=1)
-            except Empty:
-                if 0 <= timeout < time.monotonic() - start_time:
-                    raise LeafTimeoutException("Waiting for frame timeout!")
-                else:
+        try:
+            while not self._rx_frames:
+                if self.rx_error is not None:
+                    raise LeafIOException("Receive stopped: {}".format(self.rx_error))
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise LeafTimeoutException("Waiting for frame timeout!")
+
+                data = self.rx_buf.read(timeout=remaining)
+                if not data:
                     continue
 
-            self.log.debug("rx: {}".format(data))
-
-            state = sp.sp_add_byte_to_rx_buff(self.rx_ctrl, data[0])
+                self.log.debug("rx: {}".format(data))
 
-        if state == sp.SP_RX_STATE_DONE:
-            ret = sp.sp_validate_frame(self.rx_frame)
-            if ret == sp.RET_CODE_SUCCESS:
-                return self.rx_frame
+                # the parser keeps the data following a bad frame, nothing is lost by raising
+                errors = self.parser.errors
+                self._rx_frames.extend(self.parser.feed(data))
+                if not self._rx_frames and errors != self.parser.errors:
+                    raise InvalidMessageReceivedException("Frame error, crc errors: {}, length errors: {}".format(
+                        self.parser.crc_errors, self.parser.length_errors))
 
-        raise InvalidMessageReceivedException("Frame error, rx state: {}".format(state))
+            return self._rx_frames.popleft()
+        finally:
+            self.rx_wait_time = time.monotonic() - start_time
 
     def read_res(self, timeout=RX_RESPONSE_TIMEOUT):
         return self.read_frame(timeout=timeout)
 
-    def send_req(self, packet: sp.sp_packet_format, data: (bytes, None)):
+    def send_req(self, packet, data: (bytes, None)):
+        """ Send a request packet
+
+        :param packet: sp_packet_format or any object with type, mpu_addr, register_addr and data_len
+        :param data: Encoded data of a write request
+        """
         self.log.debug("packet: {}".format(self.dump_packet(packet, True)))
 
         if data is None:
             data = bytes()
-        sp.packet_to_frame(data, packet, self.tx_frame)
-        sp.sp_create_frame(self.tx_frame, sp.get_req_size(packet))
-
-        buffer = bytes(sp.get_tx_size(self.tx_frame))
-        ret = sp.frame_to_bytes(buffer, self.tx_frame)
-        if ret <= 0:
-            self.log.error("Nothing to send, {}".format(ret))
-            return
-
-        self.write(buffer)
+        req = ApiRequest(mpu_addr=packet.mpu_addr, register_addr=packet.register_addr, data_len=packet.data_len,
+                         r_type=packet.type, data=data)
+        self.write_req(req)
 
-    def dump_packet(self, packet: sp.sp_packet_format, to_str=False):
+    def dump_packet(self, packet, to_str=False):
+        """ Format a sp_packet_format (SWIG) """
         data_str = ''
-        if packet.type & sp.SP_PKG_TYPE_ERROR_FLAG:
+        if packet.type & SP_PKG_TYPE_ERROR_FLAG:
             data_str = ', data: {}'.format(sp.get_data_prom_packet(packet))
 
         out_str = "type: {}, mpu_addr: {}, register_addr: {}, data_len: {}".format(
@@ -134,6 +172,7 @@ if __name__ == '__main__':
                         datefmt='%Y-%m-%d %H:%M:%S')
 
     import leafapi.leaf_sys.climat_board as cb
+    import leafapi.leaf_sys.serial_protocol as sp
 
     print(cb.get_relay_timeout_mb_addr(cb.RELAY_0))
     print(cb.get_relay_timeout_mb_addr(cb.RELAY_1))
@@ -158,16 +197,18 @@ if __name__ == '__main__':
             # time.sleep(5)
             # sp_mod.serial.write(REQR_EX[5:])
             # try:
-            #     res = sp_mod.read_res(timeout=2)
-            #     sp_mod.dump_packet(res)
+            #     res = ApiResponse()
+            #     res.decode(sp_mod.read_res(timeout=2))
+            #     sp_mod.log.info(res)
             # except TimeoutError as ex:
             #     print("{}".format(ex))
 
             # time.sleep(5)
             sp_mod.serial.write(REQR_EX_NOT_VALID)
             try:
-                res = sp_mod.read_res(timeout=2)
-                sp_mod.dump_packet(res)
+                res = ApiResponse()
+                res.decode(sp_mod.read_res(timeout=2))
+                sp_mod.log.info(res)
             except TimeoutError as ex:
                 print("{}".format(ex))
 
@@ -179,10 +220,11 @@ if __name__ == '__main__':
             sp_mod.send_req(packet, None)
             reqr_count += 1
             try:
-                res = sp_mod.read_res()
+                res = ApiResponse()
+                res.decode(sp_mod.read_res())
                 reqr_res_count += 1
 
-                sp_mod.dump_packet(res)
+                sp_mod.log.info(res)
             except TimeoutError as ex:
                 print("{}".format(ex))
 
@@ -194,8 +236,9 @@ if __name__ == '__main__':
 
             sp_mod.send_req(packet, data)
             try:
-                res = sp_mod.read_res()
-                sp_mod.dump_packet(res)
+                res = ApiResponse()
+                res.decode(sp_mod.read_res())
+                sp_mod.log.info(res)
             except TimeoutError as ex:
                 print("{}".format(ex))
 
@@ -0,0 +1,66 @@
+"""
+Single flight: concurrent identical calls share one execution
+"""
+import threading
+
+from leafapi.exceptions import LeafTimeoutException
+
+
+class _Call(object):
+    __slots__ = ('done', 'result', 'exception', 'joined')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.exception = None
+        self.joined = 0  # callers waiting for this call
+
+
+class SingleFlight(object):
+    """
+    Calls with the same key made while the first one is waiting or running are joined to it,
+    every caller gets the same result object or the same exception. The result is not copied,
+    the callers must not modify it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = dict()
+
+        self.saved = 0  # calls that returned the result of another caller's execution
+
+    def do(self, key, fn, timeout=None):
+        """ Execute `fn()` or join the running call of `key`
+
+        :param key: Hashable call identity
+        :param fn: The call
+        :param timeout: Seconds a joined caller waits for the result, None - wait forever
+        :returns: `fn()` result
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.joined += 1
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise LeafTimeoutException("Joined call {}".format(key))
+            if call.exception is not None:
+                raise call.exception
+            with self._lock:
+                self.saved += 1
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as ex:
+            call.exception = ex
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
@@ -0,0 +1,135 @@
+"""
+Unit health
+-------------
+
+Per unit response timeouts derived from the measured round trip times
+(smoothed RTT and RTT variance, as the TCP retransmission timer of RFC 6298)
+and a circuit breaker failing requests to a dead unit fast.
+
+    closed --(failure_threshold timeouts in a row)--> open
+    open --(backoff elapsed)--> half-open, one probe request is let through
+    half-open --(probe answered)--> closed
+    half-open --(probe timed out)--> open, backoff doubled
+"""
+import threading
+import time
+
+from leafapi.exceptions import UnitUnavailableException
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half-open'
+
+DEFAULT_MIN_TIMEOUT = 0.05  # seconds
+DEFAULT_MAX_TIMEOUT = 5.0  # seconds, used until the first round trip is measured
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_BACKOFF = 1.0  # seconds
+DEFAULT_MAX_BACKOFF = 60.0  # seconds
+
+RTT_ALPHA = 1 / 8
+RTT_BETA = 1 / 4
+RTT_K = 4
+
+
+class UnitHealth(object):
+    """ Round trip statistics and breaker state of one unit """
+
+    def __init__(self, timeout):
+        self.srtt = None
+        self.rttvar = None
+        self.timeout = timeout
+        self.state = STATE_CLOSED
+        self.failures = 0  # timeouts in a row
+        self.backoff = 0.0
+        self.open_until = 0.0
+        self.probing = False
+
+    def to_dict(self) -> dict:
+        return {'state': self.state, 'timeout': self.timeout, 'srtt': self.srtt, 'rttvar': self.rttvar,
+                'failures': self.failures, 'open_until': self.open_until}
+
+
+class UnitHealthMonitor(object):
+    def __init__(self, min_timeout=DEFAULT_MIN_TIMEOUT, max_timeout=DEFAULT_MAX_TIMEOUT,
+                 failure_threshold=DEFAULT_FAILURE_THRESHOLD, backoff=DEFAULT_BACKOFF, max_backoff=DEFAULT_MAX_BACKOFF):
+        """
+        :param min_timeout: Lower bound of a unit response timeout (seconds)
+        :param max_timeout: Upper bound of a unit response timeout and the timeout of a unit not measured yet
+        :param failure_threshold: Timeouts in a row opening the circuit
+        :param backoff: First open circuit time (seconds), doubled by every failed probe
+        :param max_backoff: Upper bound of the open circuit time
+        """
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.failure_threshold = failure_threshold
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self._lock = threading.Lock()
+        self._units = dict()
+
+    def _unit(self, unit) -> UnitHealth:
+        health = self._units.get(unit)
+        if health is None:
+            health = self._units[unit] = UnitHealth(self.max_timeout)
+        return health
+
+    def timeout_of(self, unit: int) -> float:
+        """ Current response timeout of the unit """
+        with self._lock:
+            return self._unit(unit).timeout
+
+    def state_of(self, unit: int) -> dict:
+        """ state, timeout, srtt, rttvar, failures and open_until (time.monotonic) of the unit """
+        with self._lock:
+            return self._unit(unit).to_dict()
+
+    def check(self, unit: int):
+        """ Let a request to the unit through
+
+        :raises UnitUnavailableException: The circuit of the unit is open or its probe is running
+        """
+        with self._lock:
+            health = self._unit(unit)
+            if health.state == STATE_CLOSED:
+                return
+            if health.state == STATE_OPEN and time.monotonic() >= health.open_until:
+                health.state = STATE_HALF_OPEN
+            if health.state == STATE_HALF_OPEN and not health.probing:
+                health.probing = True
+                return
+            raise UnitUnavailableException("unit {} is {}, retry in {:.3f} s".format(
+                unit, health.state, max(0.0, health.open_until - time.monotonic())))
+
+    def success(self, unit: int, rtt: float):
+        """ The unit answered after `rtt` seconds """
+        with self._lock:
+            health = self._unit(unit)
+            if health.srtt is None:
+                health.srtt = rtt
+                health.rttvar = rtt / 2
+            else:
+                health.rttvar = (1 - RTT_BETA) * health.rttvar + RTT_BETA * abs(health.srtt - rtt)
+                health.srtt = (1 - RTT_ALPHA) * health.srtt + RTT_ALPHA * rtt
+            health.timeout = min(self.max_timeout, max(self.min_timeout, health.srtt + RTT_K * health.rttvar))
+            health.state = STATE_CLOSED
+            health.failures = 0
+            health.backoff = 0.0
+            health.probing = False
+
+    def failure(self, unit: int):
+        """ The unit did not answer in time """
+        with self._lock:
+            health = self._unit(unit)
+            health.failures += 1
+            health.timeout = min(self.max_timeout, health.timeout * 2)
+            if health.state == STATE_HALF_OPEN or health.failures >= self.failure_threshold:
+                health.backoff = min(self.max_backoff, health.backoff * 2 if health.backoff else self.backoff)
+                health.open_until = time.monotonic() + health.backoff
+                health.state = STATE_OPEN
+            health.probing = False
+
+    def cancel(self, unit: int):
+        """ The request ended without telling anything about the unit """
+        with self._lock:
+            self._unit(unit).probing = False
@@ -0,0 +1,78 @@
+"""
+Block codec: one precompiled struct for a block of registers
+"""
+import struct
+
+from leafapi.exceptions import ParameterException
+
+REGISTER_SIZE = 2  # bytes per register address
+
+
+class BlockCodec(object):
+    """
+    Codec of the registers of one address block.
+
+    The struct covers the block from its first address, unused bytes between the
+    registers are pad bytes ('x'): skipped by decode, sent as zeros by encode.
+    """
+
+    def __init__(self, registers, address=None):
+        """
+        :param registers: Register descriptors, they must not overlap
+        :param address: First address of the block, the lowest register address if not given
+        """
+        registers = sorted((reg for reg in registers if reg.size), key=lambda r: r.address)
+        self.address = address if address is not None else (registers[0].address if registers else 0)
+        self.registers = registers
+
+        fmt = '<'
+        pos = 0
+        for reg in registers:
+            offset = (reg.address - self.address) * REGISTER_SIZE
+            if offset < pos:
+                raise ParameterException("register {} overlaps the previous one".format(reg.name))
+            if offset > pos:
+                fmt += '{}x'.format(offset - pos)
+            fmt += reg._encode_frm[1:]
+            pos = offset + reg.size
+        self.struct = struct.Struct(fmt)
+
+    @classmethod
+    def from_struct(cls, registers, address: int, block_struct: struct.Struct):
+        """ Codec with a precompiled block struct, e.g. of a generated table, the layout is not checked
+
+        :param registers: Register descriptors in address order, one struct field per register with data
+        :param address: First address of the block
+        :param block_struct: Struct of the block
+        """
+        codec = cls.__new__(cls)
+        codec.address = address
+        codec.registers = [reg for reg in registers if reg.size]
+        codec.struct = block_struct
+        return codec
+
+    @property
+    def size(self) -> int:
+        """ Block size in bytes """
+        return self.struct.size
+
+    def decode(self, data, offset=0) -> tuple:
+        """ Decode the block and store the values into the registers
+
+        :param data: Response data, bytes-like
+        :param offset: Position of the block in the data
+        :returns: Register values in register order
+        """
+        values = self.struct.unpack_from(data, offset)
+        for reg, value in zip(self.registers, values):
+            reg.value = value
+        return values
+
+    def encode(self, values=None) -> bytes:
+        """ Encode the block
+
+        :param values: Register values in register order, the register values if not given
+        """
+        if values is None:
+            values = [reg.value for reg in self.registers]
+        return self.struct.pack(*values)
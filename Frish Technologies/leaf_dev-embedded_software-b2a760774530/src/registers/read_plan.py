@@ -0,0 +1,147 @@
+"""
+Read planner: merges reads of scattered registers into the fewest frames
+"""
+import struct
+
+from leafapi.exceptions import InvalidMessageReceivedException, LeafIOException, ParameterException
+from leafapi.frame import FRAME_PAYLOAD_SIZE, PACKET_HEADER_SIZE
+from registers.block_codec import BlockCodec
+
+REGISTER_SIZE = 2  # bytes per register address
+MAX_READ_SIZE = FRAME_PAYLOAD_SIZE - PACKET_HEADER_SIZE  # register data bytes in one response
+DEFAULT_MAX_GAP = 4  # register addresses
+
+
+def register_span(reg) -> int:
+    """ Number of register addresses taken by the register """
+    return max(1, (reg.size + REGISTER_SIZE - 1) // REGISTER_SIZE)
+
+
+class ReadBlock(object):
+    """ One read request covering several registers """
+
+    def __init__(self, address: int, count: int, registers: list):
+        """
+        :param address: First register address
+        :param count: Number of bytes to read
+        :param registers: Registers in the block
+        """
+        self.address = address
+        self.count = count
+        self.registers = registers
+        try:
+            self.codec = BlockCodec(registers, address)
+        except ParameterException:
+            self.codec = None  # overlapping registers, decoded one by one
+        self._names = [reg.name for reg in self.codec.registers] if self.codec is not None else None
+
+    @classmethod
+    def from_struct(cls, address: int, count: int, registers: list, block_struct):
+        """ Block decoded with a precompiled struct, the registers are decoded one by one if it is None
+
+        :param registers: Registers in the block, in address order
+        :param block_struct: struct.Struct of the block or None
+        """
+        block = cls.__new__(cls)
+        block.address = address
+        block.count = count
+        block.registers = registers
+        block.codec = BlockCodec.from_struct(registers, address, block_struct) if block_struct is not None else None
+        block._names = [reg.name for reg in block.codec.registers] if block.codec is not None else None
+        return block
+
+    def __repr__(self):
+        return "ReadBlock(address={}, count={}, registers={})".format(
+            self.address, self.count, [reg.name for reg in self.registers])
+
+    def decode(self, data: bytes, values: dict = None) -> dict:
+        """ Values of the registers within the response data, the registers are not changed
+
+        :param data: Response data
+        :param values: Dict to add the values to, a new one if not given
+        :returns: {register name: value}
+        """
+        if len(data) < self.count:
+            raise InvalidMessageReceivedException("block {}: {} bytes received, {} expected".format(
+                self.address, len(data), self.count))
+        if values is None:
+            values = dict()
+        if self.codec is not None:
+            values.update(zip(self._names, self.codec.struct.unpack_from(data)))
+            return values
+        for reg in self.registers:
+            if reg.size:
+                offset = (reg.address - self.address) * REGISTER_SIZE
+                values[reg.name] = reg.descriptor.struct.unpack_from(data, offset)[0]
+        return values
+
+
+class ReadPlan(object):
+    """
+    Read plan of a set of registers.
+
+    Registers are sorted by address and merged into blocks, a gap of up to `max_gap`
+    unused addresses is read along to save a request, a block never exceeds `max_size` bytes.
+    """
+
+    def __init__(self, registers, max_gap=DEFAULT_MAX_GAP, max_size=MAX_READ_SIZE):
+        """
+        :param registers: Register descriptors to read
+        :param max_gap: Maximal number of unused register addresses bridged inside a block
+        :param max_size: Maximal block size in bytes
+        """
+        self.max_gap = max_gap
+        self.max_size = max_size
+        self.blocks = []
+
+        block_regs = []
+        address = end = 0
+        for reg in sorted(registers, key=lambda r: r.address):
+            reg_end = reg.address + register_span(reg)
+            if block_regs and reg.address - end <= max_gap and \
+                    (max(end, reg_end) - address) * REGISTER_SIZE <= max_size:
+                block_regs.append(reg)
+                end = max(end, reg_end)
+                continue
+
+            if block_regs:
+                self.blocks.append(ReadBlock(address, (end - address) * REGISTER_SIZE, block_regs))
+            block_regs = [reg]
+            address, end = reg.address, reg_end
+
+        if block_regs:
+            self.blocks.append(ReadBlock(address, (end - address) * REGISTER_SIZE, block_regs))
+
+    @classmethod
+    def from_table(cls, table, registers):
+        """ Read plan of a precomputed table, e.g. sys_registers.INPUT_READ_PLAN, without planning
+
+        :param table: (address, count, struct format, register names) per block, register names in
+            address order, the format is None for a block decoded register by register
+        :param registers: Namespace of the registers by name, e.g. InputRegisters
+        """
+        plan = cls.__new__(cls)
+        plan.max_gap = plan.max_size = None
+        plan.blocks = [ReadBlock.from_struct(address, count, [getattr(registers, name) for name in names],
+                                             struct.Struct(frm) if frm is not None else None)
+                       for address, count, frm, names in table]
+        return plan
+
+    def __len__(self):
+        return len(self.blocks)
+
+    def execute(self, client, unit: int, **kwargs) -> dict:
+        """ Read all blocks and decode the register values, the registers are shared and not changed
+
+        :param client: ILeafApiClient
+        :param unit: The unit to read from
+        :param kwargs: read_registers arguments
+        :returns: {register name: value}
+        """
+        values = dict()
+        for block in self.blocks:
+            res = client.read_registers(unit, block.address, block.count, **kwargs)
+            if res.is_error():
+                raise LeafIOException("unit {}, address {}: error code {}".format(unit, block.address, res.error_code))
+            block.decode(res.data, values)
+        return values
@@ -1,4 +1,5 @@
 import struct
+import weakref
 
 from app_types import BaseType
 
@@ -11,8 +12,92 @@ _size_frm = {
     1: 'b', 2: 'h', 4: 'i', 0: ''  # TODO: remove 0 key
 }
 
+_structs = dict()  # format -> struct.Struct
+# fields -> RegisterDescriptor, equal definitions share one descriptor, dropped with its last register
+_descriptors = weakref.WeakValueDictionary()
+
+
+def _get_struct(frm: str) -> struct.Struct:
+    s = _structs.get(frm)
+    if s is None:
+        s = _structs[frm] = struct.Struct(frm)
+    return s
+
+
+def _default_frm(size: int, is_signed: bool) -> str:
+    frm = '<' + _size_frm[size]
+    return frm.lower() if is_signed else frm.upper()
+
+
+class RegisterDescriptor(BaseType):
+    """ Immutable description of a register, shared by the registers of every unit """
+    __slots__ = ('name', 'address', 'size', 'access_type', 'is_signed', 'struct', 'custom_frm', '_hash',
+                 '__weakref__')
+
+    def __init__(self, name: str, address: int, size: int, access_type: str, is_signed: bool = False,
+                 frm: str = None):
+        """
+        :param name: Name of register for data
+        :param address: Address of first register
+        :param size: Size of the register data in bytes
+        :param access_type: R or RW (Read - input register, Write - holding register)
+        :param is_signed: Flag to indicate that value is signed
+        :param frm: struct format of the value, derived from size and is_signed if not given
+        """
+        default_frm = _default_frm(size, is_signed)
+        frm = frm or default_frm
+        for key, val in (('name', name), ('address', address), ('size', size), ('access_type', access_type),
+                         ('is_signed', is_signed), ('struct', _get_struct(frm)), ('custom_frm', frm != default_frm),
+                         ('_hash', hash((name, address, size, access_type, is_signed, frm)))):
+            object.__setattr__(self, key, val)
+
+    @classmethod
+    def get(cls, name: str, address: int, size: int, access_type: str, is_signed: bool = False, frm: str = None):
+        """ The shared descriptor of the definition """
+        key = (name, address, size, access_type, is_signed, frm or _default_frm(size, is_signed))
+        descriptor = _descriptors.get(key)
+        if descriptor is None:
+            descriptor = _descriptors[key] = cls(*key)
+        return descriptor
+
+    def replace(self, **changes):
+        """ The shared descriptor with some fields changed, the format is kept if `frm` is not given """
+        fields = {'name': self.name, 'address': self.address, 'size': self.size, 'access_type': self.access_type,
+                  'is_signed': self.is_signed, 'frm': self.struct.format}
+        fields.update(changes)
+        return RegisterDescriptor.get(**fields)
+
+    def __setattr__(self, key, value):
+        raise AttributeError("RegisterDescriptor is immutable")
+
+    def __reduce__(self):
+        return RegisterDescriptor.get, (self.name, self.address, self.size, self.access_type, self.is_signed,
+                                        self.struct.format)
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, RegisterDescriptor):
+            return False
+        return self._hash == other._hash and self.name == other.name and self.address == other.address and \
+            self.size == other.size and self.access_type == other.access_type and \
+            self.is_signed == other.is_signed and self.struct.format == other.struct.format
+
+    def __hash__(self):
+        return self._hash
+
+    def to_dict(self):
+        d = {'name': self.name, 'address': self.address, 'size': self.size, 'access_type': self.access_type,
+             'is_signed': self.is_signed}
+        if self.custom_frm:
+            d['frm'] = self.struct.format
+        return d
+
 
 class RegisterBase(BaseType):
+    """ Register value of a unit, the description is kept in a shared RegisterDescriptor """
+    __slots__ = ('descriptor', 'value', 'unit')
+
     def __init__(
             self,
             name: str,
@@ -32,30 +117,109 @@ class RegisterBase(BaseType):
         :param unit: Register owner id (mpu_addr)
         :param is_signed: Flag to indicate that value is signed
         """
-        self.name = name
-        self.address = address
-        self.size = size
-        self.access_type = access_type
+        self.descriptor = RegisterDescriptor.get(name, address, size, access_type, is_signed)
         self.value = value
         self.unit = unit
-        self.is_signed = is_signed
 
-        self._encode_frm = '<' + _size_frm[size]
+    @classmethod
+    def from_descriptor(cls, descriptor: RegisterDescriptor, value: int = None, unit: int = None):
+        """ New register sharing the descriptor, e.g. a copy for another unit """
+        reg = cls.__new__(cls)
+        reg.descriptor = descriptor
+        reg.value = value
+        reg.unit = unit
+        return reg
+
+    @classmethod
+    def from_dict(cls, dikt):
+        reg = cls(**{key: val for key, val in dikt.items() if key != '_encode_frm'})
+        if dikt.get('_encode_frm') is not None:
+            reg._encode_frm = dikt['_encode_frm']
+        return reg
+
+    # setting a field swaps in the shared descriptor of the changed definition,
+    # the other registers of the old descriptor are not affected
+
+    @property
+    def name(self) -> str:
+        return self.descriptor.name
+
+    @name.setter
+    def name(self, name: str):
+        self.descriptor = self.descriptor.replace(name=name)
+
+    @property
+    def address(self) -> int:
+        return self.descriptor.address
+
+    @address.setter
+    def address(self, address: int):
+        self.descriptor = self.descriptor.replace(address=address)
+
+    @property
+    def size(self) -> int:
+        return self.descriptor.size
+
+    @size.setter
+    def size(self, size: int):
+        self.descriptor = self.descriptor.replace(size=size)
+
+    @property
+    def access_type(self) -> str:
+        return self.descriptor.access_type
+
+    @access_type.setter
+    def access_type(self, access_type: str):
+        self.descriptor = self.descriptor.replace(access_type=access_type)
+
+    @property
+    def is_signed(self) -> bool:
+        """ Setting it keeps the format, call Register.update_frm to apply it """
+        return self.descriptor.is_signed
+
+    @is_signed.setter
+    def is_signed(self, is_signed: bool):
+        self.descriptor = self.descriptor.replace(is_signed=is_signed)
+
+    @property
+    def _encode_frm(self) -> str:
+        return self.descriptor.struct.format
+
+    @_encode_frm.setter
+    def _encode_frm(self, frm: str):
+        self.descriptor = self.descriptor.replace(frm=frm)
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, type(self)):
+            return False
+        return self.descriptor == other.descriptor and self.value == other.value and self.unit == other.unit
+
+    def __hash__(self):
+        return self.descriptor._hash
+
+    def to_dict(self):
+        d = self.descriptor
+        dikt = {'name': d.name, 'address': d.address, 'size': d.size, 'access_type': d.access_type,
+                'value': self.value, 'unit': self.unit, 'is_signed': d.is_signed}
+        if d.custom_frm:
+            dikt['_encode_frm'] = d.struct.format
+        return dikt
 
 
 class Register(RegisterBase):
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         RegisterBase.__init__(self, **kwargs)
-        self.update_frm()
 
     def update_frm(self):
-        if self.is_signed:
-            self._encode_frm = self._encode_frm.lower()
-        else:
-            self._encode_frm = self._encode_frm.upper()
+        frm = self._encode_frm
+        self._encode_frm = frm.lower() if self.is_signed else frm.upper()
 
     def encode(self) -> bytes:
-        return struct.pack(self._encode_frm, self.value)
+        return self.descriptor.struct.pack(self.value)
 
     def decode(self, data: bytes):
-        self.value = struct.unpack(self._encode_frm, data)[0]
+        self.value = self.descriptor.struct.unpack(data)[0]
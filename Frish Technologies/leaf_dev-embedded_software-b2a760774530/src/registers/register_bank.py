@@ -0,0 +1,118 @@
+"""
+Register bank: NumPy view and history of register blocks
+
+NumPy is optional, it is needed only when a RegisterBank is created.
+"""
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+REGISTER_SIZE = 2  # bytes per register address
+DEFAULT_HISTORY = 1024  # samples per unit
+
+
+def register_dtype(registers, address=None):
+    """ Structured dtype of a register block, a field per register at its byte offset
+
+    :param registers: Register descriptors
+    :param address: First address of the block, the lowest register address if not given
+    """
+    registers = sorted((reg for reg in registers if reg.size), key=lambda r: r.address)
+    if address is None:
+        address = registers[0].address if registers else 0
+    names, formats, offsets = [], [], []
+    itemsize = 0
+    for reg in registers:
+        offset = (reg.address - address) * REGISTER_SIZE
+        names.append(reg.name)
+        formats.append('<{}{}'.format('i' if reg.is_signed else 'u', reg.size))
+        offsets.append(offset)
+        itemsize = max(itemsize, offset + reg.size)
+    # whole registers, the block is read by register addresses
+    itemsize += itemsize % REGISTER_SIZE
+    return np.dtype({'names': names, 'formats': formats, 'offsets': offsets, 'itemsize': itemsize})
+
+
+class RegisterBank(object):
+    """
+    Register values of a block as NumPy records and a ring of the last `history` samples per unit.
+
+        bank = RegisterBank(registers, units=range(32))
+        bank.store(unit, client.read_registers(unit, bank.address, bank.count).data)
+        bank.history(unit)['TACHO_1_VALUE']
+    """
+
+    def __init__(self, registers, units, history=DEFAULT_HISTORY, address=None):
+        """
+        :param registers: Register descriptors of the block
+        :param units: Unit addresses kept in the history
+        :param history: Number of samples kept per unit
+        :param address: First address of the block, the lowest register address if not given
+        """
+        if np is None:
+            raise ImportError("RegisterBank needs numpy")
+
+        self.dtype = register_dtype(registers, address)
+        self.address = address if address is not None else min(reg.address for reg in registers)
+        self.count = self.dtype.itemsize  # bytes to read
+        self.units = list(units)
+        self.depth = history
+
+        self._index = {unit: i for i, unit in enumerate(self.units)}
+        self._rows = np.full(max(self.units) + 1, -1, dtype=np.intp)  # unit -> samples row
+        self._rows[self.units] = np.arange(len(self.units))
+        self.samples = np.zeros((len(self.units), history), dtype=self.dtype)
+        # byte view of the samples, copying raw records is much faster than by fields
+        self._raw = self.samples.view(np.uint8).reshape(len(self.units), history, self.dtype.itemsize)
+        self.timestamps = np.zeros((len(self.units), history), dtype=np.float64)
+        self.stored = np.zeros(len(self.units), dtype=np.int64)  # samples stored per unit
+
+    def view(self, data):
+        """ Record of the block data, not copied
+
+        :param data: bytes-like of at least `count` bytes, e.g. ReadRegistersResponse.data
+        """
+        return np.frombuffer(data, dtype=self.dtype, count=1)[0]
+
+    def store(self, unit: int, data, timestamp=None):
+        """ Add a sample of the unit """
+        i = self._index[unit]
+        self.samples[i, self.stored[i] % self.depth] = np.frombuffer(data, dtype=self.dtype, count=1)[0]
+        self.timestamps[i, self.stored[i] % self.depth] = timestamp if timestamp is not None else time.time()
+        self.stored[i] += 1
+
+    def store_many(self, units, data, timestamp=None):
+        """ Add a sample of several units at once
+
+        :param units: Unit addresses
+        :param data: Block data of the units in unit order, joined (bytes-like of len(units) * `count` bytes)
+            or a list of bytes-like
+        """
+        if not isinstance(data, (bytes, bytearray, memoryview)):
+            data = b''.join(data)
+        rows = self._rows[np.fromiter(units, dtype=np.intp, count=len(units))]
+        if (rows < 0).any():
+            raise KeyError("unit not in the bank")
+        cols = self.stored[rows] % self.depth
+        self._raw[rows, cols] = np.frombuffer(data, dtype=np.uint8, count=len(rows) * self.count).reshape(
+            len(rows), self.count)
+        self.timestamps[rows, cols] = timestamp if timestamp is not None else time.time()
+        self.stored[rows] += 1
+
+    def history(self, unit: int):
+        """ Samples of the unit, oldest first (a copy) """
+        i = self._index[unit]
+        stored = self.stored[i]
+        if stored <= self.depth:
+            return self.samples[i, :stored].copy()
+        return np.roll(self.samples[i], -(stored % self.depth))
+
+    def latest(self, unit: int):
+        """ Last sample of the unit (a view), None if there is none """
+        i = self._index[unit]
+        if not self.stored[i]:
+            return None
+        return self.samples[i, (self.stored[i] - 1) % self.depth]
@@ -0,0 +1,112 @@
+"""
+Register registry: lookup by name, address and address range
+"""
+import bisect
+
+from leafapi.exceptions import ParameterException
+from registers.block_codec import BlockCodec
+from registers.read_plan import REGISTER_SIZE, register_span
+from registers.register import RegisterBase
+
+LAYOUT_CACHE_SIZE = 256
+
+
+class RegisterRegistry(object):
+    """
+    Index of register descriptors.
+
+        registry = RegisterRegistry.from_classes(InputRegisters, HoldingRegisters)
+        registry.decode(client.read_registers(unit, 1000, 40))  # {'FW_VERSION': ..., ...}
+    """
+
+    def __init__(self, registers=()):
+        self.by_name = dict()
+        self.by_address = dict()
+        self._addresses = []  # sorted start addresses
+        self._registers = []  # registers in `_addresses` order
+        self._max_span = 1
+        self._layouts = dict()  # (address, count) -> (names, struct) or None
+
+        for reg in registers:
+            self.add(reg)
+
+    @classmethod
+    def from_classes(cls, *classes):
+        """ Registry of the Register attributes of classes, e.g. InputRegisters, HoldingRegisters """
+        return cls(val for c in classes for val in vars(c).values() if isinstance(val, RegisterBase))
+
+    def add(self, reg):
+        if reg.name in self.by_name:
+            raise ParameterException("register {} already exists".format(reg.name))
+        self.by_name[reg.name] = reg
+        self.by_address.setdefault(reg.address, reg)
+        i = bisect.bisect_right(self._addresses, reg.address)
+        self._addresses.insert(i, reg.address)
+        self._registers.insert(i, reg)
+        self._max_span = max(self._max_span, register_span(reg))
+        self._layouts.clear()
+
+    def __len__(self):
+        return len(self._registers)
+
+    def __iter__(self):
+        return iter(self._registers)
+
+    def __contains__(self, name):
+        return name in self.by_name
+
+    def get(self, name: str):
+        """ Register of the name, None if there is none """
+        return self.by_name.get(name)
+
+    def at(self, address: int):
+        """ Register starting at the address, None if there is none """
+        return self.by_address.get(address)
+
+    def overlapping(self, address: int, count: int) -> list:
+        """ Registers overlapping `count` bytes at `address`, in address order """
+        end = address + max(1, (count + REGISTER_SIZE - 1) // REGISTER_SIZE)
+        lo = bisect.bisect_left(self._addresses, address - self._max_span + 1)
+        hi = bisect.bisect_left(self._addresses, end)
+        return [reg for reg in self._registers[lo:hi] if reg.address + register_span(reg) > address]
+
+    def inside(self, address: int, count: int) -> list:
+        """ Registers whose data is within `count` bytes at `address`, in address order """
+        end = address * REGISTER_SIZE + count
+        lo = bisect.bisect_left(self._addresses, address)
+        hi = bisect.bisect_left(self._addresses, address + (count + REGISTER_SIZE - 1) // REGISTER_SIZE)
+        return [reg for reg in self._registers[lo:hi] if reg.address * REGISTER_SIZE + reg.size <= end]
+
+    def _layout(self, address, count):
+        key = (address, count)
+        if key in self._layouts:
+            return self._layouts[key]
+        registers = self.inside(address, count)
+        try:
+            codec = BlockCodec(registers, address)
+            layout = ([reg.name for reg in codec.registers], codec.struct)
+        except ParameterException:
+            layout = None  # overlapping registers
+        if len(self._layouts) >= LAYOUT_CACHE_SIZE:
+            self._layouts.clear()
+        self._layouts[key] = layout
+        return layout
+
+    def decode(self, res) -> dict:
+        """ Values of the registers within the response data, the registers are not changed
+
+        :param res: ReadRegistersResponse (register_addr, data_len and data are used)
+        :returns: {register name: value}
+        """
+        count = min(res.data_len, len(res.data))
+        layout = self._layout(res.register_addr, count)
+        if layout is not None:
+            names, block = layout
+            return dict(zip(names, block.unpack_from(res.data)))
+
+        values = dict()
+        for reg in self.inside(res.register_addr, count):
+            if reg.size:
+                offset = (reg.address - res.register_addr) * REGISTER_SIZE
+                values[reg.name] = reg.descriptor.struct.unpack_from(res.data, offset)[0]
+        return values
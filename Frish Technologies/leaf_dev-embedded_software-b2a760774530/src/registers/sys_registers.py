@@ -1,5 +1,55 @@
+"""
+Generated by tools/generate_registers.py from mb_regs_configs.h, do not edit.
+All values are literals, importing this module needs no SWIG module.
+
+PARTIAL register map: the source held only some of the firmware registers.
+Regenerate it from the firmware header before relying on it:
+    python tools/generate_registers.py --header <firmware>/mb_regs/mb_regs_configs.h
+"""
 from registers.register import Register, R, W, RW
-from leafapi.leaf_sys.mb_data import *
+
+PARTIAL = True  # only some of the firmware registers
 
 
 class InputRegisters:
+    FW_VERSION = Register(name='FW_VERSION', address=1000, size=2, access_type=R)
+    GLOBAL_STATUS = Register(name='GLOBAL_STATUS', address=1003, size=4, access_type=R)
+    TACHO_15_VALUE = Register(name='TACHO_15_VALUE', address=1033, size=2, access_type=R)
+
+
+class HoldingRegisters:
+    ADDR = Register(name='ADDR', address=3900, size=2, access_type=RW)
+    PWM_15_DUTY_CYCLE = Register(name='PWM_15_DUTY_CYCLE', address=4057, size=2, access_type=RW)
+
+
+INPUT_ADDRESSES = (1000, 1003, 1033)
+INPUT_NAMES = ('FW_VERSION', 'GLOBAL_STATUS', 'TACHO_15_VALUE')
+INPUT_NAME_TO_ADDRESS = {
+    'FW_VERSION': 1000,
+    'GLOBAL_STATUS': 1003,
+    'TACHO_15_VALUE': 1033,
+}
+INPUT_ADDRESS_TO_NAME = {
+    1000: 'FW_VERSION',
+    1003: 'GLOBAL_STATUS',
+    1033: 'TACHO_15_VALUE',
+}
+INPUT_READ_PLAN = (
+    (1000, 10, '<H4xI', ('FW_VERSION', 'GLOBAL_STATUS')),
+    (1033, 2, '<H', ('TACHO_15_VALUE',)),
+)
+
+HOLDING_ADDRESSES = (3900, 4057)
+HOLDING_NAMES = ('ADDR', 'PWM_15_DUTY_CYCLE')
+HOLDING_NAME_TO_ADDRESS = {
+    'ADDR': 3900,
+    'PWM_15_DUTY_CYCLE': 4057,
+}
+HOLDING_ADDRESS_TO_NAME = {
+    3900: 'ADDR',
+    4057: 'PWM_15_DUTY_CYCLE',
+}
+HOLDING_READ_PLAN = (
+    (3900, 2, '<H', ('ADDR',)),
+    (4057, 2, '<H', ('PWM_15_DUTY_CYCLE',)),
+)
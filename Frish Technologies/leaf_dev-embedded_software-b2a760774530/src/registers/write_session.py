@@ -0,0 +1,118 @@
+"""
+Write session: sends only the changed holding registers, contiguous ones in one frame
+"""
+from leafapi.exceptions import LeafIOException, ParameterException
+from registers.block_codec import BlockCodec
+from registers.read_plan import MAX_READ_SIZE, REGISTER_SIZE, register_span
+from registers.register import W
+
+MAX_WRITE_SIZE = MAX_READ_SIZE  # request and response packets share the header size
+
+
+class WriteSession(object):
+    """
+    Tracks the values of holding registers of a unit and writes the changed ones on commit.
+
+        with WriteSession(client, unit, [PWM_1_DUTY_CYCLE, PWM_2_DUTY_CYCLE]) as session:
+            session[PWM_1_DUTY_CYCLE] = 50
+            session[PWM_2_DUTY_CYCLE] = 60
+        # one frame sent on exit
+
+    The values are kept by the session, the registers are shared by every unit and not changed.
+    Changed registers are written in one request only if they follow each other without a gap:
+    the next register starts at the end address of the previous one and both sizes are even.
+    An unused address, an unchanged register or an odd sized register (it leaves half an address
+    unused) in between starts a new request, as would a request exceeding `max_size`.
+    """
+
+    def __init__(self, client, unit: int, registers, max_size=MAX_WRITE_SIZE, values: dict = None):
+        """
+        :param client: ILeafApiClient
+        :param unit: The unit to write to
+        :param registers: Holding registers to track
+        :param max_size: Maximal data size of one write request in bytes
+        :param values: Committed values {register name: value}, the register values if not given
+        """
+        for reg in registers:
+            if W not in reg.access_type:
+                raise ParameterException("register {} is not writable".format(reg.name))
+
+        self.client = client
+        self.unit = unit
+        self.max_size = max_size
+        self.registers = sorted(registers, key=lambda r: r.address)
+        self._committed = [values.get(reg.name) if values is not None else reg.value for reg in self.registers]
+        self._values = list(self._committed)
+        self._index = {reg.name: i for i, reg in enumerate(self.registers)}
+        self._codecs = dict()  # block register indexes -> BlockCodec
+
+        self.frames_sent = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.commit()
+
+    def _position(self, reg) -> int:
+        try:
+            return self._index[reg if isinstance(reg, str) else reg.name]
+        except KeyError:
+            raise ParameterException("register {} is not in the session".format(reg))
+
+    def __getitem__(self, reg):
+        """ Value of the register (or register name) in the session """
+        return self._values[self._position(reg)]
+
+    def __setitem__(self, reg, value):
+        """ Set the value of the register (or register name), it is written on commit """
+        self._values[self._position(reg)] = value
+
+    def dirty(self) -> list:
+        """ Registers whose value changed since the last commit """
+        return [reg for reg, value, committed in zip(self.registers, self._values, self._committed)
+                if value != committed]
+
+    def rollback(self):
+        """ Drop the changes, the committed values are restored """
+        self._values = list(self._committed)
+
+    def blocks(self) -> list:
+        """ Dirty registers grouped into the write requests, list of register lists """
+        blocks = []
+        end = size = None
+        for reg in self.dirty():
+            # an odd sized register does not fill its address, it is never merged
+            if reg.address == end and size % REGISTER_SIZE == 0 and reg.size % REGISTER_SIZE == 0 \
+                    and size + reg.size <= self.max_size:
+                blocks[-1].append(reg)
+                size += reg.size
+            else:
+                blocks.append([reg])
+                size = reg.size
+            end = reg.address + register_span(reg)
+        return blocks
+
+    def commit(self, **kwargs) -> int:
+        """ Write the changed registers
+
+        :param kwargs: write_registers arguments
+        :returns: Number of frames sent
+        """
+        frames = 0
+        for block in self.blocks():
+            key = tuple(self._index[reg.name] for reg in block)
+            codec = self._codecs.get(key)
+            if codec is None:
+                codec = self._codecs[key] = BlockCodec(block)
+            data = codec.encode([self._values[i] for i, reg in zip(key, block) if reg.size])
+            res = self.client.write_registers(self.unit, block[0].address, len(data), data=data, **kwargs)
+            frames += 1
+            self.frames_sent += 1
+            if res.is_error():
+                raise LeafIOException("unit {}, address {}: error code {}".format(
+                    self.unit, block[0].address, res.error_code))
+            for i in key:
+                self._committed[i] = self._values[i]
+        return frames
@@ -0,0 +1,70 @@
+"""
+Fake serial bus for the client tests: units on a pseudo terminal
+"""
+import os
+import select
+import threading
+import time
+
+from leafapi.frame import SOF, frame_header, frame_crc, crc16
+from leafapi.frame_parser import FrameParser
+
+try:
+    import pty
+except ImportError:
+    pty = None
+
+
+class EchoBus(object):
+    """
+    Units on a pseudo terminal, every request is answered with its own packet
+    (requests and responses share the frame format). Units in `silent` do not answer,
+    the others answer after `delay` seconds.
+    """
+
+    def __init__(self):
+        self.master, self.slave = pty.openpty()
+        self.port = os.ttyname(self.slave)
+        self.silent = set()
+        self.corrupt = 0  # number of next answers sent with a bad CRC
+        self.delay = 0
+        self.requests = []
+        self._parser = FrameParser()
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self.unplug()
+        os.close(self.slave)
+
+    def unplug(self):
+        """ Stop answering and close the master side, reads of the port fail as on a removed adapter """
+        if self.master is None:
+            return
+        self._stop = True
+        self._thread.join()
+        os.close(self.master)
+        self.master = None
+
+    def answer(self, payload):
+        header = frame_header.pack(SOF, len(payload))
+        crc = crc16(payload, crc16(header[len(SOF):]))
+        if self.corrupt:
+            self.corrupt -= 1
+            crc ^= 0xffff
+        os.write(self.master, header + payload + frame_crc.pack(crc))
+
+    def _run(self):
+        while not self._stop:
+            if not select.select([self.master], [], [], 0.01)[0]:
+                continue
+            for payload in self._parser.feed(os.read(self.master, 1024)):
+                self.requests.append(payload)
+                self.respond(payload)
+
+    def respond(self, payload):
+        if payload[1] not in self.silent:
+            if self.delay:
+                time.sleep(self.delay)
+            self.answer(payload)
@@ -0,0 +1,47 @@
+import unittest
+
+from app_types import BaseType, slot_fields
+
+
+class Point(BaseType):
+    __slots__ = ('x', 'y')
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+class Labelled(Point):
+    __slots__ = 'label'
+
+    def __init__(self, x, y, label):
+        Point.__init__(self, x, y)
+        self.label = label
+
+
+class Plain(BaseType):
+    def __init__(self, point, extra):
+        self.point = point
+        self.extra = extra
+
+
+class BaseTypeTestCase(unittest.TestCase):
+    def test_slot_fields(self):
+        self.assertEqual(('x', 'y', 'label'), slot_fields(Labelled))
+        self.assertEqual((), slot_fields(Plain))
+
+    def test_slotted(self):
+        point = Labelled(1, Point(2, 3), 'a')
+        self.assertEqual({'x': 1, 'y': {'x': 2, 'y': 3}, 'label': 'a'}, point.to_dict())
+        self.assertEqual(point, Labelled(1, Point(2, 3), 'a'))
+        self.assertNotEqual(point, Labelled(1, Point(2, 4), 'a'))
+        self.assertNotEqual(Point(1, 2), Labelled(1, 2, 'a'))
+
+    def test_plain(self):
+        plain = Plain(Point(1, 2), {'a': Point(3, 4)})
+        self.assertEqual({'point': {'x': 1, 'y': 2}, 'extra': {'a': {'x': 3, 'y': 4}}}, plain.to_dict())
+        self.assertEqual(plain, Plain(Point(1, 2), {'a': Point(3, 4)}))
+
+
+if __name__ == '__main__':
+    unittest.main()
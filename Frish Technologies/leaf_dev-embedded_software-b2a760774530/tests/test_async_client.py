@@ -0,0 +1,97 @@
+import asyncio
+import os
+import unittest
+
+from leafapi.exceptions import LeafTimeoutException, LeafIOException
+from leafapi.request_message import ReadRegistersRequest
+
+try:
+    import pty
+except ImportError:
+    pty = None
+
+
+@unittest.skipIf(pty is None, "pty is not available")
+class AsyncApiClientTestCase(unittest.TestCase):
+    def setUp(self):
+        self.master, self.slave = pty.openpty()
+
+    def tearDown(self):
+        if self.master is not None:
+            os.close(self.master)
+        os.close(self.slave)
+
+    def unplug(self):
+        os.close(self.master)
+        self.master = None
+
+    def answer(self, mpu_addr, register_addr, data_len):
+        # requests and responses share the frame format, echo a read request as the response
+        os.write(self.master, ReadRegistersRequest(mpu_addr=mpu_addr, register_addr=register_addr,
+                                                   data_len=data_len).encode())
+
+    def run_client(self, coro_fn):
+        from leafapi.async_client import AsyncApiClient
+
+        async def main():
+            async with AsyncApiClient(serial_port=os.ttyname(self.slave)) as client:
+                return await coro_fn(client)
+
+        return asyncio.run(main())
+
+    def test_read_registers(self):
+        async def read(client):
+            asyncio.get_running_loop().call_later(0.01, self.answer, 5, 1000, 4)
+            return await client.read_registers(5, 1000, 4, timeout=(1, 1))
+
+        res = self.run_client(read)
+        self.assertEqual(5, res.mpu_addr)
+        self.assertEqual(1000, res.register_addr)
+        self.assertIsNotNone(res.rx_wait_time)
+
+    def test_timeout_and_stale_frame(self):
+        async def read(client):
+            with self.assertRaises(LeafTimeoutException):
+                await client.read_registers(5, 1000, 4, timeout=(1, 0.05))
+
+            # late answer of the timed out request comes first
+            loop = asyncio.get_running_loop()
+            loop.call_later(0.01, self.answer, 5, 1000, 4)
+            loop.call_later(0.02, self.answer, 6, 1000, 4)
+            res = await client.read_registers(6, 1000, 4, timeout=(1, 1))
+            return res, client.stale_frames
+
+        res, stale_frames = self.run_client(read)
+        self.assertEqual(6, res.mpu_addr)
+        self.assertEqual(1, stale_frames)
+
+    def test_cancel(self):
+        async def read(client):
+            task = asyncio.ensure_future(client.read_registers(5, 1000, 4))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+            asyncio.get_running_loop().call_later(0.01, self.answer, 5, 1001, 4)
+            return await client.read_registers(5, 1001, 4, timeout=(1, 1))
+
+        self.assertEqual(1001, self.run_client(read).register_addr)
+
+    def test_port_error(self):
+        async def read(client):
+            asyncio.get_running_loop().call_later(0.01, self.unplug)
+            with self.assertRaises(LeafIOException):
+                await client.read_registers(5, 1000, 4, timeout=(1, 1))
+
+            transport = client._transport
+            self.assertIsNotNone(transport.rx_error)
+            self.assertFalse(transport.serial.is_open)
+            with self.assertRaises(LeafIOException):
+                await transport.read_frame(timeout=0.1)
+
+        self.run_client(read)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+
+from leafapi.exceptions import ParameterException
+from registers.block_codec import BlockCodec
+from registers.register import Register, R
+
+
+def reg(name, address, size, is_signed=False):
+    return Register(name=name, address=address, size=size, access_type=R, value=0, is_signed=is_signed)
+
+
+class BlockCodecTestCase(unittest.TestCase):
+    def test_decode_with_gap(self):
+        regs = [reg('B', 1003, 4), reg('A', 1000, 2), reg('C', 1006, 2, is_signed=True), reg('D', 1007, 1)]
+        codec = BlockCodec(regs)
+        self.assertEqual('<H4xI2xhB', codec.struct.format)
+        self.assertEqual(15, codec.size)
+
+        data = bytes.fromhex('0700' + 'ffff' * 2 + '78563412' + 'ffff' + 'feff' + '05')
+        self.assertEqual((7, 0x12345678, -2, 5), codec.decode(data))
+        self.assertEqual([0x12345678, 7, -2, 5], [r.value for r in regs])
+
+        self.assertEqual(bytes.fromhex('0700' + '0000' * 2 + '78563412' + '0000' + 'feff' + '05'), codec.encode())
+
+    def test_block_address(self):
+        codec = BlockCodec([reg('A', 1002, 2)], address=1000)
+        self.assertEqual((0x0201,), codec.decode(b'\x00' * 4 + b'\x01\x02'))
+
+    def test_overlap(self):
+        with self.assertRaises(ParameterException):
+            BlockCodec([reg('A', 1000, 4), reg('B', 1001, 2)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+from unittest import mock
+
+from leafapi.cache import CachingApiClient
+from leafapi.request_message import ReadRegistersResponse, WriteRegistersResponse
+
+
+class CountingClient(object):
+    def __init__(self):
+        self.reads = []
+
+    def read_registers(self, unit, address, count, **kwargs):
+        self.reads.append((unit, address, count))
+        data = bytes((address + i) & 0xff for i in range(count))
+        return ReadRegistersResponse(mpu_addr=unit, register_addr=address, data_len=count, data=data)
+
+    def write_registers(self, unit, address, count, data, **kwargs):
+        return WriteRegistersResponse(mpu_addr=unit, register_addr=address, data_len=count)
+
+
+class CachingApiClientTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = CountingClient()
+        self.cache = CachingApiClient(self.client, ttl={range(1000, 1020): 10, (1030, 1040): 0})
+
+    def test_hit_and_sub_range(self):
+        first = self.cache.read_registers(1, 1000, 16)
+        self.assertEqual(first.data, self.cache.read_registers(1, 1000, 16).data)
+
+        res = self.cache.read_registers(1, 1002, 4)
+        self.assertEqual(first.data[4:8], res.data)
+        self.assertEqual(1002, res.register_addr)
+        self.assertEqual(1, len(self.client.reads))
+
+        # other unit, past the block end and not cached addresses go to the bus
+        self.cache.read_registers(2, 1000, 4)
+        self.cache.read_registers(1, 1006, 6)
+        self.cache.read_registers(1, 1030, 2)
+        self.cache.read_registers(1, 1030, 2)
+        self.assertEqual(5, len(self.client.reads))
+        self.assertEqual(2, self.cache.hits)
+        self.assertEqual(3, self.cache.misses)
+
+    def test_ttl_expired(self):
+        with mock.patch('leafapi.cache.time.monotonic', return_value=100.0):
+            self.cache.read_registers(1, 1000, 4)
+        with mock.patch('leafapi.cache.time.monotonic', return_value=111.0):
+            self.cache.read_registers(1, 1000, 4)
+        self.assertEqual(2, len(self.client.reads))
+
+    def test_write_invalidates(self):
+        self.cache.read_registers(1, 1000, 8)
+        self.cache.read_registers(1, 1010, 8)
+        self.cache.write_registers(1, 1003, 2, data=b'\x00\x01')
+        self.cache.read_registers(1, 1000, 8)
+        self.cache.read_registers(1, 1010, 8)
+        self.assertEqual([(1, 1000, 8), (1, 1010, 8), (1, 1000, 8)], self.client.reads)
+
+    def test_eviction(self):
+        cache = CachingApiClient(self.client, default_ttl=10, max_entries=2)
+        for address in (1000, 1010, 1020, 1000):
+            cache.read_registers(1, address, 2)
+        self.assertEqual(2, cache.evictions)
+        self.assertEqual(4, len(self.client.reads))
+
+
+if __name__ == '__main__':
+    unittest.main()
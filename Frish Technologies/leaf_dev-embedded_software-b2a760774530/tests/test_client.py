@@ -0,0 +1,149 @@
+import threading
+import time
+import unittest
+
+from leafapi.exceptions import LeafTimeoutException, UnitUnavailableException, InvalidMessageReceivedException
+from leafapi.request_message import ReadRegistersRequest, WriteRegistersRequest, ReadRegistersResponse, \
+    WriteRegistersResponse
+from leafapi.priority_lock import PRIORITY_BACKGROUND, PRIORITY_CONTROL, PRIORITY_NORMAL
+from leafapi.retry import RetryPolicy
+from tests.serial_bus import EchoBus, pty
+
+
+@unittest.skipIf(pty is None, "pty is not available")
+class ApiClientTestCase(unittest.TestCase):
+    def setUp(self):
+        from leafapi.client import ApiClient
+
+        self.bus = EchoBus()
+        self.client = ApiClient(serial_port=self.bus.port)
+
+    def tearDown(self):
+        self.client.close()
+        self.bus.close()
+
+    def test_read_write(self):
+        res = self.client.read_registers(5, 1000, 4, timeout=(1, 1))
+        self.assertEqual((5, 1000, 4), (res.mpu_addr, res.register_addr, res.data_len))
+
+        res = self.client.write_registers(5, 4000, 2, data=b'\x01\x02', timeout=(1, 1))
+        self.assertEqual(b'\x01\x02', res.data)
+
+    def test_execute_many(self):
+        self.bus.silent.add(9)
+        requests = [
+            ReadRegistersRequest(mpu_addr=1, register_addr=1000, data_len=4),
+            WriteRegistersRequest(mpu_addr=1, register_addr=4000, data_len=2, data=b'\x05\x00'),
+            ReadRegistersRequest(mpu_addr=9, register_addr=1000, data_len=4),
+            ReadRegistersRequest(mpu_addr=2, register_addr=1003, data_len=4),
+        ]
+        results = self.client.execute_many(requests, timeout=(1, 0.2))
+
+        self.assertIsInstance(results[0], ReadRegistersResponse)
+        self.assertIsInstance(results[1], WriteRegistersResponse)
+        self.assertEqual(b'\x05\x00', results[1].data)
+        self.assertIsInstance(results[2], LeafTimeoutException)
+        # the silent unit used up the budget
+        self.assertIsInstance(results[3], LeafTimeoutException)
+        self.assertEqual(3, len(self.bus.requests))
+
+    def test_dead_unit(self):
+        from leafapi.client import ApiClient
+
+        self.bus.silent.add(9)
+        for _ in range(3):
+            with self.assertRaises(LeafTimeoutException):
+                self.client.read_registers(9, 1000, 4, timeout=(1, 0.02))
+        # no unit health by default
+        self.assertEqual('closed', self.client.get_unit_state(9)['state'])
+
+        client = ApiClient(serial_port=self.bus.port, unit_health=True)
+        self.addCleanup(client.close)
+        for _ in range(3):
+            with self.assertRaises(LeafTimeoutException):
+                client.read_registers(9, 1000, 4, timeout=(1, 0.02))
+        self.assertEqual('open', client.get_unit_state(9)['state'])
+        with self.assertRaises(UnitUnavailableException):
+            client.read_registers(9, 1000, 4)
+        self.assertEqual(6, len(self.bus.requests))
+
+        # healthy units get a timeout of their measured round trip time
+        client.read_registers(1, 1000, 4)
+        self.assertLess(client.get_unit_state(1)['timeout'], 1)
+
+    def test_retry(self):
+        from leafapi.client import ApiClient
+
+        self.bus.corrupt = 1
+        with self.assertRaises(InvalidMessageReceivedException):
+            self.client.read_registers(5, 1000, 4, timeout=(1, 1))
+
+        client = ApiClient(serial_port=self.bus.port, retry=RetryPolicy())
+        self.bus.corrupt = 2
+        res = client.read_registers(5, 1000, 4, timeout=(1, 1))
+        self.assertEqual(1000, res.register_addr)
+        self.assertEqual(2, client.retry.retried)
+        self.assertEqual(3, client._sp.rx_stats()['crc_errors'])
+
+    def pipelined(self):
+        from leafapi.client import ApiClient
+
+        client = ApiClient(serial_port=self.bus.port, pipeline_window=2)
+        self.addCleanup(client.close)
+        return client
+
+    def wait_until(self, condition, timeout=2):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail("condition not met in {} s".format(timeout))
+            time.sleep(0.001)
+
+    def test_pipelined_priority(self):
+        client = self.pipelined()
+        self.bus.silent.update((8, 9))
+
+        def read(unit, priority=PRIORITY_NORMAL, rx_timeout=1):
+            try:
+                client.read_registers(unit, 1000, 4, timeout=(-1, rx_timeout), priority=priority)
+            except LeafTimeoutException:
+                pass
+
+        threads = []
+
+        def start(*args, **kwargs):
+            threads.append(threading.Thread(target=read, args=args, kwargs=kwargs))
+            threads[-1].start()
+
+        # the silent units take both slots, unit 1 holds the port waiting for a slot
+        start(8, rx_timeout=0.2)
+        start(9, rx_timeout=0.2)
+        self.wait_until(lambda: client.pipeline.in_flight == 2)
+        start(1)
+        self.wait_until(lambda: client._lock.locked())
+        start(3, PRIORITY_BACKGROUND)
+        self.wait_until(lambda: len(client._lock._waiters) == 1)
+        start(2, PRIORITY_CONTROL)
+        self.wait_until(lambda: len(client._lock._waiters) == 2)
+        for t in threads:
+            t.join()
+
+        self.assertEqual([8, 9, 1, 2, 3], sorted(payload[1] for payload in self.bus.requests[:2]) +
+                         [payload[1] for payload in self.bus.requests[2:]])
+
+    def test_pipelined_execute_many(self):
+        client = self.pipelined()
+        self.bus.delay = 0.05
+        requests = [ReadRegistersRequest(mpu_addr=unit, register_addr=1000, data_len=4) for unit in (1, 2, 3)]
+        batch = threading.Thread(target=client.execute_many, args=(requests,), kwargs={'timeout': (1, 1)})
+        batch.start()
+        self.wait_until(lambda: self.bus.requests)
+
+        # no request of another caller gets in between the batch requests
+        client.read_registers(5, 1000, 4, timeout=(1, 1))
+        batch.join()
+        self.assertEqual([1, 2, 3, 5], [payload[1] for payload in self.bus.requests])
+
+
+if __name__ == '__main__':
+    unittest.main()
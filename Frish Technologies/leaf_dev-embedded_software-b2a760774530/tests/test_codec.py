@@ -0,0 +1,99 @@
+import unittest
+
+from leafapi.codec import StructCodec, get_codec, set_codec
+from leafapi.exceptions import InvalidMessageCreationException, ParameterException
+from leafapi.frame import sp, FRAME_PAYLOAD_SIZE, SP_PKG_TYPE_REQW, SP_ERROR_OK
+from leafapi.pdu import ApiResponse
+from leafapi.request_message import ReadRegistersRequest, WriteRegistersRequest
+
+REQR_EXAMPLE = bytes((0xaa, 0x55, 0x06, 0x00, 0x01, 0x05, 0xe8, 0x03, 0x04, 0x00, 0xbf, 0x43))
+REQW_EXAMPLE = bytes((0xaa, 0x55, 0x0a, 0x00, 0x02, 0x05, 0xe8, 0x03, 0x04, 0x00, 0x01, 0x02, 0x03, 0x04, 0x3e, 0x8d))
+
+
+class StructCodecTestCase(unittest.TestCase):
+    def test_encode(self):
+        read_req = ReadRegistersRequest(mpu_addr=0x05, register_addr=1000, data_len=4, codec='struct')
+        self.assertEqual(REQR_EXAMPLE, read_req.encode())
+
+        write_req = WriteRegistersRequest(mpu_addr=0x05, register_addr=1000, data_len=4, data=b'\x01\x02\x03\x04',
+                                          codec='struct')
+        self.assertEqual(REQW_EXAMPLE, write_req.encode())
+
+    def test_encode_not_valid_length(self):
+        write_req = WriteRegistersRequest(mpu_addr=0x05, register_addr=1000, data_len=FRAME_PAYLOAD_SIZE + 1,
+                                          codec='struct')
+        self.assertRaises(InvalidMessageCreationException, write_req.encode)
+
+    def test_encode_data_len_mismatch(self):
+        for data in (b'\x01\x02', b'\x01\x02\x03\x04\x05\x06'):
+            write_req = WriteRegistersRequest(mpu_addr=0x05, register_addr=1000, data_len=4, data=data,
+                                              codec='struct')
+            self.assertRaises(InvalidMessageCreationException, write_req.encode)
+            self.assertRaises(InvalidMessageCreationException, write_req.encode_into, bytearray(32))
+
+        write_req = WriteRegistersRequest(mpu_addr=0x05, register_addr=1000, data_len=0, data=b'\x01',
+                                          codec='struct')
+        self.assertRaises(InvalidMessageCreationException, write_req.encode)
+
+    def test_encode_into_uses_codec(self):
+        class FixedCodec(StructCodec):
+            name = 'fixed'
+
+            def encode(self, req, tr_frame=None):
+                return b'\x01\x02\x03'
+
+            def encode_into(self, req, buffer, offset=0):
+                buffer[offset:offset + 3] = self.encode(req)
+                return 3
+
+        read_req = ReadRegistersRequest(mpu_addr=0x05, register_addr=1000, data_len=4, codec='struct')
+        read_req.codec = FixedCodec()
+        buffer = bytearray(8)
+        self.assertEqual(3, read_req.encode_into(buffer, 1))
+        self.assertEqual(b'\x00\x01\x02\x03', buffer[:4])
+
+    def test_decode(self):
+        res = ApiResponse(codec='struct')
+        res.decode(REQW_EXAMPLE[4:-2])
+        self.assertEqual(SP_PKG_TYPE_REQW, res.r_type)
+        self.assertEqual(5, res.mpu_addr)
+        self.assertEqual(1000, res.register_addr)
+        self.assertEqual(b'\x01\x02\x03\x04', res.data)
+        self.assertEqual(SP_ERROR_OK, res.error_code)
+
+    def test_select_codec(self):
+        default = get_codec()
+        try:
+            set_codec('struct')
+            self.assertEqual('struct', ReadRegistersRequest(mpu_addr=1, register_addr=1, data_len=1).codec.name)
+        finally:
+            set_codec(default.name)
+        self.assertRaises(ParameterException, get_codec, 'unknown')
+
+
+@unittest.skipIf(sp is None, "SWIG serial_protocol module is not built")
+class SwigCodecTestCase(unittest.TestCase):
+    def test_same_bytes(self):
+        for mpu_addr, register_addr, data in ((0, 0, b''), (5, 1000, b'\x01\x02\x03\x04'),
+                                              (255, 0xffff, bytes(range(FRAME_PAYLOAD_SIZE - 6)))):
+            for codec in ('swig', 'struct'):
+                read_req = ReadRegistersRequest(mpu_addr=mpu_addr, register_addr=register_addr, data_len=len(data),
+                                                codec=codec)
+                write_req = WriteRegistersRequest(mpu_addr=mpu_addr, register_addr=register_addr,
+                                                  data_len=len(data), data=data, codec=codec)
+                if codec == 'swig':
+                    expected = read_req.encode(), write_req.encode()
+                else:
+                    self.assertEqual(expected, (read_req.encode(), write_req.encode()))
+
+    def test_encode_into(self):
+        write_req = WriteRegistersRequest(mpu_addr=0x05, register_addr=1000, data_len=4, data=b'\x01\x02\x03\x04',
+                                          codec='swig')
+        buffer = bytearray(len(REQW_EXAMPLE) + 2)
+        self.assertEqual(len(REQW_EXAMPLE), write_req.encode_into(buffer, 2))
+        self.assertEqual(REQW_EXAMPLE, buffer[2:])
+        self.assertRaises(InvalidMessageCreationException, write_req.encode_into, bytearray(4))
+
+
+if __name__ == '__main__':
+    unittest.main()
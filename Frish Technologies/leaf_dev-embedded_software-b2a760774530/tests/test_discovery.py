@@ -0,0 +1,55 @@
+import json
+import os
+import tempfile
+import unittest
+
+from leafapi.frame import packet_header
+from tests.serial_bus import EchoBus, pty
+
+
+class UnitsBus(EchoBus):
+    """ Units answering with their firmware version """
+
+    def __init__(self, units):
+        EchoBus.__init__(self)
+        self.units = units
+
+    def respond(self, payload):
+        unit = payload[1]
+        if unit in self.units:
+            r_type, _, register_addr, data_len = packet_header.unpack_from(payload)
+            self.answer(packet_header.pack(r_type, unit, register_addr, data_len) +
+                        self.units[unit].to_bytes(data_len, 'little'))
+
+
+@unittest.skipIf(pty is None, "pty is not available")
+class DiscoveryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.buses = [UnitsBus({1: 0x0102, 5: 0x0103}), UnitsBus({7: 0x0200})]
+        self.cache_file = os.path.join(tempfile.mkdtemp(), 'units.json')
+
+    def tearDown(self):
+        for bus in self.buses:
+            bus.close()
+        if os.path.exists(self.cache_file):
+            os.remove(self.cache_file)
+
+    def test_discover_and_verify(self):
+        from leafapi.discovery import discover
+
+        ports = [bus.port for bus in self.buses]
+        found = discover(ports, units=range(16), cache_file=self.cache_file, probe_timeout=0.05)
+        self.assertEqual({ports[0]: {1: 0x0102, 5: 0x0103}, ports[1]: {7: 0x0200}}, found)
+        self.assertEqual(16, len(self.buses[0].requests))
+        with open(self.cache_file) as f:
+            self.assertIn(ports[1], json.load(f)['ports'])
+
+        # known units only, unit 5 is gone
+        del self.buses[0].units[5]
+        found = discover(ports, units=range(16), cache_file=self.cache_file)
+        self.assertEqual({ports[0]: {1: 0x0102}, ports[1]: {7: 0x0200}}, found)
+        self.assertEqual(16 + 2, len(self.buses[0].requests))
+
+
+if __name__ == '__main__':
+    unittest.main()
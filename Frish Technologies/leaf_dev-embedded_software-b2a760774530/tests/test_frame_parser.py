@@ -0,0 +1,90 @@
+import unittest
+
+from leafapi.frame import crc16
+from leafapi.frame_parser import FrameParser
+
+REQR_EXAMPLE = bytes((0xaa, 0x55, 0x06, 0x00, 0x01, 0x05, 0xe8, 0x03, 0x04, 0x00, 0xbf, 0x43))
+REQW_EXAMPLE = bytes((0xaa, 0x55, 0x0a, 0x00, 0x02, 0x05, 0xe8, 0x03, 0x04, 0x00, 0x01, 0x02, 0x03, 0x04, 0x3e, 0x8d))
+
+
+class Crc16TestCase(unittest.TestCase):
+    def test_crc16(self):
+        self.assertEqual(0x43bf, crc16(REQR_EXAMPLE[2:-2]))
+        self.assertEqual(0x8d3e, crc16(REQW_EXAMPLE[2:-2]))
+
+    def test_crc16_continue(self):
+        self.assertEqual(crc16(REQW_EXAMPLE[2:-2]), crc16(REQW_EXAMPLE[10:-2], crc16(REQW_EXAMPLE[2:10])))
+
+
+class FrameParserTestCase(unittest.TestCase):
+    def test_feed_frame(self):
+        parser = FrameParser()
+        self.assertEqual([REQR_EXAMPLE[4:-2]], parser.feed(REQR_EXAMPLE))
+        self.assertEqual(0, len(parser))
+        self.assertEqual(1, parser.frames)
+        self.assertEqual(0, parser.errors)
+
+    def test_feed_by_byte(self):
+        parser = FrameParser()
+        frames = []
+        for i in range(len(REQW_EXAMPLE)):
+            frames += parser.feed(REQW_EXAMPLE[i:i + 1])
+        self.assertEqual([REQW_EXAMPLE[4:-2]], frames)
+
+    def test_feed_many_frames(self):
+        parser = FrameParser()
+        data = b'\x00\x55\xaa' + REQR_EXAMPLE + REQW_EXAMPLE + REQR_EXAMPLE[:5]
+        self.assertEqual([REQR_EXAMPLE[4:-2], REQW_EXAMPLE[4:-2]], parser.feed(memoryview(data)))
+        self.assertEqual(5, len(parser))
+        self.assertEqual([REQR_EXAMPLE[4:-2]], parser.feed(REQR_EXAMPLE[5:]))
+        self.assertEqual(0, parser.errors)
+        self.assertEqual(1, parser.framing_errors)
+
+    def test_feed_not_valid_crc(self):
+        parser = FrameParser()
+        not_valid = REQR_EXAMPLE[:-1] + b'\x44'
+        self.assertEqual([], parser.feed(not_valid))
+        self.assertEqual(1, parser.errors)
+        self.assertEqual(1, parser.crc_errors)
+        self.assertEqual([REQW_EXAMPLE[4:-2]], parser.feed(REQW_EXAMPLE))
+
+    def test_resync_inside_corrupt_frame(self):
+        parser = FrameParser()
+        # corrupt length claims the next frame, which must not be lost
+        corrupt = REQR_EXAMPLE[:2] + b'\x0e' + REQR_EXAMPLE[3:8]
+        self.assertEqual([], parser.feed(corrupt + REQW_EXAMPLE[:6]))
+        self.assertEqual([REQW_EXAMPLE[4:-2]], parser.feed(REQW_EXAMPLE[6:]))
+        self.assertEqual(1, parser.crc_errors)
+        self.assertEqual(1, parser.framing_errors)
+
+    def test_resync_without_more_data(self):
+        # corrupt length within max_payload, longer than the data which follows
+        corrupt = REQR_EXAMPLE[:2] + b'\x30' + REQR_EXAMPLE[3:8]
+        parser = FrameParser()
+        self.assertEqual([REQW_EXAMPLE[4:-2]], parser.feed(corrupt + REQW_EXAMPLE))
+        self.assertEqual(0, len(parser))
+        self.assertEqual(1, parser.length_errors)
+
+        parser = FrameParser()
+        frames = parser.feed(corrupt)
+        for i in range(len(REQW_EXAMPLE)):
+            self.assertEqual([], frames)
+            frames = parser.feed(REQW_EXAMPLE[i:i + 1])
+        self.assertEqual([REQW_EXAMPLE[4:-2]], frames)
+        self.assertEqual(0, len(parser))
+
+    def test_wait_for_incomplete_frame(self):
+        parser = FrameParser()
+        self.assertEqual([], parser.feed(REQW_EXAMPLE[:-1]))
+        self.assertEqual([REQW_EXAMPLE[4:-2]], parser.feed(REQW_EXAMPLE[-1:]))
+        self.assertEqual(0, parser.errors)
+
+    def test_feed_not_valid_length(self):
+        parser = FrameParser(max_payload=8)
+        self.assertEqual([], parser.feed(REQW_EXAMPLE))
+        self.assertEqual(1, parser.errors)
+        self.assertEqual(1, parser.length_errors)
+
+
+if __name__ == '__main__':
+    unittest.main()
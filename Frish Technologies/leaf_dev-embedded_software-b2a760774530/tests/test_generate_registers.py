@@ -0,0 +1,95 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+
+from registers.read_plan import ReadPlan
+
+TOOLS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools')
+
+HEADER = """
+#ifndef MB_REGS_CONFIGS_H
+#define MB_REGS_CONFIGS_H
+
+#define MB_IR_START                 1000U
+#define MB_IR_FW_VERSION            (MB_IR_START + 0U)  // firmware version
+#define MB_IR_FW_VERSION_SIZE       1U
+#define MB_IR_GLOBAL_STATUS         (MB_IR_FW_VERSION + 3U) /* status bits */
+#define MB_IR_GLOBAL_STATUS_SIZE    2U
+#define MB_IR_TACHO_1_VALUE         0x3FDu
+#define MB_IR_TACHO_1_VALUE_SIZE    1
+#define MB_HR_ADDR                  3900
+#define MB_HR_ADDR_SIZE             (4 / 2)
+#define MB_HR_NAME(x)               (x)
+
+#endif
+"""
+
+
+def load(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class GenerateRegistersTestCase(unittest.TestCase):
+    def setUp(self):
+        self.generator = load('generate_registers', os.path.join(TOOLS_PATH, 'generate_registers.py'))
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_read_header(self):
+        header = os.path.join(self.dir.name, 'mb_regs_configs.h')
+        with open(header, 'w') as fp:
+            fp.write(HEADER)
+
+        constants = self.generator.read_header(header)
+        self.assertEqual(1003, constants['MB_IR_GLOBAL_STATUS'])
+        self.assertEqual(1021, constants['MB_IR_TACHO_1_VALUE'])
+        self.assertEqual(2, constants['MB_HR_ADDR_SIZE'])
+        self.assertNotIn('MB_HR_NAME', constants)
+        self.assertNotIn('MB_REGS_CONFIGS_H', constants)
+
+    def test_generate(self):
+        header = os.path.join(self.dir.name, 'mb_regs_configs.h')
+        out = os.path.join(self.dir.name, 'sys_registers.py')
+        with open(header, 'w') as fp:
+            fp.write(HEADER)
+        self.generator.generate_registers_class(header, out)
+        generated = load('generated_sys_registers', out)
+
+        reg = generated.InputRegisters.GLOBAL_STATUS
+        self.assertEqual((1003, 4, 'R'), (reg.address, reg.size, reg.access_type))
+        self.assertEqual((3900, 4, 'RW'), (generated.HoldingRegisters.ADDR.address,
+                                           generated.HoldingRegisters.ADDR.size,
+                                           generated.HoldingRegisters.ADDR.access_type))
+
+        self.assertEqual((1000, 1003, 1021), generated.INPUT_ADDRESSES)
+        self.assertEqual('TACHO_1_VALUE', generated.INPUT_ADDRESS_TO_NAME[1021])
+        self.assertEqual(1003, generated.INPUT_NAME_TO_ADDRESS['GLOBAL_STATUS'])
+        self.assertEqual(((1000, 10, '<H4xI', ('FW_VERSION', 'GLOBAL_STATUS')),
+                          (1021, 2, '<H', ('TACHO_1_VALUE',))), generated.INPUT_READ_PLAN)
+        self.assertEqual(((3900, 4, '<I', ('ADDR',)),), generated.HOLDING_READ_PLAN)
+
+        plan = ReadPlan.from_table(generated.INPUT_READ_PLAN, generated.InputRegisters)
+        self.assertEqual([generated.InputRegisters.FW_VERSION, generated.InputRegisters.GLOBAL_STATUS],
+                         plan.blocks[0].registers)
+        self.assertFalse(generated.PARTIAL)
+
+    def test_partial(self):
+        header = os.path.join(self.dir.name, 'mb_regs_configs.h')
+        out = os.path.join(self.dir.name, 'sys_registers.py')
+        with open(header, 'w') as fp:
+            fp.write(HEADER)
+        self.generator.generate_registers_class(header, out, partial=True)
+        generated = load('generated_partial_sys_registers', out)
+
+        self.assertTrue(generated.PARTIAL)
+        self.assertIn('PARTIAL register map', generated.__doc__)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import queue
+import threading
+import unittest
+
+from leafapi.exceptions import LeafTimeoutException
+from leafapi.frame_parser import FrameParser
+from leafapi.pipeline import Pipeline
+from leafapi.request_message import ReadRegistersRequest, ReadRegistersResponse
+
+
+class ReorderingBus(object):
+    """ Echoes request packets back as responses, `hold` requests are answered in reverse order """
+
+    def __init__(self, hold=2):
+        self.hold = hold
+        self.parser = FrameParser()
+        self.held = []
+        self.rx_q = queue.Queue()
+
+    def write(self, data):
+        self.held += self.parser.feed(bytes(data))
+        if len(self.held) >= self.hold:
+            for frame in reversed(self.held):
+                self.rx_q.put(frame)
+            self.held = []
+
+    def read_frame(self, timeout=-1):
+        try:
+            return self.rx_q.get(timeout=timeout)
+        except queue.Empty:
+            raise LeafTimeoutException("Waiting for frame timeout!")
+
+
+class PipelineTestCase(unittest.TestCase):
+    def setUp(self):
+        self.bus = ReorderingBus()
+        self.pipeline = Pipeline(self.bus, window=2)
+
+    def tearDown(self):
+        self.pipeline.close()
+
+    def read(self, unit, results):
+        req = ReadRegistersRequest(mpu_addr=unit, register_addr=1000 + unit, data_len=4)
+        res = ReadRegistersResponse()
+        self.pipeline.execute(req, req.encode(), res, (-1, 5))
+        results[unit] = res
+
+    def test_out_of_order(self):
+        results = dict()
+        threads = [threading.Thread(target=self.read, args=(unit, results)) for unit in (1, 2)]
+        [t.start() for t in threads]
+        [t.join() for t in threads]
+
+        self.assertEqual(1001, results[1].register_addr)
+        self.assertEqual(1002, results[2].register_addr)
+        self.assertEqual(0, self.pipeline.in_flight)
+
+    def test_late_frame(self):
+        req = ReadRegistersRequest(mpu_addr=3, register_addr=1000, data_len=4)
+        self.assertRaises(LeafTimeoutException, self.pipeline.execute, req, req.encode(), ReadRegistersResponse(),
+                          (-1, 0.05))
+        self.bus.write(ReadRegistersRequest(mpu_addr=4, register_addr=1000, data_len=4).encode())
+
+        # the held response of unit 3 arrives with no request waiting for it
+        req = ReadRegistersRequest(mpu_addr=5, register_addr=1000, data_len=4)
+        res = ReadRegistersResponse()
+        self.bus.hold = 1
+        self.pipeline.execute(req, req.encode(), res, (-1, 5))
+        self.assertEqual(5, res.mpu_addr)
+        self.assertEqual(2, self.pipeline.late_frames)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import time
+import unittest
+
+from leafapi.exceptions import LeafTimeoutException
+from leafapi.poller import Poller
+from leafapi.request_message import ReadRegistersResponse
+
+
+class SlowClient(object):
+    """ Every read takes `duration` seconds, unit 9 does not answer """
+
+    def __init__(self, duration):
+        self.duration = duration
+        self.reads = []
+
+    def read_registers(self, unit, address, count, **kwargs):
+        time.sleep(self.duration)
+        self.reads.append((unit, address))
+        if unit == 9:
+            raise LeafTimeoutException("unit 9")
+        return ReadRegistersResponse(mpu_addr=unit, register_addr=address, data_len=count)
+
+
+class PollerTestCase(unittest.TestCase):
+    def test_rates_and_results(self):
+        client = SlowClient(0.001)
+        poller = Poller(client)
+        start_time = time.monotonic()
+        poller.add_range(1, 1000, 4, 0.02, name='sensors')
+        poller.add_range(1, 1100, 2, 10, name='fw')
+        poller.add_range(9, 1000, 4, 0.05, name='offline')
+
+        with poller:
+            time.sleep(0.3)
+
+        # wall clock rates vary under load, assert on the schedule instead of the deadlines met
+        stats = poller.stats()
+        elapsed = time.monotonic() - start_time
+        self.assertEqual([(1, 1000), (1, 1100), (9, 1000)], client.reads[:3])  # due at once, in order added
+        self.assertEqual(1, stats['fw']['polls'])
+        self.assertGreaterEqual(stats['sensors']['polls'], stats['offline']['polls'])
+        self.assertGreater(stats['offline']['errors'], 0)
+        # releases are at least a period apart, missed periods are not caught up
+        self.assertLessEqual(stats['sensors']['polls'], elapsed / 0.02 + 1)
+
+        results = []
+        while not poller.results.empty():
+            results.append(poller.results.get())
+        self.assertEqual(len(client.reads), len(results))
+        self.assertTrue(any(isinstance(res, LeafTimeoutException) for group, res in results))
+
+    def test_missed_deadlines(self):
+        callbacks = []
+        poller = Poller(SlowClient(0.03))
+        poller.add_range(1, 1000, 4, 0.01, callback=lambda group, res: callbacks.append(res), name='too_fast')
+
+        with poller:
+            time.sleep(0.2)
+
+        stats = poller.stats()['too_fast']
+        self.assertGreater(stats['missed'], 0)
+        self.assertLess(stats['achieved_rate'], 50)
+        self.assertEqual(stats['polls'], len(callbacks))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+
+from leafapi.exceptions import LeafTimeoutException, NoSuchSlaveException, ParameterException
+from leafapi.request_message import ReadRegistersResponse
+from tests.serial_bus import EchoBus, pty
+
+
+@unittest.skipIf(pty is None, "pty is not available")
+class ApiClientPoolTestCase(unittest.TestCase):
+    def setUp(self):
+        from leafapi.pool import ApiClientPool
+
+        self.buses = [EchoBus(), EchoBus()]
+        self.ports = [bus.port for bus in self.buses]
+        self.pool = ApiClientPool({range(0, 4): self.ports[0], (4, 6): self.ports[1], 9: self.ports[1]},
+                                  unit_health=False)
+
+    def tearDown(self):
+        self.pool.close()
+        for bus in self.buses:
+            bus.close()
+
+    def test_routes(self):
+        self.assertEqual(self.ports[0], self.pool.port_of(3))
+        self.assertEqual(self.ports[1], self.pool.port_of(4))
+        self.assertEqual(self.ports[1], self.pool.port_of(6))
+        self.assertEqual(self.ports[1], self.pool.port_of(9))
+        self.assertEqual(2, len(self.pool.clients))
+
+        for unit in (7, 8, -1, 256):
+            self.assertRaises(NoSuchSlaveException, self.pool.port_of, unit)
+        self.assertRaises(NoSuchSlaveException, self.pool.read_registers, 7, 1000, 2)
+
+        res = self.pool.read_registers(5, 1000, 4, timeout=(1, 1))
+        self.assertEqual((5, 1000, 4), (res.mpu_addr, res.register_addr, res.data_len))
+        self.assertEqual([], self.buses[0].requests)
+        self.assertEqual(1, len(self.buses[1].requests))
+
+    def test_invalid_route(self):
+        from leafapi.pool import ApiClientPool
+
+        for routes in ({256: self.ports[0]}, {(250, 260): self.ports[0]}, {range(-1, 2): self.ports[0]}):
+            self.assertRaises(ParameterException, ApiClientPool, routes)
+
+    def test_port_stats(self):
+        self.buses[0].silent.add(2)
+        self.pool.read_registers(1, 1000, 2, timeout=(1, 1))
+        self.pool.write_registers(9, 4000, 2, data=b'\x01\x02', timeout=(1, 1))
+        self.assertRaises(LeafTimeoutException, self.pool.read_registers, 2, 1000, 2, timeout=(1, 0.1))
+
+        stats = self.pool.port_stats()
+        self.assertEqual({'requests': 2, 'errors': 1, 'timeouts': 1},
+                         {key: stats[self.ports[0]][key] for key in ('requests', 'errors', 'timeouts')})
+        self.assertEqual({'requests': 1, 'errors': 0, 'timeouts': 0},
+                         {key: stats[self.ports[1]][key] for key in ('requests', 'errors', 'timeouts')})
+        self.assertGreater(stats[self.ports[0]]['busy_time'], 0.1)
+
+    def test_read_many(self):
+        self.buses[1].silent.add(6)
+        requests = [(0, 1000, 2), (4, 1002, 4), (7, 1000, 2), (6, 1000, 2), (3, 1004, 2)]
+        results = self.pool.read_many(requests, timeout=(1, 0.2))
+
+        for (unit, address, count), res in zip(requests, results):
+            if unit in (0, 3, 4):
+                self.assertIsInstance(res, ReadRegistersResponse)
+                self.assertEqual((unit, address, count), (res.mpu_addr, res.register_addr, res.data_len))
+        self.assertIsInstance(results[2], NoSuchSlaveException)
+        self.assertIsInstance(results[3], LeafTimeoutException)
+        self.assertEqual(2, len(self.buses[0].requests))
+        self.assertEqual(2, len(self.buses[1].requests))
+
+    def test_close_drops_shared_interface(self):
+        from leafapi.pool import ApiClientPool
+        from leafapi.serial_protocol import SerialProtocolInterface
+
+        sp = self.pool.clients[self.ports[0]]._sp
+        self.assertIs(sp, SerialProtocolInterface.__shared_instances__[self.ports[0]])
+
+        self.pool.close()
+        self.assertNotIn(self.ports[0], SerialProtocolInterface.__shared_instances__)
+        self.assertNotIn(self.ports[1], SerialProtocolInterface.__shared_instances__)
+
+        # a new pool opens the port again instead of getting the closed interface
+        self.pool = ApiClientPool({1: self.ports[0]}, unit_health=False)
+        self.assertIsNot(sp, self.pool.clients[self.ports[0]]._sp)
+        res = self.pool.read_registers(1, 1000, 2, timeout=(1, 1))
+        self.assertEqual(1, res.mpu_addr)
+
+
+if __name__ == '__main__':
+    unittest.main()
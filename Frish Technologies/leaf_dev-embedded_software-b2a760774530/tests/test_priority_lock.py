@@ -0,0 +1,63 @@
+import threading
+import time
+import unittest
+
+from leafapi.priority_lock import PriorityLock, PRIORITY_CONTROL, PRIORITY_NORMAL, PRIORITY_BACKGROUND
+
+
+class PriorityLockTestCase(unittest.TestCase):
+    def start_waiters(self, lock, priorities, order, first=0):
+        threads = []
+        for i, priority in enumerate(priorities, first):
+            def waiter(i=i, priority=priority):
+                lock.acquire(priority)
+                order.append(i)
+                lock.release()
+            t = threading.Thread(target=waiter)
+            t.start()
+            threads.append(t)
+            # keep the arrival order
+            while len(lock._waiters) < i + 1:
+                time.sleep(0.001)
+        return threads
+
+    def test_priority_order(self):
+        lock = PriorityLock(aging=0)
+        order = []
+        lock.acquire()
+        threads = self.start_waiters(lock, [PRIORITY_BACKGROUND, PRIORITY_NORMAL, PRIORITY_CONTROL,
+                                            PRIORITY_NORMAL], order)
+        lock.release()
+        for t in threads:
+            t.join()
+
+        self.assertEqual([2, 1, 3, 0], order)
+        stats = lock.wait_stats()
+        self.assertEqual(3, stats['normal']['count'])  # with the first acquire
+        self.assertGreater(stats['background']['max'], stats['control']['max'])
+
+    def test_aging(self):
+        lock = PriorityLock(aging=0.01)
+        order = []
+        lock.acquire()
+        threads = self.start_waiters(lock, [PRIORITY_BACKGROUND], order)
+        time.sleep(0.05)
+        threads += self.start_waiters(lock, [PRIORITY_CONTROL], order, first=1)
+        lock.release()
+        for t in threads:
+            t.join()
+
+        self.assertEqual([0, 1], order)
+
+    def test_timeout(self):
+        lock = PriorityLock()
+        lock.acquire()
+        self.assertFalse(lock.acquire(PRIORITY_CONTROL, timeout=0.01))
+        self.assertEqual([], lock._waiters)
+        lock.release()
+        self.assertFalse(lock.locked())
+        self.assertTrue(lock.acquire(timeout=0))
+
+
+if __name__ == '__main__':
+    unittest.main()
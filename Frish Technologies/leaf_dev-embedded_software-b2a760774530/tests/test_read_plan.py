@@ -0,0 +1,72 @@
+import struct
+import unittest
+
+from leafapi.request_message import ReadRegistersResponse
+from registers.read_plan import ReadPlan
+from registers.register import Register, R
+
+
+class MemoryClient(object):
+    """ Serves reads from a register address -> 16 bit value map """
+
+    def __init__(self, memory):
+        self.memory = memory
+        self.requests = []
+
+    def read_registers(self, unit, address, count, **kwargs):
+        self.requests.append((unit, address, count))
+        data = b''.join(struct.pack('<H', self.memory.get(address + i, 0)) for i in range(count // 2))
+        return ReadRegistersResponse(mpu_addr=unit, register_addr=address, data_len=count, data=data)
+
+
+def reg(name, address, size, is_signed=False):
+    return Register(name=name, address=address, size=size, access_type=R, value=0, is_signed=is_signed)
+
+
+class ReadPlanTestCase(unittest.TestCase):
+    def test_merge_blocks(self):
+        regs = [reg('C', 1010, 2), reg('A', 1000, 2), reg('B', 1003, 4), reg('D', 2000, 2)]
+        plan = ReadPlan(regs, max_gap=4)
+        self.assertEqual([(1000, 10), (1010, 2), (2000, 2)], [(b.address, b.count) for b in plan.blocks])
+        self.assertEqual(['A', 'B'], [r.name for r in plan.blocks[0].registers])
+
+        plan = ReadPlan(regs, max_gap=6)
+        self.assertEqual([(1000, 22), (2000, 2)], [(b.address, b.count) for b in plan.blocks])
+
+    def test_max_size(self):
+        regs = [reg('R{}'.format(i), 1000 + i, 2) for i in range(10)]
+        plan = ReadPlan(regs, max_size=8)
+        self.assertEqual([(1000, 8), (1004, 8), (1008, 4)], [(b.address, b.count) for b in plan.blocks])
+
+    def test_execute(self):
+        regs = [reg('A', 1000, 2), reg('B', 1003, 4), reg('C', 1008, 2, is_signed=True)]
+        client = MemoryClient({1000: 7, 1003: 0x5678, 1004: 0x1234, 1008: 0xffff})
+
+        values = ReadPlan(regs).execute(client, 3)
+        self.assertEqual([(3, 1000, 18)], client.requests)
+        self.assertEqual({'A': 7, 'B': 0x12345678, 'C': -1}, values)
+        # the registers are shared by every unit, their values are not touched
+        self.assertEqual([0, 0, 0], [r.value for r in regs])
+
+    def test_from_table(self):
+        class Regs:
+            A = reg('A', 1000, 2)
+            B = reg('B', 1003, 4)
+            C = reg('C', 1010, 4)
+            D = reg('D', 1011, 2)
+
+        # the table format of B is signed, the registers are not: decoding must use the table literal
+        table = ((1000, 10, '<H4xi', ('A', 'B')), (1010, 6, None, ('C', 'D')))
+        plan = ReadPlan.from_table(table, Regs)
+        self.assertEqual([(1000, 10), (1010, 6)], [(b.address, b.count) for b in plan.blocks])
+        self.assertEqual('<H4xi', plan.blocks[0].codec.struct.format)
+        self.assertIsNone(plan.blocks[1].codec)
+
+        client = MemoryClient({1000: 7, 1003: 0xffff, 1004: 0xffff, 1010: 1, 1011: 2, 1012: 3})
+        self.assertEqual({'A': 7, 'B': -1, 'C': 0x20001, 'D': 2}, plan.execute(client, 1))
+        self.assertEqual([(1, 1000, 10), (1, 1010, 6)], client.requests)
+        self.assertEqual([0, 0, 0, 0], [Regs.A.value, Regs.B.value, Regs.C.value, Regs.D.value])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import struct
+import unittest
+
+from registers.register import Register, R
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def reg(name, address, size, is_signed=False):
+    return Register(name=name, address=address, size=size, access_type=R, value=0, is_signed=is_signed)
+
+
+def block(fw, status, tacho):
+    return struct.pack('<H4xIh', fw, status, tacho)
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class RegisterBankTestCase(unittest.TestCase):
+    def setUp(self):
+        from registers.register_bank import RegisterBank
+
+        self.regs = [reg('FW_VERSION', 1000, 2), reg('GLOBAL_STATUS', 1003, 4), reg('TACHO', 1005, 2, True)]
+        self.bank = RegisterBank(self.regs, units=[1, 2, 7], history=3)
+
+    def test_dtype_and_view(self):
+        self.assertEqual(1000, self.bank.address)
+        self.assertEqual(12, self.bank.count)
+        data = block(0x102, 0x12345678, -5)
+        record = self.bank.view(data)
+        self.assertEqual((0x102, 0x12345678, -5), (record['FW_VERSION'], record['GLOBAL_STATUS'], record['TACHO']))
+
+    def test_history(self):
+        for i in range(5):
+            self.bank.store(2, block(1, i, -i), timestamp=i)
+        self.assertEqual([2, 3, 4], list(self.bank.history(2)['GLOBAL_STATUS']))
+        self.assertEqual(-4, self.bank.latest(2)['TACHO'])
+        self.assertEqual(0, len(self.bank.history(1)))
+        self.assertIsNone(self.bank.latest(1))
+
+    def test_store_many(self):
+        self.bank.store_many([7, 1], [block(7, 70, 0), block(1, 10, 0)], timestamp=1.0)
+        self.bank.store_many([7], block(7, 71, 0), timestamp=2.0)
+        self.assertEqual([70, 71], list(self.bank.history(7)['GLOBAL_STATUS']))
+        self.assertEqual([10], list(self.bank.history(1)['GLOBAL_STATUS']))
+        self.assertEqual([1.0, 2.0], list(self.bank.timestamps[2, :2]))
+
+
+if __name__ == '__main__':
+    unittest.main()
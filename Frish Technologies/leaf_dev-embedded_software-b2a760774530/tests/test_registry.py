@@ -0,0 +1,54 @@
+import struct
+import unittest
+
+from leafapi.exceptions import ParameterException
+from leafapi.request_message import ReadRegistersResponse
+from registers.register import Register, R, RW
+from registers.registry import RegisterRegistry
+
+
+class InputRegisters:
+    FW_VERSION = Register(name='FW_VERSION', address=1000, size=2, access_type=R)
+    GLOBAL_STATUS = Register(name='GLOBAL_STATUS', address=1003, size=4, access_type=R)
+    TACHO_1_VALUE = Register(name='TACHO_1_VALUE', address=1005, size=2, access_type=R, is_signed=True)
+
+
+class HoldingRegisters:
+    ADDR = Register(name='ADDR', address=3900, size=2, access_type=RW)
+
+
+class RegisterRegistryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.registry = RegisterRegistry.from_classes(InputRegisters, HoldingRegisters)
+
+    def test_lookup(self):
+        self.assertEqual(4, len(self.registry))
+        self.assertIs(InputRegisters.GLOBAL_STATUS, self.registry.get('GLOBAL_STATUS'))
+        self.assertIs(HoldingRegisters.ADDR, self.registry.at(3900))
+        self.assertIsNone(self.registry.at(1004))
+        with self.assertRaises(ParameterException):
+            self.registry.add(Register(name='ADDR', address=3901, size=2, access_type=RW))
+
+    def test_overlapping(self):
+        def names(regs):
+            return [reg.name for reg in regs]
+
+        self.assertEqual(['GLOBAL_STATUS'], names(self.registry.overlapping(1004, 2)))
+        self.assertEqual(['FW_VERSION', 'GLOBAL_STATUS'], names(self.registry.overlapping(1000, 8)))
+        self.assertEqual([], names(self.registry.overlapping(1001, 4)))
+        self.assertEqual(['FW_VERSION'], names(self.registry.inside(1000, 8)))
+
+    def test_decode(self):
+        data = struct.pack('<H4xIh', 7, 0x12345678, -3)
+        res = ReadRegistersResponse(mpu_addr=1, register_addr=1000, data_len=len(data), data=data)
+        expected = {'FW_VERSION': 7, 'GLOBAL_STATUS': 0x12345678, 'TACHO_1_VALUE': -3}
+        self.assertEqual(expected, self.registry.decode(res))
+        self.assertEqual(expected, self.registry.decode(res))  # cached layout
+        self.assertIsNone(InputRegisters.FW_VERSION.value)
+
+        res = ReadRegistersResponse(mpu_addr=1, register_addr=1003, data_len=4, data=data[6:10])
+        self.assertEqual({'GLOBAL_STATUS': 0x12345678}, self.registry.decode(res))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,9 +2,10 @@ import unittest
 from unittest.mock import patch
 
 import leafapi.leaf_sys.serial_protocol as sp
+from leafapi.codec import codecs
 from leafapi.exceptions import InvalidMessageCreationException
 from leafapi.leaf_sys.serial_protocol import FRAME_PAYLOAD_SIZE
-from leafapi.pdu import ApiRequest, ApiResponse
+from leafapi.pdu import ApiRequest, ApiResponse, frame_cache_info, frame_cache_clear
 from leafapi.request_message import ReadRegistersRequest, \
     ReadRegistersResponse, WriteRegistersRequest, WriteRegistersResponse
 
@@ -18,20 +19,71 @@ class ApiRequestTestCase(unittest.TestCase):
 
         read_req = ApiRequest(mpu_addr=0x05, register_addr=1000, data_len=FRAME_PAYLOAD_SIZE + 1)
         read_req.r_type = sp.SP_PKG_TYPE_REQW
-        self.assertRaises(InvalidMessageCreationException, read_req.encode, sp.cvar.tr_frame)
+        self.assertRaises(InvalidMessageCreationException, read_req.encode, sp.sp_tr_frame())
+
+
+class FrameCacheTestCase(unittest.TestCase):
+    """ Every codec encodes into a buffer from the frame template cache """
+
+    def setUp(self):
+        frame_cache_clear()
+
+    def test_cache_hits(self):
+        for codec in codecs:
+            with self.subTest(codec=codec):
+                frame_cache_clear()
+                buffer = bytearray(32)
+                for i in range(3):
+                    read_req = ReadRegistersRequest(mpu_addr=0x05, register_addr=1000, data_len=4, codec=codec)
+                    size = read_req.encode_into(buffer)
+                    self.assertEqual(REQR_EXAMPLE, buffer[:size])
+                self.assertEqual(2, frame_cache_info()['hits'])
+                self.assertEqual(1, frame_cache_info()['misses'])
+
+    def test_write_template(self):
+        for codec in codecs:
+            with self.subTest(codec=codec):
+                frame_cache_clear()
+                buffer = bytearray(32)
+                write_req = WriteRegistersRequest(mpu_addr=0x05, register_addr=1000, data_len=4,
+                                                  data=b'\x00\x00\x00\x00', codec=codec)
+                write_req.encode_into(buffer)
+
+                write_req = WriteRegistersRequest(mpu_addr=0x05, register_addr=1000, data_len=4,
+                                                  data=b'\x01\x02\x03\x04', codec=codec)
+                size = write_req.encode_into(buffer)
+                self.assertEqual(WriteRegistersRequestTestCase.REQW_EXAMPLE, buffer[:size])
+                self.assertEqual(1, frame_cache_info()['hits'])
 
 
 class ReadRegistersRequestTestCase(unittest.TestCase):
     def test_encode(self):
         read_req = ReadRegistersRequest(mpu_addr=0x05, register_addr=1000, data_len=4)
-        self.assertEqual(REQR_EXAMPLE, read_req.encode(sp.cvar.tr_frame))
+        self.assertEqual(REQR_EXAMPLE, read_req.encode(sp.sp_tr_frame()))
+
+    def test_encode_own_frame(self):
+        read_req = ReadRegistersRequest(mpu_addr=0x05, register_addr=1000, data_len=4)
+        write_req = WriteRegistersRequest(mpu_addr=0x05, register_addr=1000, data_len=4, data=b'\x01\x02\x03\x04')
+        read_frame = read_req.encode()
+        write_req.encode()
+        self.assertEqual(REQR_EXAMPLE, read_frame)
+        self.assertEqual(REQR_EXAMPLE, read_req.encode())
+
+    def test_encode_into(self):
+        read_req = ReadRegistersRequest(mpu_addr=0x05, register_addr=1000, data_len=4)
+        buffer = bytearray(32)
+        self.assertEqual(len(REQR_EXAMPLE), read_req.encode_into(buffer, 3))
+        self.assertEqual(REQR_EXAMPLE, buffer[3:3 + len(REQR_EXAMPLE)])
+        self.assertEqual(len(REQR_EXAMPLE), read_req.frame_size())
+
+        self.assertRaises(InvalidMessageCreationException, read_req.encode_into, bytearray(len(REQR_EXAMPLE) - 1))
 
 
 class ApiResponseTestCase(unittest.TestCase):
     def test_decode_reqw_res(self):
         res = ApiResponse()
 
-        tr_frame = sp.cvar.tr_frame
+        tr_frame = sp.sp_tr_frame()
         packet = sp.sp_packet_format()
         packet.type = sp.SP_PKG_TYPE_REQW
         packet.mpu_addr = 2
@@ -52,7 +104,7 @@ class ApiResponseTestCase(unittest.TestCase):
     def test_decode_res_error(self):
         res = ApiResponse()
 
-        tr_frame = sp.cvar.tr_frame
+        tr_frame = sp.sp_tr_frame()
         packet = sp.sp_packet_format()
         packet.type = sp.SP_PKG_TYPE_REQW | sp.SP_PKG_TYPE_ERROR_FLAG
         packet.mpu_addr = 2
@@ -70,12 +122,28 @@ class ApiResponseTestCase(unittest.TestCase):
         self.assertEqual(sp.SP_ERROR_UNKNOWN, res.error_code)
         self.assertTrue(res.is_error())
 
+    def test_decode_bytes(self):
+        res = ApiResponse()
+        res.decode(WriteRegistersRequestTestCase.REQW_EXAMPLE[4:-2])
+        self.assertEqual(sp.SP_PKG_TYPE_REQW, res.r_type)
+        self.assertEqual(5, res.mpu_addr)
+        self.assertEqual(1000, res.register_addr)
+        self.assertEqual(4, res.data_len)
+        self.assertEqual(b'\x01\x02\x03\x04', res.data)
+        self.assertEqual(sp.SP_ERROR_OK, res.error_code)
+
+        res = ApiResponse()
+        res.decode(bytes((sp.SP_PKG_TYPE_REQW | sp.SP_PKG_TYPE_ERROR_FLAG, 2, 0x34, 0x12, 1, 0, sp.SP_ERROR_UNKNOWN)))
+        self.assertEqual(0x1234, res.register_addr)
+        self.assertEqual(sp.SP_ERROR_UNKNOWN, res.error_code)
+        self.assertTrue(res.is_error())
+
 
 class ReadRegistersResponseTestCase(unittest.TestCase):
     def test_decode_reqr_res(self):
         res = ReadRegistersResponse()
 
-        tr_frame = sp.cvar.tr_frame
+        tr_frame = sp.sp_tr_frame()
         packet = sp.sp_packet_format()
         packet.type = sp.SP_PKG_TYPE_REQR
         packet.mpu_addr = 2
@@ -101,13 +169,23 @@ class WriteRegistersRequestTestCase(unittest.TestCase):
 
     def test_encode(self):
         read_req = WriteRegistersRequest(mpu_addr=0x05, register_addr=1000, data_len=4, data=b'\x01\x02\x03\x04')
-        self.assertEqual(self.REQW_EXAMPLE, read_req.encode(sp.cvar.tr_frame))
+        self.assertEqual(self.REQW_EXAMPLE, read_req.encode(sp.sp_tr_frame()))
+
+    def test_encode_into(self):
+        write_req = WriteRegistersRequest(mpu_addr=0x05, register_addr=1000, data_len=4, data=b'\x01\x02\x03\x04')
+        buffer = bytearray(len(self.REQW_EXAMPLE))
+        self.assertEqual(len(self.REQW_EXAMPLE), write_req.encode_into(memoryview(buffer)))
+        self.assertEqual(self.REQW_EXAMPLE, buffer)
+
+    def test_encode_into_not_valid_length(self):
+        write_req = WriteRegistersRequest(mpu_addr=0x05, register_addr=1000, data_len=FRAME_PAYLOAD_SIZE + 1)
+        self.assertRaises(InvalidMessageCreationException, write_req.encode_into, bytearray(FRAME_PAYLOAD_SIZE * 2))
 
 
 class WriteRegistersResponseTestCase(unittest.TestCase):
 
     def test_decode_reqw_res(self):
-        tr_frame = sp.cvar.tr_frame
+        tr_frame = sp.sp_tr_frame()
         packet = sp.sp_packet_format()
         packet.type = sp.SP_PKG_TYPE_REQW
         packet.mpu_addr = 2
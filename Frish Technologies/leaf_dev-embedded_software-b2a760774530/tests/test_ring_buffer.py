@@ -0,0 +1,46 @@
+import threading
+import unittest
+
+from leafapi.ring_buffer import RingBuffer
+
+
+class RingBufferTestCase(unittest.TestCase):
+    def test_read_chunks(self):
+        rb = RingBuffer(8)
+        self.assertEqual(3, rb.write(b"\x01\x02\x03"))
+        self.assertEqual(2, rb.write(b"\x04\x05"))
+        self.assertEqual(5, len(rb))
+        self.assertEqual(b"\x01\x02\x03\x04\x05", rb.read(timeout=0))
+        self.assertEqual(0, len(rb))
+
+    def test_wrap_around(self):
+        rb = RingBuffer(8)
+        rb.write(b"123456")
+        self.assertEqual(b"123456", rb.read(timeout=0))
+        rb.write(b"abcdef")
+        self.assertEqual(b"abcdef", rb.read(timeout=0))
+
+    def test_overflow(self):
+        rb = RingBuffer(4)
+        self.assertEqual(4, rb.write(b"123456"))
+        self.assertEqual(1, rb.overflows)
+        self.assertEqual(2, rb.dropped)
+        self.assertEqual(0, rb.write(b"7"))
+        self.assertEqual(2, rb.overflows)
+        self.assertEqual(3, rb.dropped)
+        self.assertEqual(b"1234", rb.read(timeout=0))
+
+    def test_read_timeout(self):
+        rb = RingBuffer(4)
+        self.assertEqual(b"", rb.read(timeout=0.01))
+
+    def test_read_wakeup(self):
+        rb = RingBuffer(4)
+        t = threading.Timer(0.01, rb.write, args=(b"\xaa",))
+        t.start()
+        self.assertEqual(b"\xaa", rb.read(timeout=5))
+        t.join()
+
+
+if __name__ == '__main__':
+    unittest.main()
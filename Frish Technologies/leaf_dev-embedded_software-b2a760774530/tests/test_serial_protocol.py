@@ -0,0 +1,39 @@
+import time
+import unittest
+
+from leafapi.exceptions import LeafIOException, LeafTimeoutException
+from tests.serial_bus import EchoBus, pty
+
+
+@unittest.skipIf(pty is None, "pty is not available")
+class SerialProtocolInterfaceTestCase(unittest.TestCase):
+    def setUp(self):
+        from leafapi.serial_protocol import SerialProtocolInterface
+
+        self.bus = EchoBus()
+        self.sp = SerialProtocolInterface(serial_port=self.bus.port)
+
+    def tearDown(self):
+        self.sp.close()
+        self.bus.close()
+
+    def test_close(self):
+        self.assertRaises(LeafTimeoutException, self.sp.read_frame, timeout=0.05)
+        self.sp.close()
+        self.assertFalse(self.sp.rx_thread.is_alive())
+        self.assertIsNone(self.sp.rx_error)
+
+    def test_port_error(self):
+        self.bus.unplug()
+        start_time = time.monotonic()
+        self.assertRaises(LeafIOException, self.sp.read_frame, timeout=2)
+        self.assertLess(time.monotonic() - start_time, 1)
+
+        self.sp.rx_thread.join(1)
+        self.assertFalse(self.sp.rx_thread.is_alive())
+        self.assertIsNotNone(self.sp.rx_error)
+        self.assertRaises(LeafIOException, self.sp.read_frame, timeout=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
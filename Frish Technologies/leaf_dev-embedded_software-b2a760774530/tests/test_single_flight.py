@@ -0,0 +1,79 @@
+import threading
+import unittest
+
+from leafapi.exceptions import LeafTimeoutException, LeafIOException
+from leafapi.single_flight import SingleFlight
+
+
+class SingleFlightTestCase(unittest.TestCase):
+    @staticmethod
+    def wait_joined(flight, key, count):
+        while key not in flight._calls or flight._calls[key].joined < count:
+            threading.Event().wait(0.001)
+
+    def run_callers(self, flight, key, fn, count, timeout=None):
+        results = [None] * count
+        started = threading.Barrier(count + 1)
+
+        def caller(i):
+            started.wait()
+            try:
+                results[i] = flight.do(key, fn, timeout)
+            except Exception as ex:
+                results[i] = ex
+
+        threads = [threading.Thread(target=caller, args=(i,)) for i in range(count)]
+        for t in threads:
+            t.start()
+        return results, threads, started
+
+    def test_join(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            release.wait(5)
+            return object()
+
+        results, threads, started = self.run_callers(flight, (1, 1000, 4), fn, 4)
+        started.wait()
+        self.wait_joined(flight, (1, 1000, 4), 3)
+        # counted once the joined callers get the result
+        self.assertEqual(0, flight.saved)
+        release.set()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(3, flight.saved)
+        self.assertEqual(1, len(calls))
+        self.assertEqual(1, len(set(id(r) for r in results)))
+        # the key is free again
+        self.assertEqual(5, flight.do((1, 1000, 4), lambda: 5))
+
+    def test_shared_exception_and_timeout(self):
+        flight = SingleFlight()
+        release = threading.Event()
+
+        def fn():
+            release.wait(5)
+            raise LeafIOException("bus")
+
+        results, threads, started = self.run_callers(flight, 'key', fn, 2)
+        started.wait()
+        self.wait_joined(flight, 'key', 1)
+        with self.assertRaises(LeafTimeoutException):
+            flight.do('key', fn, timeout=0.01)
+        release.set()
+        for t in threads:
+            t.join()
+
+        self.assertIsInstance(results[0], LeafIOException)
+        self.assertIs(results[0], results[1])
+        # neither the failed nor the timed out joins saved a call
+        self.assertEqual(0, flight.saved)
+
+
+if __name__ == '__main__':
+    unittest.main()
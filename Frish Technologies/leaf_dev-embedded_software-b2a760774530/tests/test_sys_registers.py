@@ -1,53 +1,84 @@
+import gc
 import unittest
-import leafapi.leaf_sys.mb_data as mb_data
+
+import registers.sys_registers as sys_registers
+from registers.read_plan import ReadPlan
 from registers.sys_registers import InputRegisters, HoldingRegisters
-from registers.register import Register, R, RW
+from registers.register import Register, RegisterBase, R, RW
+
+try:
+    import leafapi.leaf_sys.mb_data as mb_data
+except ImportError:
+    mb_data = None
+
+
+def registers_of(cls) -> list:
+    return [val for val in vars(cls).values() if isinstance(val, RegisterBase)]
 
 
 class RegistersDescriptionTestCase(unittest.TestCase):
     def test_InputRegisters(self):
         reg = InputRegisters.FW_VERSION
         self.assertEqual(reg.name, "FW_VERSION")
-        self.assertEqual(reg.size, mb_data.MB_IR_FW_VERSION_SIZE * 2)
         self.assertEqual(reg.size, 2)
-        self.assertEqual(reg.address, mb_data.MB_IR_FW_VERSION)
         self.assertEqual(reg.address, 1000)
         self.assertEqual(reg.access_type, R)
 
         reg = InputRegisters.GLOBAL_STATUS
         self.assertEqual(reg.name, "GLOBAL_STATUS")
-        self.assertEqual(reg.size, mb_data.MB_IR_GLOBAL_STATUS_SIZE * 2)
         self.assertEqual(reg.size, 4)
-        self.assertEqual(reg.address, mb_data.MB_IR_GLOBAL_STATUS)
         self.assertEqual(reg.address, 1003)
         self.assertEqual(reg.access_type, R)
 
         reg = InputRegisters.TACHO_15_VALUE
         self.assertEqual(reg.name, "TACHO_15_VALUE")
-        self.assertEqual(reg.size, mb_data.MB_IR_TACHO_15_VALUE_SIZE * 2)
         self.assertEqual(reg.size, 2)
-        self.assertEqual(reg.address, mb_data.MB_IR_TACHO_15_VALUE)
         self.assertEqual(reg.address, 1033)
         self.assertEqual(reg.access_type, R)
 
     def test_HoldingRegisters(self):
         reg = HoldingRegisters.ADDR
         self.assertEqual(reg.name, "ADDR")
-        self.assertEqual(reg.size, mb_data.MB_HR_ADDR_SIZE * 2)
         self.assertEqual(reg.size, 2)
-        self.assertEqual(reg.address, mb_data.MB_HR_ADDR)
         self.assertEqual(reg.address, 3900)
         self.assertEqual(reg.access_type, RW)
 
         reg = HoldingRegisters.PWM_15_DUTY_CYCLE
         self.assertEqual(reg.name, "PWM_15_DUTY_CYCLE")
-        self.assertEqual(reg.size, mb_data.MB_HR_PWM_15_DUTY_CYCLE_SIZE * 2)
         self.assertEqual(reg.size, 2)
-        self.assertEqual(reg.address, mb_data.MB_HR_PWM_15_DUTY_CYCLE)
         self.assertEqual(reg.address, 4057)
         self.assertEqual(reg.access_type, RW)
 
 
+@unittest.skipIf(mb_data is None, "SWIG mb_data module is not built")
+class MbDataTestCase(unittest.TestCase):
+    def test_generated_from_mb_data(self):
+        for prefix, cls in (('MB_IR_', InputRegisters), ('MB_HR_', HoldingRegisters)):
+            for reg in registers_of(cls):
+                self.assertEqual(getattr(mb_data, prefix + reg.name), reg.address)
+                self.assertEqual(getattr(mb_data, prefix + reg.name + '_SIZE') * 2, reg.size)
+
+
+class RegisterTablesTestCase(unittest.TestCase):
+    def test_tables(self):
+        for prefix, cls in (('INPUT', InputRegisters), ('HOLDING', HoldingRegisters)):
+            regs = sorted(registers_of(cls), key=lambda r: r.address)
+            self.assertEqual(tuple(reg.address for reg in regs), getattr(sys_registers, prefix + '_ADDRESSES'))
+            self.assertEqual(tuple(reg.name for reg in regs), getattr(sys_registers, prefix + '_NAMES'))
+            self.assertEqual({reg.name: reg.address for reg in regs},
+                             getattr(sys_registers, prefix + '_NAME_TO_ADDRESS'))
+            self.assertEqual({reg.address: reg.name for reg in regs},
+                             getattr(sys_registers, prefix + '_ADDRESS_TO_NAME'))
+
+    def test_read_plans(self):
+        for prefix, cls in (('INPUT', InputRegisters), ('HOLDING', HoldingRegisters)):
+            planned = ReadPlan(registers_of(cls)).blocks
+            table = ReadPlan.from_table(getattr(sys_registers, prefix + '_READ_PLAN'), cls).blocks
+            self.assertEqual([(b.address, b.count, b.registers, b.codec.struct.format) for b in planned],
+                             [(b.address, b.count, b.registers, b.codec.struct.format) for b in table])
+        self.assertEqual((1000, 10, '<H4xI', ('FW_VERSION', 'GLOBAL_STATUS')), sys_registers.INPUT_READ_PLAN[0])
+
+
 class RegisterDescriptionTestCase(unittest.TestCase):
     def test_encode(self):
         reg = Register(name="REG1", address=1, size=1, access_type=R, value=0x01)
@@ -99,6 +130,68 @@ class RegisterDescriptionTestCase(unittest.TestCase):
         reg.decode(b"\xfd\xff\xff\xff")
         self.assertEqual(-3, reg.value)
 
+    def test_eq_hash(self):
+        reg = Register(name="REG1", address=1, size=2, access_type=R, value=1, unit=2)
+        other = Register(name="REG1", address=1, size=2, access_type=R, value=1, unit=2)
+        self.assertIs(reg.descriptor, other.descriptor)
+        self.assertEqual(reg, other)
+        self.assertEqual(hash(reg), hash(other))
+
+        other.value = 2
+        self.assertNotEqual(reg, other)
+        self.assertNotEqual(reg, Register(name="REG1", address=1, size=2, access_type=R, value=1, unit=2,
+                                          is_signed=True))
+
+    def test_to_from_dict(self):
+        reg = Register(name="REG1", address=1, size=2, access_type=RW, value=1, unit=2, is_signed=True)
+        d = reg.to_dict()
+        self.assertEqual({'name': "REG1", 'address': 1, 'size': 2, 'access_type': RW, 'value': 1, 'unit': 2,
+                          'is_signed': True}, d)
+        self.assertEqual(reg, Register.from_dict(d))
+        d['_encode_frm'] = '<h'
+        self.assertEqual(reg, Register.from_dict(d))
+
+        # a format set apart from size and is_signed is kept
+        reg = Register(name="REG1", address=1, size=4, access_type=R, value=-1)
+        reg._encode_frm = '<hxx'
+        d = reg.to_dict()
+        self.assertEqual('<hxx', d['_encode_frm'])
+        self.assertEqual(reg, Register.from_dict(d))
+        self.assertEqual(b'\xff\xff\x00\x00', Register.from_dict(d).encode())
+
+    def test_descriptor_immutable(self):
+        reg = Register(name="REG1", address=1, size=2, access_type=R)
+        with self.assertRaises(AttributeError):
+            reg.descriptor.address = 2
+        copy = Register.from_descriptor(reg.descriptor, value=5, unit=3)
+        self.assertEqual((1, 5, 3), (copy.address, copy.value, copy.unit))
+
+    def test_set_fields(self):
+        reg = Register(name="REG1", address=1, size=2, access_type=R, value=-2)
+        other = Register.from_descriptor(reg.descriptor)
+
+        reg.address = 2
+        reg.name = "REG2"
+        self.assertEqual((2, "REG2"), (reg.address, reg.name))
+        self.assertIs(Register(name="REG2", address=2, size=2, access_type=R).descriptor, reg.descriptor)
+        self.assertEqual((1, "REG1"), (other.address, other.name))
+
+        reg.is_signed = True
+        self.assertEqual('<H', reg._encode_frm)
+        reg.update_frm()
+        self.assertEqual('<h', reg._encode_frm)
+        self.assertEqual(b"\xfe\xff", reg.encode())
+
+    def test_descriptors_released(self):
+        from registers import register
+
+        reg = Register(name="UNUSED", address=1, size=2, access_type=R)
+        key = ("UNUSED", 1, 2, R, False, '<H')
+        self.assertIs(reg.descriptor, register._descriptors[key])
+        del reg
+        gc.collect()
+        self.assertNotIn(key, register._descriptors)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+from unittest import mock
+
+from leafapi.exceptions import UnitUnavailableException
+from leafapi.unit_health import UnitHealthMonitor, STATE_CLOSED, STATE_OPEN, STATE_HALF_OPEN
+
+
+class UnitHealthMonitorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.now = 100.0
+        patcher = mock.patch('leafapi.unit_health.time.monotonic', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.monitor = UnitHealthMonitor(min_timeout=0.01, max_timeout=5, failure_threshold=2, backoff=1)
+
+    def test_rtt_timeout(self):
+        self.assertEqual(5, self.monitor.timeout_of(1))
+        self.monitor.success(1, 0.02)
+        self.assertAlmostEqual(0.02 + 4 * 0.01, self.monitor.timeout_of(1))
+        for _ in range(50):
+            self.monitor.success(1, 0.02)
+        self.assertAlmostEqual(0.02, self.monitor.timeout_of(1), places=3)
+        self.assertEqual(5, self.monitor.timeout_of(2))
+
+    def test_breaker(self):
+        self.monitor.success(1, 0.1)
+        self.monitor.check(1)
+        self.monitor.failure(1)
+        self.monitor.check(1)
+        self.monitor.failure(1)
+        self.assertEqual(STATE_OPEN, self.monitor.state_of(1)['state'])
+        with self.assertRaises(UnitUnavailableException):
+            self.monitor.check(1)
+
+        # one probe after the backoff, it fails and the backoff doubles
+        self.now += 1
+        self.monitor.check(1)
+        self.assertEqual(STATE_HALF_OPEN, self.monitor.state_of(1)['state'])
+        with self.assertRaises(UnitUnavailableException):
+            self.monitor.check(1)
+        self.monitor.failure(1)
+        self.assertEqual(self.now + 2, self.monitor.state_of(1)['open_until'])
+
+        self.now += 2
+        self.monitor.check(1)
+        self.monitor.success(1, 0.1)
+        self.assertEqual(STATE_CLOSED, self.monitor.state_of(1)['state'])
+        self.monitor.check(1)
+
+    def test_cancelled_probe(self):
+        self.monitor.failure(1)
+        self.monitor.failure(1)
+        self.now += 1
+        self.monitor.check(1)
+        self.monitor.cancel(1)
+        self.monitor.check(1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+
+from leafapi.exceptions import ParameterException
+from leafapi.request_message import WriteRegistersResponse
+from registers.register import Register, R, RW
+from registers.write_session import WriteSession
+
+
+class RecordingClient(object):
+    def __init__(self):
+        self.requests = []
+
+    def write_registers(self, unit, address, count, data, **kwargs):
+        self.requests.append((unit, address, count, data))
+        return WriteRegistersResponse(mpu_addr=unit, register_addr=address, data_len=count)
+
+
+def reg(name, address, size=2, access_type=RW):
+    return Register(name=name, address=address, size=size, access_type=access_type, value=0)
+
+
+class WriteSessionTestCase(unittest.TestCase):
+    def test_commit_dirty_only(self):
+        regs = [reg('PWM_{}'.format(i), 4000 + i) for i in range(6)]
+        client = RecordingClient()
+
+        with WriteSession(client, 2, regs) as session:
+            session[regs[0]] = 1
+            session[regs[1]] = 2
+            session['PWM_2'] = 3
+            session[regs[4]] = 5
+        self.assertEqual([(2, 4000, 6, b'\x01\x00\x02\x00\x03\x00'), (2, 4004, 2, b'\x05\x00')], client.requests)
+        self.assertEqual(2, session.frames_sent)
+        # the registers are shared by every unit, their values are not touched
+        self.assertEqual([0] * 6, [r.value for r in regs])
+        self.assertEqual(3, session[regs[2]])
+
+        self.assertEqual(0, session.commit())
+        session[regs[4]] = 6
+        self.assertEqual(1, session.commit())
+        self.assertEqual((2, 4004, 2, b'\x06\x00'), client.requests[-1])
+        self.assertEqual(3, session.frames_sent)
+
+    def test_max_size_and_rollback(self):
+        regs = [reg('PWM_{}'.format(i), 4000 + i) for i in range(4)]
+        session = WriteSession(RecordingClient(), 2, regs, max_size=4)
+        for i, r in enumerate(regs):
+            session[r] = i + 1
+        self.assertEqual([['PWM_0', 'PWM_1'], ['PWM_2', 'PWM_3']],
+                         [[r.name for r in block] for block in session.blocks()])
+
+        session.rollback()
+        self.assertEqual([0, 0, 0, 0], [session[r] for r in regs])
+        self.assertEqual([], session.dirty())
+
+    def test_sessions_per_unit(self):
+        regs = [reg('PWM_0', 4000), reg('PWM_1', 4001)]
+        client = RecordingClient()
+        first = WriteSession(client, 1, regs)
+        second = WriteSession(client, 2, regs, values={'PWM_0': 7, 'PWM_1': 0})
+
+        first[regs[0]] = 7
+        second[regs[1]] = 8
+        self.assertEqual([regs[0]], first.dirty())
+        self.assertEqual([regs[1]], second.dirty())
+        first.commit()
+        second.commit()
+        self.assertEqual([(1, 4000, 2, b'\x07\x00'), (2, 4001, 2, b'\x08\x00')], client.requests)
+
+    def test_gaps(self):
+        regs = [reg('A', 4000), reg('B', 4002), reg('C', 4003, size=1), reg('D', 4004), reg('E', 4005)]
+        session = WriteSession(RecordingClient(), 2, regs)
+        for r in regs:
+            session[r] = 1
+        # unused address 4001 and the odd sized C split the requests
+        self.assertEqual([['A'], ['B'], ['C'], ['D', 'E']], [[r.name for r in block] for block in session.blocks()])
+
+        session.rollback()
+        session[regs[3]] = session[regs[1]] = 2
+        # unchanged C in between
+        self.assertEqual([['B'], ['D']], [[r.name for r in block] for block in session.blocks()])
+
+        with self.assertRaises(ParameterException):
+            session[reg('F', 4010)] = 1
+
+    def test_read_only_register(self):
+        with self.assertRaises(ParameterException):
+            WriteSession(RecordingClient(), 2, [reg('FW_VERSION', 1000, access_type=R)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from leafapi.codec import codecs  # noqa: E402
+from leafapi.frame import sp, packet_header, SP_PKG_TYPE_REQR  # noqa: E402
+from leafapi.pdu import ApiResponse, frame_cache_clear  # noqa: E402
+from leafapi.request_message import ReadRegistersRequest, WriteRegistersRequest  # noqa: E402
+
+
+def response_input(codec: str, data: bytes):
+    """ Response as the backend decodes it: packet payload bytes or a SWIG frame """
+    if codec != 'swig':
+        return packet_header.pack(SP_PKG_TYPE_REQR, 5, 1000, len(data)) + data
+    packet = sp.sp_packet_format()
+    packet.type = SP_PKG_TYPE_REQR
+    packet.mpu_addr = 5
+    packet.register_addr = 1000
+    packet.data_len = len(data)
+    tr_frame = sp.sp_tr_frame()
+    sp.packet_to_frame(data, packet, tr_frame)
+    return tr_frame
+
+
+def benchmark(codec: str, number: int):
+    data = bytes(range(32))
+    response = response_input(codec, data)
+    buffer = bytearray(256)
+
+    def encode_read():
+        ReadRegistersRequest(mpu_addr=5, register_addr=1000, data_len=len(data), codec=codec).encode()
+
+    def encode_write():
+        WriteRegistersRequest(mpu_addr=5, register_addr=1000, data_len=len(data), data=data, codec=codec).encode()
+
+    # the client transmit path: a new request encoded into a pooled buffer
+    def encode_into_read():
+        ReadRegistersRequest(mpu_addr=5, register_addr=1000, data_len=len(data), codec=codec).encode_into(buffer)
+
+    def encode_into_write():
+        WriteRegistersRequest(mpu_addr=5, register_addr=1000, data_len=len(data), data=data,
+                              codec=codec).encode_into(buffer)
+
+    def decode():
+        ApiResponse(codec=codec).decode(response)
+
+    frame_cache_clear()
+    for name, fn in (('encode read', encode_read), ('encode write', encode_write),
+                     ('into read', encode_into_read), ('into write', encode_into_write), ('decode', decode)):
+        t = timeit.timeit(fn, number=number)
+        print(f"{codec:>8} {name:<14}: {t / number * 1e6:8.2f} us")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare serial protocol codec backends.')
+    parser.add_argument('--number', action='store', type=int, default=100000,
+                        help='Number of iterations.')
+
+    args = parser.parse_args()
+
+    for codec in codecs:
+        benchmark(codec, args.number)
@@ -1,47 +1,153 @@
 import argparse
-
-
-def generate(src, dst_fp, reg_type, access_type):
+import ast
+import importlib.util
+import operator
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from registers.read_plan import ReadPlan  # noqa: E402
+from registers.register import Register  # noqa: E402
+
+_define = re.compile(r'^\s*#\s*define\s+(\w+)\s+(.+?)\s*(?://.*|/\*.*)?$')
+_int_suffix = re.compile(r'\b(0[xX][0-9a-fA-F]+|\d+)[uUlL]+\b')
+_operators = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.FloorDiv: operator.floordiv,
+              ast.LShift: operator.lshift, ast.RShift: operator.rshift, ast.BitOr: operator.or_}
+
+
+def evaluate(expr: str, constants: dict) -> int:
+    """ Value of a C integer constant expression of literals and already known constants """
+    def value(node):
+        if isinstance(node, ast.Constant) and isinstance(node.value, int):
+            return node.value
+        if isinstance(node, ast.Name) and node.id in constants:
+            return constants[node.id]
+        if isinstance(node, ast.BinOp) and type(node.op) in _operators:
+            return _operators[type(node.op)](value(node.left), value(node.right))
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            return -value(node.operand)
+        raise ValueError("not an integer constant expression: {}".format(expr))
+
+    expr = _int_suffix.sub(r'\1', expr).replace('/', '//')
+    return value(ast.parse(expr, mode='eval').body)
+
+
+def read_header(src) -> dict:
+    """ Integer #define constants of a C header (mb_regs_configs.h) in definition order, no SWIG module needed """
+    constants = dict()
     with open(src, 'r') as fp:
-        name = ''
-        size = ''
         for line in fp.readlines():
-
-            if line.startswith(reg_type):
-                n = line.split(' ')[0]
-                if name == '':
-                    name = n[len(reg_type):]
-                    address = n
-
-                if n.endswith('_SIZE'):
-                    size = n
-
-            if name and size:
-                dst_fp.write(
-                    f"    {name} = Register(name='{name}', address={address}, size={size} * 2, access_type={access_type})\n")
-
-                name = ''
-                size = ''
-
-
-def generate_registers_class(src: str, dst: str):
+            match = _define.match(line)
+            if match is None:
+                continue
+            try:
+                constants[match.group(1)] = evaluate(match.group(2), constants)
+            except (ValueError, SyntaxError):
+                pass  # not an integer constant
+    return constants
+
+
+def read_mb_data(src) -> dict:
+    """ Integer constants of mb_data.py in definition order, the SWIG extension (_mb_data) must be next to it """
+    sys.path.insert(0, os.path.dirname(os.path.abspath(src)))
+    spec = importlib.util.spec_from_file_location('mb_data', src)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    constants = dict()
+    with open(src, 'r') as fp:
+        for line in fp.readlines():
+            name = line.split(' ')[0]
+            if isinstance(getattr(module, name, None), int):
+                constants[name] = getattr(module, name)
+    return constants
+
+
+def read_constants(src) -> dict:
+    return read_header(src) if src.endswith('.h') else read_mb_data(src)
+
+
+def scan(constants, reg_type):
+    """ (name, address, size in registers) of the registers in definition order,
+    a register is a constant with a matching <name>_SIZE constant """
+    for n in constants:
+        if n.startswith(reg_type) and not n.endswith('_SIZE') and n + '_SIZE' in constants:
+            yield n[len(reg_type):], constants[n], constants[n + '_SIZE']
+
+
+def generate(constants, dst_fp, reg_type, access_type) -> list:
+    registers = []
+    for name, address, size in scan(constants, reg_type):
+        registers.append(Register(name=name, address=address, size=size * 2, access_type=access_type))
+        dst_fp.write(
+            f"    {name} = Register(name='{name}', address={address}, size={size * 2}, access_type={access_type})\n")
+    return registers
+
+
+def generate_tables(dst_fp, prefix, registers):
+    registers = sorted(registers, key=lambda r: r.address)
+
+    dst_fp.write(f"{prefix}_ADDRESSES = {tuple(reg.address for reg in registers)!r}\n")
+    dst_fp.write(f"{prefix}_NAMES = {tuple(reg.name for reg in registers)!r}\n")
+    dst_fp.write(f"{prefix}_NAME_TO_ADDRESS = {{\n")
+    for reg in registers:
+        dst_fp.write(f"    '{reg.name}': {reg.address},\n")
+    dst_fp.write("}\n")
+    dst_fp.write(f"{prefix}_ADDRESS_TO_NAME = {{\n")
+    for reg in registers:
+        dst_fp.write(f"    {reg.address}: '{reg.name}',\n")
+    dst_fp.write("}\n")
+
+    # (address, count in bytes, block struct format, register names), no format for overlapping registers
+    dst_fp.write(f"{prefix}_READ_PLAN = (\n")
+    for block in ReadPlan(registers).blocks:
+        frm = block.codec.struct.format if block.codec is not None else None
+        names = tuple(reg.name for reg in block.registers)
+        dst_fp.write(f"    ({block.address}, {block.count}, {frm!r}, {names!r}),\n")
+    dst_fp.write(")\n")
+
+
+def generate_registers_class(src: str, dst: str, partial: bool = False):
+    """
+    :param src: mb_regs_configs.h or mb_data.py
+    :param dst: The generated module
+    :param partial: The source holds only some of the firmware registers, the module is marked as partial
+    """
+    constants = read_constants(src)
     dst_fp = open(dst, 'w')
 
+    dst_fp.write('"""\n')
+    dst_fp.write(f"Generated by tools/generate_registers.py from {os.path.basename(src)}, do not edit.\n")
+    dst_fp.write("All values are literals, importing this module needs no SWIG module.\n")
+    if partial:
+        dst_fp.write("\n")
+        dst_fp.write("PARTIAL register map: the source held only some of the firmware registers.\n")
+        dst_fp.write("Regenerate it from the firmware header before relying on it:\n")
+        dst_fp.write("    python tools/generate_registers.py --header <firmware>/mb_regs/mb_regs_configs.h\n")
+    dst_fp.write('"""\n')
     dst_fp.write("from registers.register import Register, R, W, RW\n")
-    dst_fp.write("from leafapi.leaf_sys.mb_data import *\n")
+    dst_fp.write("\n")
+    dst_fp.write(f"PARTIAL = {partial!r}  # only some of the firmware registers\n")
     dst_fp.write("\n\n")
     dst_fp.write("class InputRegisters:\n")
 
     reg_type = 'MB_IR_'
     access_type = 'R'
-    generate(src, dst_fp, reg_type, access_type)
+    input_registers = generate(constants, dst_fp, reg_type, access_type)
 
     dst_fp.write("\n\n")
     dst_fp.write("class HoldingRegisters:\n")
 
     reg_type = 'MB_HR_'
     access_type = 'RW'
-    generate(src, dst_fp, reg_type, access_type)
+    holding_registers = generate(constants, dst_fp, reg_type, access_type)
+
+    dst_fp.write("\n\n")
+    generate_tables(dst_fp, 'INPUT', input_registers)
+    dst_fp.write("\n")
+    generate_tables(dst_fp, 'HOLDING', holding_registers)
 
     dst_fp.close()
 
@@ -53,9 +159,13 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Helper script to generate Register description file.')
     parser.add_argument('--mb_data', action='store', default=default_src,
                         help='Path to mb_data.py file.')
+    parser.add_argument('--header', action='store', default=None,
+                        help='Path to mb_regs/mb_regs_configs.h file, used instead of mb_data.py (no SWIG needed).')
     parser.add_argument('--out', action='store', default=default_dst,
-                        help='Path to mb_data.py file.')
+                        help='Path to the generated sys_registers.py file.')
+    parser.add_argument('--partial', action='store_true',
+                        help='The source holds only some of the firmware registers, mark the output as partial.')
 
     args = parser.parse_args()
 
-    generate_registers_class(args.mb_data, args.out)
+    generate_registers_class(args.header or args.mb_data, args.out, args.partial)